@@ -4,12 +4,13 @@ Uses Groq for LLM and integrates with our MCP tools
 """
 
 import asyncio
+import json
 import os
 from typing import Dict, Any, List, Optional
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_anthropic import ChatAnthropic
 from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -115,7 +116,7 @@ Use the available tools to answer questions about the hotel data. When asked abo
             traceback.print_exc()
             return False
     
-    def preprocess_query(self, query: str) -> str:
+    def preprocess_query(self, query: str, chart_format: str = "png") -> str:
         """
         Enhance user queries with context and specific tool suggestions
         """
@@ -162,7 +163,10 @@ Use the available tools to answer questions about the hotel data. When asked abo
         # Chart and visualization queries
         chart_keywords = ['chart', 'graph', 'plot', 'visualization', 'pie', 'bar', 'line', 'generate', 'create']
         if any(word in query_lower for word in chart_keywords):
-            suggestions.append("📊 Visualization: Use generate_chart_from_data() with appropriate data source")
+            if chart_format != "png":
+                suggestions.append(f"📊 Visualization: Use generate_chart_from_data() with appropriate data source and output_format='{chart_format}'")
+            else:
+                suggestions.append("📊 Visualization: Use generate_chart_from_data() with appropriate data source")
             
         # Search and filter queries
         search_keywords = ['find', 'search', 'filter', 'where', 'lookup', 'query']
@@ -181,14 +185,35 @@ Use the available tools to answer questions about the hotel data. When asked abo
         
         return enhanced_query
 
-    async def query(self, user_input: str) -> Dict[str, Any]:
+    @staticmethod
+    def tool_outputs(messages: List[Any], tool_name: str) -> List[Dict[str, Any]]:
+        """Decoded JSON results of every call to one tool, in call order"""
+        outputs = []
+        for message in messages:
+            if not isinstance(message, ToolMessage) or message.name != tool_name:
+                continue
+            content = message.content
+            if isinstance(content, list):
+                # Content blocks: keep the text parts
+                content = "".join(
+                    block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+                )
+            try:
+                decoded = json.loads(content) if isinstance(content, str) else content
+            except json.JSONDecodeError:
+                continue
+            if isinstance(decoded, dict):
+                outputs.append(decoded)
+        return outputs
+
+    async def query(self, user_input: str, chart_format: str = "png") -> Dict[str, Any]:
         """Process user query using the agent with preprocessing and error handling"""
         if not self.agent:
             raise RuntimeError("Agent not initialized. Call initialize() first.")
         
         try:
             # Preprocess query to add helpful context
-            enhanced_query = self.preprocess_query(user_input)
+            enhanced_query = self.preprocess_query(user_input, chart_format)
             
             print(f"🔄 Processing query: {user_input}")
             if len(enhanced_query) > len(user_input):
@@ -258,7 +283,8 @@ Use the available tools to answer questions about the hotel data. When asked abo
                 "original_query": user_input,
                 "enhanced_query": enhanced_query,
                 "tools_used": [msg.tool_calls[0]['name'] for msg in result["messages"] 
-                              if hasattr(msg, 'tool_calls') and msg.tool_calls] if tool_calls > 0 else []
+                              if hasattr(msg, 'tool_calls') and msg.tool_calls] if tool_calls > 0 else [],
+                "chart_results": self.tool_outputs(result["messages"], "generate_chart_from_data")
             }
             
         except Exception as e:
@@ -13,18 +13,30 @@ from typing import Dict, Any, Optional, List
 import asyncio
 import os
 import json
+import uuid
 from datetime import datetime
 from agent.langgraph_agent import MongoDBAnalyticsAgent
+from helpers.chart_registry import ChartRegistry
+from helpers.chart_retention import ChartRetention
 
 # Global agent instance
 agent: Optional[MongoDBAnalyticsAgent] = None
 
+# Charts directory and its index of produced charts
+charts_dir = os.path.join(os.getcwd(), "charts")
+os.makedirs(charts_dir, exist_ok=True)
+chart_registry = ChartRegistry(charts_dir)
+chart_retention = ChartRetention(chart_registry)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     global agent
     try:
         # Startup
+        if await asyncio.to_thread(chart_registry.open):
+            print("🗂️ Chart registry created from existing chart files")
+        chart_retention.start()
         agent = MongoDBAnalyticsAgent()
         if await agent.initialize():
             print("✅ MongoDB Analytics Agent initialized successfully")
@@ -40,6 +52,8 @@ async def lifespan(app: FastAPI):
         if agent:
             await agent.cleanup()
             print("🧹 Agent cleanup completed")
+        await chart_retention.stop()
+        chart_registry.close()
 
 app = FastAPI(
     title="MongoDB Analytics Agent API",
@@ -58,16 +72,15 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Mount static files for charts
-charts_dir = os.path.join(os.getcwd(), "charts")
-os.makedirs(charts_dir, exist_ok=True)
-app.mount("/charts", StaticFiles(directory=charts_dir), name="charts")
-
 # Mount UI static files if they exist
 ui_dir = os.path.join(os.path.dirname(__file__), "ui", "build")
 if os.path.exists(ui_dir):
     app.mount("/ui", StaticFiles(directory=ui_dir, html=True), name="ui")
 
+# png/svg are files under /charts; vega_lite is returned inline as chart_spec
+CHART_FORMATS = ("png", "svg", "vega_lite")
+CHART_MEDIA_TYPES = {".png": "image/png", ".svg": "image/svg+xml", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
 class QueryRequest(BaseModel):
     query: str
     generate_chart: bool = False
@@ -75,9 +88,11 @@ class QueryRequest(BaseModel):
     chart_title: Optional[str] = None
     save_chart: bool = True
     chart_size: Optional[tuple] = None  # (width, height)
+    chart_format: str = "png"  # png, svg, vega_lite (spec drawn by the client, nothing rasterized)
 
 class QueryResponse(BaseModel):
     success: bool
+    request_id: Optional[str] = None
     response: str
     tool_calls: int
     message_count: int
@@ -85,6 +100,8 @@ class QueryResponse(BaseModel):
     chart_path: Optional[str] = None
     chart_title: Optional[str] = None
     chart_type: Optional[str] = None
+    chart_format: Optional[str] = None
+    chart_spec: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     suggestion: Optional[str] = None
 
@@ -103,9 +120,12 @@ async def root():
             "/charts/{filename}": "GET - Retrieve generated charts",
             "/charts": "GET - List available charts",
             "/clear-charts": "DELETE - Clear all generated charts",
+            "/chart-retention": "GET - Chart retention limits and reclaimed space",
+            "/slow-queries": "GET - Slow-query log from the MCP server profiler",
             "/docs": "GET - API documentation"
         },
         "chart_types": ["auto", "bar", "line", "pie", "horizontal_bar", "scatter"],
+        "chart_formats": list(CHART_FORMATS),
         "status": "running"
     }
 
@@ -143,6 +163,39 @@ async def get_tools():
     
     return {"tools": tools_info, "total_count": len(tools_info)}
 
+async def call_mcp_tool(name: str, arguments: Dict[str, Any]) -> Any:
+    """Invoke an MCP tool directly (bypassing the LLM) and decode its JSON result"""
+    global agent
+    if not agent or not agent.tools:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+    
+    tool = next((t for t in agent.tools if t.name == name), None)
+    if tool is None:
+        raise HTTPException(status_code=404, detail=f"MCP tool '{name}' not available")
+    
+    content = await tool.ainvoke(arguments)
+    if isinstance(content, list):
+        # Content blocks: keep the text parts
+        content = "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    if isinstance(content, str):
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return {"result": content}
+    return content
+
+@app.get("/slow-queries")
+async def get_slow_queries(limit: int = 20):
+    """Slow-query log and per-operation timings recorded by the MCP server"""
+    try:
+        return await call_mcp_tool("get_slow_queries", {"limit": limit})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch slow queries: {str(e)}")
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """Process analytics query with optional chart generation"""
@@ -151,43 +204,58 @@ async def process_query(request: QueryRequest):
     if not agent:
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
+    if request.chart_format not in CHART_FORMATS:
+        raise HTTPException(status_code=400, detail=f"chart_format must be one of {list(CHART_FORMATS)}")
+    
+    request_id = uuid.uuid4().hex
     try:
         # Process the query
-        result = await agent.query(request.query)
+        result = await agent.query(request.query, chart_format=request.chart_format)
         
         # Check if a chart was generated by the agent
         chart_path = None
         chart_title = None
         chart_type = None
+        chart_format = None
+        chart_spec = None
         
-        # Look for chart information in the response or tools used
-        if result.get("success") and "generate_chart_from_data" in result.get("tools_used", []):
-            # Check for newest chart file
-            charts_dir = "./charts"
-            if os.path.exists(charts_dir):
-                chart_files = [f for f in os.listdir(charts_dir) if f.endswith('.png')]
-                if chart_files:
-                    # Get the most recently created chart
-                    chart_files.sort(key=lambda x: os.path.getctime(os.path.join(charts_dir, x)), reverse=True)
-                    newest_chart = chart_files[0]
-                    chart_path = f"/charts/{newest_chart}"
-                    chart_title = "Generated Chart"
-                    chart_type = "image"
+        # Use the chart the tool reported for this request; specs come back
+        # inline, image files are recorded in the registry under the request id
+        chart_results = [r for r in result.get("chart_results", []) if r.get("success")]
+        if result.get("success") and chart_results:
+            latest = chart_results[-1]
+            chart_title = latest.get("title", "Generated Chart")
+            chart_type = latest.get("chart_type")
+            chart_format = latest.get("chart_format", "png")
+            if latest.get("chart_spec"):
+                chart_spec = latest["chart_spec"]
+            for chart in chart_results:
+                if chart.get("chart_file"):
+                    record = await asyncio.to_thread(
+                        chart_registry.register, chart["chart_file"], request_id,
+                        chart.get("title"), chart.get("chart_type"))
+                    if record and chart is latest:
+                        chart_path = record["path"]
         
         # Also check if the agent explicitly requested chart generation
         if request.generate_chart and result["success"]:
             chart_info = await generate_chart_from_result(
                 result, 
                 request.query,
-                request.chart_type or "auto"
+                request.chart_type or "auto",
+                request.chart_format,
+                request_id
             )
-            if chart_info.get("path"):
+            if chart_info.get("path") or chart_info.get("spec"):
                 chart_path = chart_info.get("path")
+                chart_spec = chart_info.get("spec")
                 chart_title = chart_info.get("title", "Generated Chart") 
                 chart_type = chart_info.get("type", "image")
+                chart_format = request.chart_format
         
         return QueryResponse(
             success=result["success"],
+            request_id=request_id,
             response=result["response"],
             tool_calls=result.get("tool_calls", 0),
             message_count=result.get("message_count", 0),
@@ -195,6 +263,8 @@ async def process_query(request: QueryRequest):
             chart_path=chart_path,
             chart_title=chart_title,
             chart_type=chart_type,
+            chart_format=chart_format,
+            chart_spec=chart_spec,
             error=result.get("error"),
             suggestion=result.get("suggestion")
         )
@@ -205,74 +275,60 @@ async def process_query(request: QueryRequest):
 @app.get("/charts/{filename}")
 async def get_chart(filename: str):
     """Serve generated chart files"""
-    chart_path = f"./charts/{filename}"
+    chart_path = os.path.join(charts_dir, os.path.basename(filename))
     if os.path.exists(chart_path):
+        # Served charts are the last to be evicted
+        chart_retention.note_access(os.path.basename(filename))
         return FileResponse(
             path=chart_path,
-            media_type="image/png",
+            media_type=CHART_MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream"),
             filename=filename
         )
     else:
         raise HTTPException(status_code=404, detail="Chart not found")
 
 @app.get("/charts")
-async def list_charts():
-    """List all available chart files"""
-    charts_dir = "./charts"
-    if not os.path.exists(charts_dir):
-        return {"charts": [], "count": 0}
-    
-    chart_files = []
-    for filename in os.listdir(charts_dir):
-        if filename.endswith(('.png', '.jpg', '.jpeg', '.svg')):
-            file_path = os.path.join(charts_dir, filename)
-            file_stats = os.stat(file_path)
-            chart_files.append({
-                "filename": filename,
-                "path": f"/charts/{filename}",
-                "size": file_stats.st_size,
-                "created": datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-                "modified": datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-            })
-    
-    # Sort by creation date, newest first
-    chart_files.sort(key=lambda x: x["created"], reverse=True)
+async def list_charts(limit: int = 50, offset: int = 0, request_id: Optional[str] = None):
+    """List charts from the registry, newest first"""
+    limit = max(1, min(limit, 500))
+    offset = max(0, offset)
+    charts, total = await asyncio.to_thread(chart_registry.page, limit, offset, request_id)
     
     return {
-        "charts": chart_files,
-        "count": len(chart_files),
+        "charts": charts,
+        "count": len(charts),
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + len(charts) if offset + len(charts) < total else None,
         "charts_directory": charts_dir
     }
 
 @app.delete("/clear-charts")
 async def clear_charts():
     """Clear all generated chart files"""
-    charts_dir = "./charts"
-    if not os.path.exists(charts_dir):
-        return {"message": "No charts directory found", "deleted": 0}
-    
-    deleted_count = 0
-    for filename in os.listdir(charts_dir):
-        if filename.endswith(('.png', '.jpg', '.jpeg', '.svg')):
-            file_path = os.path.join(charts_dir, filename)
-            try:
-                os.remove(file_path)
-                deleted_count += 1
-            except Exception as e:
-                print(f"Error deleting {filename}: {e}")
+    # Deletes in batches in a worker thread, serialized with retention passes
+    result = await asyncio.to_thread(chart_retention.clear)
     
     return {
-        "message": f"Cleared {deleted_count} chart files",
-        "deleted": deleted_count
+        "message": f"Cleared {result['deleted']} chart files",
+        "deleted": result["deleted"],
+        "reclaimed_bytes": result["reclaimed_bytes"]
     }
 
-async def generate_chart_from_result(result: Dict[str, Any], query: str, chart_type: Optional[str] = None) -> Dict[str, Any]:
+@app.get("/chart-retention")
+async def get_chart_retention():
+    """Chart retention limits, current usage and space reclaimed so far"""
+    return await asyncio.to_thread(chart_retention.stats)
+
+async def generate_chart_from_result(result: Dict[str, Any], query: str, chart_type: Optional[str] = None,
+                                     output_format: str = "png", request_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate chart based on query result and context"""
     try:
         # Import chart generation module
         from helpers.chart_generator import ChartGenerator
         
-        chart_gen = ChartGenerator()
+        chart_gen = ChartGenerator(charts_dir)
         
         # Determine appropriate chart type if not specified
         if not chart_type or chart_type == "auto":
@@ -283,11 +339,20 @@ async def generate_chart_from_result(result: Dict[str, Any], query: str, chart_t
             query=query,
             result_data=result,
             chart_type=chart_type,
-            tools_used=result.get("tools_used", [])
+            tools_used=result.get("tools_used", []),
+            output_format=output_format
         )
         
-        if chart_result and "path" in chart_result:
+        if chart_result and chart_result.get("spec"):
+            return {
+                "spec": chart_result["spec"],
+                "title": chart_result.get("title", f"Chart for: {query[:50]}..."),
+                "type": chart_type
+            }
+        if chart_result and chart_result.get("path"):
             filename = os.path.basename(chart_result["path"])
+            await asyncio.to_thread(chart_registry.register, filename, request_id,
+                                    chart_result.get("title"), chart_type)
             return {
                 "path": f"/charts/{filename}",
                 "title": chart_result.get("title", f"Chart for: {query[:50]}..."),
@@ -12,6 +12,9 @@ import uuid
 from datetime import datetime
 import numpy as np
 
+# Output formats: image files, or a Vega-Lite spec the client draws itself
+OUTPUT_FORMATS = ("png", "svg", "vega_lite")
+
 # Set style for better looking charts
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -60,21 +63,33 @@ class ChartGenerator:
         query: str, 
         result_data: Dict[str, Any], 
         chart_type: str,
-        tools_used: List[str]
-    ) -> Optional[str]:
-        """Generate chart based on the result data"""
+        tools_used: List[str],
+        output_format: str = "png"
+    ) -> Optional[Dict[str, Any]]:
+        """Generate chart based on the result data
+        
+        Returns {"path", "title"} for image formats, or {"spec", "title"} for
+        'vega_lite', which is built without drawing anything.
+        """
         
         try:
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"Unknown output format '{output_format}'")
+            
             # Extract data from agent response
             chart_data = await self._extract_chart_data(result_data, tools_used)
             
             if not chart_data:
                 return None
             
+            title = self._generate_chart_title(query, chart_type)
+            if output_format == "vega_lite":
+                return {"spec": self._create_vega_lite_spec(chart_data, chart_type, title), "title": title}
+            
             # Generate unique filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             unique_id = str(uuid.uuid4())[:8]
-            filename = f"chart_{timestamp}_{unique_id}.png"
+            filename = f"chart_{timestamp}_{unique_id}.{output_format}"
             filepath = os.path.join(self.charts_dir, filename)
             
             # Create chart based on type
@@ -96,12 +111,12 @@ class ChartGenerator:
             # Add title and styling
             self._add_chart_styling(fig, ax, query, chart_type)
             
-            # Save chart
+            # Save chart; dpi only matters for the raster format
             plt.tight_layout()
-            plt.savefig(filepath, dpi=300, bbox_inches='tight')
+            plt.savefig(filepath, format=output_format, dpi=300, bbox_inches='tight')
             plt.close()
             
-            return filepath
+            return {"path": filepath, "title": title}
             
         except Exception as e:
             print(f"❌ Chart generation failed: {e}")
@@ -179,6 +194,37 @@ class ChartGenerator:
             }
         }
     
+    def _create_vega_lite_spec(self, chart_data: Dict[str, Any], chart_type: str, title: str) -> Dict[str, Any]:
+        """Vega-Lite spec with the chart's series inlined"""
+        values = [{"x": label, "y": value} for label, value in chart_data["data"].items()]
+        x_axis = {"field": "x", "type": "ordinal", "sort": None, "title": chart_data.get("x_label", "Category")}
+        y_axis = {"field": "y", "type": "quantitative", "title": chart_data.get("y_label", "Value")}
+        
+        if chart_type == "pie":
+            mark = {"type": "arc", "tooltip": True}
+            encoding = {
+                "theta": {"field": "y", "type": "quantitative"},
+                "color": {"field": "x", "type": "nominal", "sort": None, "title": chart_data.get("x_label", "Category")}
+            }
+        elif chart_type == "horizontal_bar":
+            mark = {"type": "bar", "tooltip": True}
+            encoding = {"y": {**x_axis, "type": "nominal"}, "x": y_axis}
+        elif chart_type == "line":
+            mark = {"type": "line", "point": True, "tooltip": True}
+            encoding = {"x": x_axis, "y": y_axis}
+        else:
+            mark = {"type": "bar", "tooltip": True}
+            encoding = {"x": x_axis, "y": y_axis}
+        
+        return {
+            "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+            "title": title,
+            "width": "container",
+            "data": {"values": values},
+            "mark": mark,
+            "encoding": encoding
+        }
+    
     def _create_line_chart(self, ax, chart_data: Dict[str, Any], query: str):
         """Create line chart for time series data"""
         data = chart_data["data"]
@@ -0,0 +1,191 @@
+"""
+Chart Registry for MongoDB Analytics Agent
+Records each chart file in SQLite as it is produced, so lookups and listings never scan the charts directory
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+CHART_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.svg')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS charts (
+    chart_id TEXT PRIMARY KEY,
+    request_id TEXT,
+    format TEXT,
+    title TEXT,
+    chart_type TEXT,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS charts_created_at ON charts (created_at DESC);
+CREATE INDEX IF NOT EXISTS charts_request_id ON charts (request_id);
+CREATE INDEX IF NOT EXISTS charts_accessed_at ON charts (accessed_at);
+"""
+
+
+class ChartRegistry:
+    """SQLite index of the files in the charts directory
+
+    chart_id is the file name. A content-addressed chart reused by a later
+    request keeps its created_at; request_id and accessed_at move to the latest
+    request. Calls are blocking and short; async callers run them in a thread.
+    """
+
+    def __init__(self, charts_dir: str = "./charts", db_path: Optional[str] = None):
+        self.charts_dir = charts_dir
+        # Kept beside the charts directory so the static /charts mount never serves it
+        default_path = os.path.join(os.path.dirname(os.path.abspath(charts_dir)), "chart_registry.sqlite3")
+        self.db_path = db_path or os.getenv("CHART_REGISTRY_PATH", default_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> bool:
+        """Open (or create) the registry; a new registry indexes existing files once"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        created = not os.path.exists(self.db_path)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        with self._lock:
+            self._conn = conn
+        if created:
+            self.index_directory()
+        return created
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Chart registry not opened. Call open() first.")
+        return self._conn
+
+    def index_directory(self) -> int:
+        """Add chart files already on disk, e.g. left by an older server version"""
+        return self.reconcile()["added"]
+
+    def reconcile(self) -> Dict[str, int]:
+        """Add unindexed chart files (e.g. written by other MCP clients) and drop rows whose file is gone"""
+        on_disk = {}
+        with os.scandir(self.charts_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(CHART_EXTENSIONS) and entry.is_file():
+                    on_disk[entry.name] = entry.stat()
+        with self._lock:
+            known = {row[0] for row in self.conn.execute("SELECT chart_id FROM charts")}
+        added = [(name, _format_of(name), stat.st_size, stat.st_mtime, stat.st_mtime)
+                 for name, stat in on_disk.items() if name not in known]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO charts (chart_id, format, size_bytes, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)", added)
+        removed = self.remove(known - on_disk.keys())
+        return {"added": len(added), "removed": removed}
+
+    def register(self, filename: str, request_id: Optional[str] = None, title: Optional[str] = None,
+                 chart_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Record a chart file a request produced; returns None if the file does not exist"""
+        chart_id = os.path.basename(filename)
+        try:
+            size = os.path.getsize(os.path.join(self.charts_dir, chart_id))
+        except OSError:
+            return None
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO charts (chart_id, request_id, format, title, chart_type, size_bytes, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (chart_id) DO UPDATE SET "
+                "request_id = excluded.request_id, size_bytes = excluded.size_bytes, "
+                "title = COALESCE(excluded.title, title), chart_type = COALESCE(excluded.chart_type, chart_type), "
+                "accessed_at = excluded.accessed_at",
+                (chart_id, request_id, _format_of(chart_id), title, chart_type, size, now, now))
+            row = self.conn.execute("SELECT * FROM charts WHERE chart_id = ?", (chart_id,)).fetchone()
+        return _to_record(row)
+
+    def get(self, chart_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM charts WHERE chart_id = ?", (chart_id,)).fetchone()
+        return _to_record(row) if row else None
+
+    def touch(self, chart_id: str) -> bool:
+        """Record that a chart was served"""
+        with self._lock:
+            cursor = self.conn.execute("UPDATE charts SET accessed_at = ? WHERE chart_id = ?", (time.time(), chart_id))
+        return cursor.rowcount > 0
+
+    def touch_many(self, accessed: Dict[str, float]):
+        """Apply access times collected in memory"""
+        with self._lock:
+            self.conn.executemany("UPDATE charts SET accessed_at = MAX(accessed_at, ?) WHERE chart_id = ?",
+                                  [(ts, chart_id) for chart_id, ts in accessed.items()])
+
+    def least_recently_used(self, limit: int, accessed_before: Optional[float] = None) -> List[Tuple[str, int]]:
+        """(chart_id, size) of the charts accessed longest ago, optionally only those idle since a time"""
+        where, params = ("WHERE accessed_at < ?", [accessed_before]) if accessed_before is not None else ("", [])
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT chart_id, size_bytes FROM charts {where} ORDER BY accessed_at, chart_id LIMIT ?",
+                params + [limit]).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def totals(self) -> Tuple[int, int]:
+        """(chart count, total bytes)"""
+        with self._lock:
+            count, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM charts").fetchone()
+        return count, total_bytes
+
+    def page(self, limit: int = 50, offset: int = 0,
+             request_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of charts, newest first, and the total matching count"""
+        where, params = ("WHERE request_id = ?", [request_id]) if request_id else ("", [])
+        with self._lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM charts {where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT * FROM charts {where} ORDER BY created_at DESC, chart_id LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+        return [_to_record(row) for row in rows], total
+
+    def remove(self, chart_ids: Iterable[str]) -> int:
+        """Forget charts whose files were deleted"""
+        ids = [(chart_id,) for chart_id in chart_ids]
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany("DELETE FROM charts WHERE chart_id = ?", ids)
+            return self.conn.total_changes - before
+
+    def stats(self) -> Dict[str, Any]:
+        count, total_bytes = self.totals()
+        return {"charts": count, "total_bytes": total_bytes, "registry_path": self.db_path}
+
+
+def _format_of(filename: str) -> str:
+    return os.path.splitext(filename)[1][1:].lower()
+
+
+def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "chart_id": row["chart_id"],
+        "filename": row["chart_id"],
+        "path": f"/charts/{row['chart_id']}",
+        "request_id": row["request_id"],
+        "format": row["format"],
+        "title": row["title"],
+        "chart_type": row["chart_type"],
+        "size": row["size_bytes"],
+        "created": datetime.fromtimestamp(row["created_at"]).isoformat(),
+        "last_accessed": datetime.fromtimestamp(row["accessed_at"]).isoformat()
+    }
@@ -0,0 +1,205 @@
+"""
+Chart Retention for MongoDB Analytics Agent
+Background garbage collection that keeps the charts directory within age, size and file-count limits
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from helpers.chart_registry import ChartRegistry
+
+
+class ChartRetention:
+    """Deletes charts idle past max_age, then least recently accessed ones over the limits
+
+    Work is read from the registry in batches of batch_size and runs in a
+    worker thread, so the event loop never waits on the filesystem. Chart
+    accesses are collected in memory and written to the registry at the start
+    of each run. The directory itself is only rescanned every reconcile
+    interval, to pick up files written outside the API (e.g. other MCP clients).
+    This is the only component that enforces the charts directory's limits;
+    the MCP server's chart cache just re-renders a chart deleted here.
+    """
+
+    def __init__(self, registry: ChartRegistry, max_age_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, max_files: Optional[int] = None,
+                 interval: Optional[float] = None, batch_size: Optional[int] = None,
+                 reconcile_interval: Optional[float] = None):
+        self.registry = registry
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else \
+            float(os.getenv("CHART_RETENTION_MAX_AGE_HOURS", "168")) * 3600
+        self.max_bytes = max_bytes or int(os.getenv("CHART_RETENTION_MAX_BYTES", str(1024 * 1024 * 1024)))
+        self.max_files = max_files or int(os.getenv("CHART_RETENTION_MAX_FILES", "10000"))
+        self.interval = interval or float(os.getenv("CHART_RETENTION_INTERVAL_SECONDS", "300"))
+        self.batch_size = batch_size or int(os.getenv("CHART_RETENTION_BATCH_SIZE", "200"))
+        self.reconcile_interval = reconcile_interval or float(os.getenv("CHART_RETENTION_RECONCILE_SECONDS", "3600"))
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._accessed: Dict[str, float] = {}
+        self._last_reconcile = 0.0
+        self.runs = 0
+        self.deleted_files = 0
+        self.reclaimed_bytes = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def note_access(self, chart_id: str):
+        """Record that a chart was served; applied to the registry on the next run"""
+        with self._lock:
+            self._accessed[chart_id] = time.time()
+
+    def _flush_accesses(self):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            self.registry.touch_many(accessed)
+
+    def _delete(self, victims: List[Tuple[str, int]]) -> Tuple[int, int]:
+        """Remove chart files and their registry rows; returns (files, bytes) reclaimed"""
+        files = reclaimed = 0
+        for chart_id, size in victims:
+            try:
+                os.remove(os.path.join(self.registry.charts_dir, chart_id))
+                files += 1
+                reclaimed += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: could not delete chart {chart_id}: {e}")
+        self.registry.remove(chart_id for chart_id, _ in victims)
+        return files, reclaimed
+
+    def run_once(self) -> Dict[str, Any]:
+        """One retention pass: expired charts first, then LRU eviction down to the limits"""
+        with self._run_lock:
+            started = time.perf_counter()
+            now = time.time()
+            self._flush_accesses()
+            reconciled = None
+            if now - self._last_reconcile >= self.reconcile_interval:
+                reconciled = self.registry.reconcile()
+                self._last_reconcile = now
+
+            expired = files = reclaimed = 0
+            if self.max_age_seconds > 0:
+                cutoff = now - self.max_age_seconds
+                while not self._stop.is_set():
+                    batch = self.registry.least_recently_used(self.batch_size, accessed_before=cutoff)
+                    if not batch:
+                        break
+                    deleted, freed = self._delete(batch)
+                    expired += deleted
+                    files += deleted
+                    reclaimed += freed
+
+            while not self._stop.is_set():
+                count, total_bytes = self.registry.totals()
+                if count <= self.max_files and total_bytes <= self.max_bytes:
+                    break
+                victims = []
+                for chart_id, size in self.registry.least_recently_used(self.batch_size):
+                    if count <= self.max_files and total_bytes <= self.max_bytes:
+                        break
+                    victims.append((chart_id, size))
+                    count -= 1
+                    total_bytes -= size
+                if not victims:
+                    break
+                deleted, freed = self._delete(victims)
+                files += deleted
+                reclaimed += freed
+
+            result = {
+                "finished_at": datetime.now().isoformat(),
+                "deleted_files": files,
+                "expired_files": expired,
+                "reclaimed_bytes": reclaimed,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if reconciled is not None:
+                result["reconciled"] = reconciled
+            with self._lock:
+                self.runs += 1
+                self.deleted_files += files
+                self.reclaimed_bytes += reclaimed
+                self.last_run = result
+            return result
+
+    def clear(self) -> Dict[str, Any]:
+        """Delete every chart, in batches"""
+        with self._run_lock:
+            started = time.perf_counter()
+            self.registry.reconcile()
+            files = reclaimed = 0
+            while True:
+                batch = self.registry.least_recently_used(self.batch_size)
+                if not batch:
+                    break
+                deleted, freed = self._delete(batch)
+                files += deleted
+                reclaimed += freed
+            with self._lock:
+                self._accessed.clear()
+                self.deleted_files += files
+                self.reclaimed_bytes += reclaimed
+            return {
+                "deleted": files,
+                "reclaimed_bytes": reclaimed,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+
+    async def _run_forever(self):
+        while not self._stop.is_set():
+            try:
+                result = await asyncio.to_thread(self.run_once)
+                if result["deleted_files"]:
+                    print(f"🧹 Chart retention removed {result['deleted_files']} charts, "
+                          f"reclaimed {result['reclaimed_bytes']:,} bytes")
+            except Exception as e:
+                print(f"Warning: chart retention pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Run retention passes in the background of the current event loop"""
+        if self._task and not self._task.done():
+            return
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        """Stop the background task, letting a pass in progress finish its current batch"""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Keep accesses seen since the last pass
+        await asyncio.to_thread(self._flush_on_stop)
+
+    def _flush_on_stop(self):
+        with self._run_lock:
+            self._flush_accesses()
+
+    def stats(self) -> Dict[str, Any]:
+        count, total_bytes = self.registry.totals()
+        with self._lock:
+            return {
+                "charts": count,
+                "total_bytes": total_bytes,
+                "max_age_hours": round(self.max_age_seconds / 3600, 2),
+                "max_bytes": self.max_bytes,
+                "max_files": self.max_files,
+                "interval_seconds": self.interval,
+                "runs": self.runs,
+                "deleted_files": self.deleted_files,
+                "reclaimed_bytes": self.reclaimed_bytes,
+                "pending_accesses": len(self._accessed),
+                "last_run": self.last_run,
+            }
@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import './App.css';
+import ChartSpec from './components/ChartSpec';
 
 function App() {
   const [messages, setMessages] = useState([]);
@@ -67,7 +68,9 @@ function App() {
         },
         body: JSON.stringify({
           query: text,
-          generate_chart: false
+          generate_chart: false,
+          // Charts come back as a spec and are drawn here instead of as server-rendered PNGs
+          chart_format: 'vega_lite'
         }),
       });
 
@@ -80,6 +83,7 @@ function App() {
             role: 'assistant', 
             content: messageContent,
             chart_path: data.chart_path,
+            chart_spec: data.chart_spec,
             chart_title: data.chart_title
           };
           setMessages(prev => [...prev, assistantMessage]);
@@ -276,8 +280,19 @@ function App() {
                       </div>
                       
                       {/* Display chart if available */}
-                      {message.chart_path && (
+                      {(message.chart_path || message.chart_spec) && (
                         <div className="chart-container">
+                          {message.chart_spec ? (
+                            <div style={{
+                              marginTop: '16px',
+                              borderRadius: '12px',
+                              overflow: 'hidden',
+                              border: '2px solid #e5e5e7',
+                              boxShadow: '0 4px 12px rgba(0,0,0,0.1)'
+                            }}>
+                              <ChartSpec spec={message.chart_spec} />
+                            </div>
+                          ) : (
                           <img 
                             src={`http://localhost:8001${message.chart_path}`}
                             alt={message.chart_title || "Generated Chart"}
@@ -295,6 +310,7 @@ function App() {
                               e.target.style.display = 'none';
                             }}
                           />
+                          )}
                           {message.chart_title && (
                             <div style={{ 
                               fontSize: '13px', 
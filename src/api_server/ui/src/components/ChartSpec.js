@@ -0,0 +1,119 @@
+import React from 'react';
+
+// Draws the Vega-Lite style specs returned by /query (chart_format: 'vega_lite')
+// as plain SVG: bar, horizontal bar, line and arc (pie) marks with one series.
+
+const WIDTH = 640;
+const HEIGHT = 360;
+const MARGIN = { top: 20, right: 20, bottom: 70, left: 70 };
+const PALETTE = ['#8dd3c7', '#80b1d3', '#fb8072', '#bebada', '#fdb462', '#b3de69', '#fccde5', '#bc80bd', '#ccebc5', '#ffed6f'];
+
+const formatValue = (value) => Number(value).toLocaleString(undefined, { maximumFractionDigits: 2 });
+
+const PieChart = ({ values }) => {
+  const total = values.reduce((sum, d) => sum + d.y, 0);
+  const cx = WIDTH / 2;
+  const cy = HEIGHT / 2;
+  const r = HEIGHT / 2 - 30;
+  let angle = -Math.PI / 2;
+
+  return values.map((d, i) => {
+    const sweep = total ? (d.y / total) * Math.PI * 2 : 0;
+    const start = angle;
+    angle += sweep;
+    const large = sweep > Math.PI ? 1 : 0;
+    const [x1, y1] = [cx + r * Math.cos(start), cy + r * Math.sin(start)];
+    const [x2, y2] = [cx + r * Math.cos(angle), cy + r * Math.sin(angle)];
+    const mid = start + sweep / 2;
+    const path = sweep >= Math.PI * 2 - 1e-9
+      ? `M ${cx - r} ${cy} A ${r} ${r} 0 1 1 ${cx + r} ${cy} A ${r} ${r} 0 1 1 ${cx - r} ${cy} Z`
+      : `M ${cx} ${cy} L ${x1} ${y1} A ${r} ${r} 0 ${large} 1 ${x2} ${y2} Z`;
+    return (
+      <g key={i}>
+        <path d={path} fill={PALETTE[i % PALETTE.length]} stroke="#fff">
+          <title>{`${d.x}: ${formatValue(d.y)}`}</title>
+        </path>
+        {sweep > 0.25 && (
+          <text x={cx + r * 0.65 * Math.cos(mid)} y={cy + r * 0.65 * Math.sin(mid)}
+                textAnchor="middle" fontSize="11" fill="#333">
+            {d.x} ({Math.round((d.y / total) * 100)}%)
+          </text>
+        )}
+      </g>
+    );
+  });
+};
+
+const CartesianChart = ({ values, mark, horizontal }) => {
+  const plotW = WIDTH - MARGIN.left - MARGIN.right;
+  const plotH = HEIGHT - MARGIN.top - MARGIN.bottom;
+  const max = Math.max(...values.map(d => d.y), 0) || 1;
+  const step = (horizontal ? plotH : plotW) / values.length;
+  const scale = (v) => (v / max) * (horizontal ? plotW : plotH);
+
+  if (mark === 'line') {
+    const points = values.map((d, i) => [MARGIN.left + step * (i + 0.5), MARGIN.top + plotH - scale(d.y)]);
+    return (
+      <g>
+        <polyline points={points.map(p => p.join(',')).join(' ')} fill="none" stroke="#4c78a8" strokeWidth="2" />
+        {points.map(([x, y], i) => (
+          <g key={i}>
+            <circle cx={x} cy={y} r="4" fill="#4c78a8">
+              <title>{`${values[i].x}: ${formatValue(values[i].y)}`}</title>
+            </circle>
+            <text x={x} y={HEIGHT - MARGIN.bottom + 14} fontSize="10" textAnchor="end"
+                  transform={`rotate(-45 ${x} ${HEIGHT - MARGIN.bottom + 14})`}>{values[i].x}</text>
+          </g>
+        ))}
+      </g>
+    );
+  }
+
+  return values.map((d, i) => {
+    const color = PALETTE[i % PALETTE.length];
+    if (horizontal) {
+      const y = MARGIN.top + step * i + step * 0.1;
+      return (
+        <g key={i}>
+          <rect x={MARGIN.left} y={y} width={scale(d.y)} height={step * 0.8} fill={color}>
+            <title>{`${d.x}: ${formatValue(d.y)}`}</title>
+          </rect>
+          <text x={MARGIN.left - 6} y={y + step * 0.4} fontSize="10" textAnchor="end" dominantBaseline="middle">{d.x}</text>
+          <text x={MARGIN.left + scale(d.y) + 4} y={y + step * 0.4} fontSize="10" dominantBaseline="middle">{formatValue(d.y)}</text>
+        </g>
+      );
+    }
+    const x = MARGIN.left + step * i + step * 0.1;
+    const h = scale(d.y);
+    return (
+      <g key={i}>
+        <rect x={x} y={MARGIN.top + plotH - h} width={step * 0.8} height={h} fill={color}>
+          <title>{`${d.x}: ${formatValue(d.y)}`}</title>
+        </rect>
+        <text x={x + step * 0.4} y={MARGIN.top + plotH - h - 4} fontSize="10" textAnchor="middle">{formatValue(d.y)}</text>
+        <text x={x + step * 0.4} y={HEIGHT - MARGIN.bottom + 14} fontSize="10" textAnchor="end"
+              transform={`rotate(-45 ${x + step * 0.4} ${HEIGHT - MARGIN.bottom + 14})`}>{d.x}</text>
+      </g>
+    );
+  });
+};
+
+const ChartSpec = ({ spec }) => {
+  const values = ((spec && spec.data && spec.data.values) || [])
+    .filter(d => d && d.x !== undefined && typeof d.y === 'number');
+  if (!values.length) return null;
+
+  const mark = typeof spec.mark === 'string' ? spec.mark : (spec.mark && spec.mark.type);
+  const horizontal = mark === 'bar' && spec.encoding && spec.encoding.y && spec.encoding.y.type !== 'quantitative';
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} style={{ width: '100%', height: 'auto', background: '#fff' }}
+         role="img" aria-label={spec.title || 'Chart'}>
+      {mark === 'arc'
+        ? <PieChart values={values} />
+        : <CartesianChart values={values} mark={mark} horizontal={horizontal} />}
+    </svg>
+  );
+};
+
+export default ChartSpec;
@@ -2,7 +2,25 @@
 FastMCP instance - shared across all modules to avoid circular imports
 """
 
+import logging
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
+from mcp_server.utils.async_db_client import async_mongo_client
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Open and close the async MongoDB client on the server's event loop"""
+    if await async_mongo_client.connect():
+        logger.info(f"Async MongoDB client connected: {async_mongo_client.db_name}")
+    else:
+        logger.error("Async MongoDB client failed to connect; async tools will retry lazily")
+    try:
+        yield
+    finally:
+        await async_mongo_client.disconnect()
+        logger.info("Async MongoDB client closed")
 
 # Initialize FastMCP server instance
-mcp = FastMCP("mongodb-hotel-analytics")
\ No newline at end of file
+mcp = FastMCP("mongodb-hotel-analytics", lifespan=lifespan)
@@ -13,6 +13,7 @@ class QueryRequest(BaseModel):
     query: Dict[str, Any] = Field(default_factory=dict, description="MongoDB query filter")
     limit: Optional[int] = Field(None, description="Maximum number of documents to return")
     projection: Optional[Dict[str, int]] = Field(None, description="Fields to include/exclude")
+    prune_large_arrays: bool = Field(True, description="Drop large embedded arrays unless projected")
 
 
 class AggregationRequest(BaseModel):
@@ -19,6 +19,15 @@ src_path = os.path.join(project_root, 'src')
 sys.path.insert(0, src_path)
 
 from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils.result_cache import result_cache
+from mcp_server.utils.rollups import ALL_ROLLUPS
+from mcp_server.utils.index_manager import index_manager
+from mcp_server.utils.schema_profiler import schema_profiler
+from mcp_server.utils.segment_index import segment_index
+from mcp_server.utils.segment_denormalizer import segment_denormalizer
+from mcp_server.utils.date_migration import created_at_migration
+from mcp_server.utils.chart_renderer import chart_renderer
 from mcp_server.mcp_instance import mcp
 
 # Configure logging
@@ -30,6 +39,7 @@ from mcp_server.tools import mongodb_query
 from mcp_server.tools import mongodb_aggregate
 from mcp_server.tools import mongodb_insert
 from mcp_server.tools import mongodb_update
+from mcp_server.tools import mongodb_bulk_write
 from mcp_server.tools import mongodb_get_collections
 from mcp_server.tools import mongodb_describe_collection
 from mcp_server.tools import get_revenue_analytics
@@ -45,6 +55,17 @@ from mcp_server.tools import search_orders
 from mcp_server.tools import quick_stats
 from mcp_server.tools import generate_chart
 from mcp_server.tools import get_data_range
+from mcp_server.tools import server_metrics
+from mcp_server.tools import index_advisor
+from mcp_server.tools import query_profile
+from mcp_server.tools import migrate_dates
+
+# Collections whose external writes must invalidate cached tool results
+WATCHED_COLLECTIONS = ["orders", "customers", "menu_items"]
+
+def _env_flag(name: str, default: str = "true") -> bool:
+    """Read a boolean feature flag from the environment"""
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
 def setup_server():
     """Setup and configure the MCP server"""
@@ -56,6 +77,49 @@ def setup_server():
     
     logger.info(f"Connected to MongoDB database: {mongo_client.db_name}")
     
+    # Pre-warm the connection pool so bursts of tool calls skip connection setup
+    warmed = mongo_client.warm_pool()
+    logger.info(f"Connection pool warmed: {warmed} connections "
+                f"(min={mongo_client.pool_config.min_pool_size}, max={mongo_client.pool_config.max_pool_size})")
+    
+    # Features below write to the database (index builds, new collections,
+    # rewrites of existing orders) and only run when explicitly enabled
+    
+    # Create any indexes the tools depend on without blocking startup
+    if _env_flag("INDEX_BOOTSTRAP_ENABLED", default="false"):
+        index_manager.ensure_indexes_in_background()
+        logger.info("Index bootstrap started in the background")
+    
+    # Keep pre-aggregated rollups fresh in the background
+    if _env_flag("ROLLUPS_ENABLED", default="false"):
+        for rollup in ALL_ROLLUPS:
+            rollup.start_background_refresh()
+        logger.info(f"Maintaining rollup collections: {[r.collection_name for r in ALL_ROLLUPS]}")
+    
+    # Copy customers.segment onto orders and keep it in sync
+    if _env_flag("DENORMALIZE_SEGMENTS_ENABLED", default="false"):
+        segment_denormalizer.enabled = True
+        segment_denormalizer.start_background_sync()
+        logger.info("Maintaining orders.customer_segment in the background")
+    
+    # Invalidate cached analytics results when data changes outside this server
+    if _env_flag("CHANGE_WATCHER_ENABLED"):
+        # Keep the migrated created_at_dt field in step with later writes; without
+        # the watcher the revenue tools stay on the created_at string
+        created_at_migration.start_background_catch_up()
+        mongo_client.start_change_watcher(
+            WATCHED_COLLECTIONS,
+            listeners=[
+                lambda collection, event: result_cache.invalidate_collection(collection),
+                schema_profiler.on_change,
+                segment_index.on_change,
+                segment_denormalizer.on_change,
+                created_at_migration.on_change,
+                *[rollup.on_change for rollup in ALL_ROLLUPS]
+            ]
+        )
+        logger.info(f"Watching {WATCHED_COLLECTIONS} for external changes")
+    
     # Tools are automatically registered through imports
     logger.info("All tools registered successfully")
     
@@ -78,6 +142,12 @@ def main():
         
     except KeyboardInterrupt:
         logger.info("Server shutdown requested")
+        tool_offloader.shutdown(wait=False)
+        chart_renderer.shutdown()
+        for rollup in ALL_ROLLUPS:
+            rollup.stop()
+        segment_denormalizer.stop()
+        created_at_migration.stop()
         mongo_client.disconnect()
         logger.info("MongoDB connection closed")
     except Exception as e:
@@ -3,11 +3,11 @@ Customer insights tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
 
 @mcp.tool()
-def get_top_customers_by_spending(limit: int = 10) -> List[Dict[str, Any]]:
+async def get_top_customers_by_spending(limit: int = 10) -> List[Dict[str, Any]]:
         """Get top customers ranked by total spending.
 
         Args:
@@ -24,7 +24,6 @@ def get_top_customers_by_spending(limit: int = 10) -> List[Dict[str, Any]]:
             2. mongodb_describe_collection() - to understand field names and structure
         """
         try:
-            db = mongo_client.db
             pipeline = [
                 {"$sort": {"total_spent": -1}},
                 {"$limit": limit},
@@ -37,6 +36,6 @@ def get_top_customers_by_spending(limit: int = 10) -> List[Dict[str, Any]]:
                     "email": 1
                 }}
             ]
-            return list(db["customers"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("customers", pipeline)
         except Exception as e:
             return [{"error": f"Customer insights failed: {str(e)}"}]
\ No newline at end of file
@@ -3,11 +3,13 @@ Customer segments analytics tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
 
 @mcp.tool()
-def get_customer_segments() -> List[Dict[str, Any]]:
+@result_cache.cached(collections=["customers"])
+async def get_customer_segments() -> List[Dict[str, Any]]:
         """Analyze customer segments with spending statistics.
 
         Returns:
@@ -16,7 +18,6 @@ def get_customer_segments() -> List[Dict[str, Any]]:
         Groups customers by segment field and calculates aggregated spending statistics.
         """
         try:
-            db = mongo_client.db
             pipeline = [
                 {"$group": {
                     "_id": "$segment",
@@ -29,6 +30,6 @@ def get_customer_segments() -> List[Dict[str, Any]]:
                 }},
                 {"$sort": {"total_spending": -1}}
             ]
-            return list(db["customers"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("customers", pipeline)
         except Exception as e:
             return [{"error": f"Customer segments analysis failed: {str(e)}"}]
\ No newline at end of file
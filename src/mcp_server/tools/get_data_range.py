@@ -2,36 +2,76 @@
 Data range detection tool for MCP server
 """
 
-from typing import Dict, Any
-from mcp_server.utils.db_client import mongo_client
+import os
+from typing import Dict, Any, List
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
+from mcp_server.utils.rollups import daily_revenue_rollup
 from datetime import datetime
 
+# Date bounds only change on writes, which invalidate the cache, so keep them longer
+DATA_RANGE_CACHE_TTL = float(os.getenv("DATA_RANGE_CACHE_TTL_SECONDS", "600"))
+
+
+def _format_day(value: Any) -> Any:
+    """Reduce an ISO string or datetime to YYYY-MM-DD"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime("%Y-%m-%d")
+    return value.strftime("%Y-%m-%d") if value else None
+
+
+async def _monthly_histogram(collection: str) -> List[Dict[str, Any]]:
+    """Documents per month, from the daily rollup when it is current"""
+    if collection == daily_revenue_rollup.source_collection and daily_revenue_rollup.is_fresh():
+        pipeline = [
+            {"$group": {"_id": {"$substrBytes": ["$_id", 0, 7]}, "count": {"$sum": "$order_count"}}},
+            {"$sort": {"_id": 1}}
+        ]
+        rows = await async_mongo_client.aggregate(daily_revenue_rollup.collection_name, pipeline)
+    else:
+        # Only created_at is referenced, so the created_at index covers this scan
+        pipeline = [
+            {"$match": {"created_at": {"$ne": None}}},
+            {"$project": {"_id": 0, "created_at": 1}},
+            {"$group": {
+                "_id": {"$cond": [
+                    {"$eq": [{"$type": "$created_at"}, "date"]},
+                    {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+                    {"$substrBytes": ["$created_at", 0, 7]}
+                ]},
+                "count": {"$sum": 1}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        rows = await async_mongo_client.aggregate(collection, pipeline)
+    return [{"month": row["_id"], "count": row["count"]} for row in rows]
+
+
 @mcp.tool()
-def get_data_date_range(collection: str = "orders") -> Dict[str, Any]:
+@result_cache.cached(collections=lambda args: [args["collection"]], ttl=DATA_RANGE_CACHE_TTL)
+async def get_data_date_range(collection: str = "orders", include_histogram: bool = False) -> Dict[str, Any]:
         """Get the actual date range of data available in the database
-        
+
         Args:
             collection: Collection name to check (default: orders)
-            
+            include_histogram: Also return document counts per month (default: False)
+
         Returns:
             Dictionary with min_date, max_date, total_records, and sample_dates
+            (the first and last timestamps); with include_histogram, a monthly
+            list of {month, count} showing data density
         """
         try:
-            db = mongo_client.db
-            # Get min and max dates from the collection
-            pipeline = [
-                {"$group": {
-                    "_id": None,
-                    "min_date": {"$min": "$created_at"},
-                    "max_date": {"$max": "$created_at"},
-                    "total_records": {"$sum": 1}
-                }}
-            ]
-            
-            result = list(db[collection].aggregate(pipeline))
-            
-            if not result:
+            db = async_mongo_client.db
+            coll = db[collection]
+            # Two index-backed lookups at either end of created_at instead of a full scan
+            date_filter = {"created_at": {"$ne": None}}
+            projection = {"_id": 0, "created_at": 1}
+            first = await coll.find_one(date_filter, projection, sort=[("created_at", 1)])
+            last = await coll.find_one(date_filter, projection, sort=[("created_at", -1)])
+
+            if not first:
                 return {
                     "error": f"No data found in {collection} collection",
                     "min_date": None,
@@ -39,47 +79,28 @@ def get_data_date_range(collection: str = "orders") -> Dict[str, Any]:
                     "total_records": 0,
                     "sample_dates": []
                 }
-            
-            data = result[0]
-            
-            # Get some sample dates to show distribution
-            sample_pipeline = [
-                {"$sample": {"size": 10}},
-                {"$project": {"created_at": 1, "_id": 0}},
-                {"$sort": {"created_at": 1}}
-            ]
-            
-            samples = list(db[collection].aggregate(sample_pipeline))
-            sample_dates = [doc["created_at"] for doc in samples if "created_at" in doc]
-            
-            # Parse dates to extract useful information
-            min_date = data["min_date"]
-            max_date = data["max_date"]
-            
-            # Convert to readable format if they're strings
-            if isinstance(min_date, str):
-                min_dt = datetime.fromisoformat(min_date.replace('Z', '+00:00'))
-                min_date_str = min_dt.strftime("%Y-%m-%d")
-            else:
-                min_date_str = min_date.strftime("%Y-%m-%d") if min_date else None
-                
-            if isinstance(max_date, str):
-                max_dt = datetime.fromisoformat(max_date.replace('Z', '+00:00'))
-                max_date_str = max_dt.strftime("%Y-%m-%d")
-            else:
-                max_date_str = max_date.strftime("%Y-%m-%d") if max_date else None
-            
-            return {
+
+            min_date = first["created_at"]
+            max_date = last["created_at"]
+            min_date_str = _format_day(min_date)
+            max_date_str = _format_day(max_date)
+            # Collection metadata count; no scan
+            total_records = await coll.estimated_document_count()
+
+            result = {
                 "collection": collection,
                 "min_date": min_date_str,
                 "max_date": max_date_str,
                 "min_date_full": str(min_date),
                 "max_date_full": str(max_date),
-                "total_records": data["total_records"],
-                "sample_dates": [str(date) for date in sample_dates[:5]],
-                "summary": f"Data available from {min_date_str} to {max_date_str} ({data['total_records']} records)"
+                "total_records": total_records,
+                "sample_dates": [str(min_date), str(max_date)],
+                "summary": f"Data available from {min_date_str} to {max_date_str} ({total_records} records)"
             }
-            
+            if include_histogram:
+                result["monthly_histogram"] = await _monthly_histogram(collection)
+            return result
+
         except Exception as e:
             return {
                 "error": f"Error checking date range: {str(e)}",
@@ -88,4 +109,4 @@ def get_data_date_range(collection: str = "orders") -> Dict[str, Any]:
                 "max_date": None,
                 "total_records": 0,
                 "sample_dates": []
-            }
\ No newline at end of file
+            }
@@ -3,11 +3,14 @@ Menu performance tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
+from mcp_server.utils.rollups import menu_item_stats
 
 @mcp.tool()
-def get_top_menu_items_by_orders(limit: int = 10) -> List[Dict[str, Any]]:
+@result_cache.cached(collections=["orders"])
+async def get_top_menu_items_by_orders(limit: int = 10) -> List[Dict[str, Any]]:
         """Get most frequently ordered menu items
 
         Args:
@@ -17,18 +20,23 @@ def get_top_menu_items_by_orders(limit: int = 10) -> List[Dict[str, Any]]:
             List of menu items with order frequency and revenue
         """
         try:
-            db = mongo_client.db
-            pipeline = [
-                {"$unwind": "$items"},
-                {"$group": {
-                    "_id": "$items.name",
-                    "total_orders": {"$sum": "$items.quantity"},
-                    "total_revenue": {"$sum": {"$multiply": ["$items.quantity", "$items.price"]}},
-                    "avg_price": {"$avg": "$items.price"}
-                }},
-                {"$sort": {"total_orders": -1}},
-                {"$limit": limit}
-            ]
-            return list(db["orders"].aggregate(pipeline))
+            if menu_item_stats.is_fresh():
+                # Merge per-item daily stats instead of unwinding every order line
+                source = menu_item_stats.collection_name
+                pipeline = menu_item_stats.top_items_pipeline("total_orders", limit)
+            else:
+                source = "orders"
+                pipeline = [
+                    {"$unwind": "$items"},
+                    {"$group": {
+                        "_id": "$items.name",
+                        "total_orders": {"$sum": "$items.quantity"},
+                        "total_revenue": {"$sum": {"$multiply": ["$items.quantity", "$items.price"]}},
+                        "avg_price": {"$avg": "$items.price"}
+                    }},
+                    {"$sort": {"total_orders": -1}},
+                    {"$limit": limit}
+                ]
+            return await async_mongo_client.aggregate(source, pipeline)
         except Exception as e:
             return [{"error": f"Menu performance analysis failed: {str(e)}"}]
\ No newline at end of file
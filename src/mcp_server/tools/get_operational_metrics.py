@@ -3,11 +3,13 @@ Operational metrics tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
 
 @mcp.tool()
-def get_payment_methods_breakdown() -> List[Dict[str, Any]]:
+@result_cache.cached(collections=["orders"])
+async def get_payment_methods_breakdown() -> List[Dict[str, Any]]:
         """Get breakdown of orders by payment method.
 
         Returns:
@@ -16,7 +18,6 @@ def get_payment_methods_breakdown() -> List[Dict[str, Any]]:
         Analyzes payment_method field in orders collection.
         """
         try:
-            db = mongo_client.db
             pipeline = [
                 {"$group": {
                     "_id": "$payment_mode",
@@ -33,6 +34,6 @@ def get_payment_methods_breakdown() -> List[Dict[str, Any]]:
                     "_id": 0
                 }}
             ]
-            return list(db["orders"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("orders", pipeline)
         except Exception as e:
             return [{"error": f"Payment methods breakdown failed: {str(e)}"}]
\ No newline at end of file
@@ -3,18 +3,19 @@ Order status breakdown tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
 
 @mcp.tool()
-def get_orders_by_status() -> List[Dict[str, Any]]:
+@result_cache.cached(collections=["orders"])
+async def get_orders_by_status() -> List[Dict[str, Any]]:
         """Get breakdown of orders by status
 
         Returns:
             List of order statuses with counts and revenue totals
         """
         try:
-            db = mongo_client.db
             pipeline = [
                 {"$group": {
                     "_id": "$order_status",
@@ -31,6 +32,6 @@ def get_orders_by_status() -> List[Dict[str, Any]]:
                     "_id": 0
                 }}
             ]
-            return list(db["orders"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("orders", pipeline)
         except Exception as e:
             return [{"error": f"Order status breakdown failed: {str(e)}"}]
\ No newline at end of file
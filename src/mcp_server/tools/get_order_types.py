@@ -3,18 +3,19 @@ Order types analysis tool
 """
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.result_cache import result_cache
 
 @mcp.tool()
-def get_orders_by_type() -> List[Dict[str, Any]]:
+@result_cache.cached(collections=["orders"])
+async def get_orders_by_type() -> List[Dict[str, Any]]:
         """Get breakdown of orders by type (dine-in, delivery, etc.)
 
         Returns:
             List of order types with counts, revenue and averages
         """
         try:
-            db = mongo_client.db
             pipeline = [
                 {"$group": {
                     "_id": "$order_type",
@@ -35,6 +36,6 @@ def get_orders_by_type() -> List[Dict[str, Any]]:
                     "_id": 0
                 }}
             ]
-            return list(db["orders"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("orders", pipeline)
         except Exception as e:
             return [{"error": f"Order types breakdown failed: {str(e)}"}]
\ No newline at end of file
@@ -1,12 +1,14 @@
 """Revenue analytics tool"""
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.rollups import daily_revenue_rollup
+from mcp_server.utils.date_migration import created_at_migration, created_at_match, day_bucket, format_day
 from datetime import datetime, timedelta
 
 @mcp.tool()
-def get_daily_revenue(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+async def get_daily_revenue(start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get daily revenue breakdown for a specific date range.
 
         Args:
@@ -24,33 +26,46 @@ def get_daily_revenue(start_date: str, end_date: str) -> List[Dict[str, Any]]:
             2. mongodb_describe_collection() - to understand field names and structure
         """
         try:
-            db = mongo_client.db
+            db = async_mongo_client.db
             # Parse dates and convert to match database format
             start_dt = datetime.strptime(start_date, "%Y-%m-%d")
             end_dt = datetime.strptime(end_date, "%Y-%m-%d")
             end_dt = end_dt.replace(hour=23, minute=59, second=59)
+            start_day = start_dt.strftime("%Y-%m-%d")
+            end_day = end_dt.strftime("%Y-%m-%d")
             
-            pipeline = [
-                {"$match": {
-                    "created_at": {
-                        "$gte": start_dt.strftime("%Y-%m-%dT00:00:00Z"),
-                        "$lte": end_dt.strftime("%Y-%m-%dT23:59:59Z")
-                    }
-                }},
-                {"$group": {
-                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$dateFromString": {"dateString": "$created_at"}}}},
-                    "total_revenue": {"$sum": "$total_amount"},
-                    "order_count": {"$sum": 1},
-                    "avg_order_value": {"$avg": "$total_amount"}
-                }},
-                {"$sort": {"_id": 1}}
-            ]
-            
-            results = list(db["orders"].aggregate(pipeline))
+            if daily_revenue_rollup.covers(start_day, end_day):
+                # Read pre-aggregated days instead of scanning raw orders
+                results = await async_mongo_client.find(
+                    daily_revenue_rollup.collection_name,
+                    {"_id": {"$gte": start_day, "$lte": end_day}},
+                    {
+                        "total_revenue": 1,
+                        "order_count": 1,
+                        "avg_order_value": {"$divide": ["$total_revenue", "$order_count"]}
+                    },
+                    sort=[("_id", 1)]
+                )
+            else:
+                # Native dates once migrated: no string parsing per document
+                native = created_at_migration.is_ready()
+                pipeline = [
+                    {"$match": created_at_match(start_day, end_day, native)},
+                    {"$group": {
+                        "_id": day_bucket(native),
+                        "total_revenue": {"$sum": "$total_amount"},
+                        "order_count": {"$sum": 1},
+                        "avg_order_value": {"$avg": "$total_amount"}
+                    }},
+                    {"$sort": {"_id": 1}},
+                    *format_day(native)
+                ]
+                
+                results = await async_mongo_client.aggregate("orders", pipeline)
             
             if not results:
                 # If no results, check what dates actually exist
-                sample = db["orders"].find_one({}, {"created_at": 1})
+                sample = await db["orders"].find_one({}, {"created_at": 1})
                 if sample:
                     return {"error": f"No orders found between {start_date} and {end_date}. Sample date in DB: {sample.get('created_at', 'No date found')}"}
                 else:
@@ -3,12 +3,14 @@ Revenue by date range tool
 """
 
 from typing import Dict, Any
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.rollups import daily_revenue_rollup
+from mcp_server.utils.date_migration import created_at_migration, created_at_match
 from datetime import datetime
 
 @mcp.tool()
-def get_revenue_by_date_range(start_date: str, end_date: str) -> Dict[str, Any]:
+async def get_revenue_by_date_range(start_date: str, end_date: str) -> Dict[str, Any]:
         """Get total revenue and statistics for a specific date range
 
         Args:
@@ -19,29 +21,48 @@ def get_revenue_by_date_range(start_date: str, end_date: str) -> Dict[str, Any]:
             Revenue totals and statistics for the date range
         """
         try:
-            db = mongo_client.db
+            db = async_mongo_client.db
             # Parse dates and convert to match database format
             start_dt = datetime.strptime(start_date, "%Y-%m-%d")
             end_dt = datetime.strptime(end_date, "%Y-%m-%d")
             end_dt = end_dt.replace(hour=23, minute=59, second=59)
+            start_day = start_dt.strftime("%Y-%m-%d")
+            end_day = end_dt.strftime("%Y-%m-%d")
             
-            pipeline = [
-                {"$match": {
-                    "created_at": {
-                        "$gte": start_dt.strftime("%Y-%m-%dT00:00:00Z"),
-                        "$lte": end_dt.strftime("%Y-%m-%dT23:59:59Z")
-                    }
-                }},
-                {"$group": {
-                    "_id": None,
-                    "total_revenue": {"$sum": "$total_amount"},
-                    "total_orders": {"$sum": 1},
-                    "avg_order_value": {"$avg": "$total_amount"},
-                    "min_order_value": {"$min": "$total_amount"},
-                    "max_order_value": {"$max": "$total_amount"}
-                }}
-            ]
-            results = list(db["orders"].aggregate(pipeline))
+            if daily_revenue_rollup.covers(start_day, end_day):
+                # Combine pre-aggregated days instead of scanning raw orders
+                source = daily_revenue_rollup.collection_name
+                pipeline = [
+                    {"$match": {"_id": {"$gte": start_day, "$lte": end_day}}},
+                    {"$group": {
+                        "_id": None,
+                        "total_revenue": {"$sum": "$total_revenue"},
+                        "total_orders": {"$sum": "$order_count"},
+                        "min_order_value": {"$min": "$min_order_value"},
+                        "max_order_value": {"$max": "$max_order_value"}
+                    }},
+                    {"$project": {
+                        "total_revenue": 1,
+                        "total_orders": 1,
+                        "avg_order_value": {"$divide": ["$total_revenue", "$total_orders"]},
+                        "min_order_value": 1,
+                        "max_order_value": 1
+                    }}
+                ]
+            else:
+                source = "orders"
+                pipeline = [
+                    {"$match": created_at_match(start_day, end_day, created_at_migration.is_ready())},
+                    {"$group": {
+                        "_id": None,
+                        "total_revenue": {"$sum": "$total_amount"},
+                        "total_orders": {"$sum": 1},
+                        "avg_order_value": {"$avg": "$total_amount"},
+                        "min_order_value": {"$min": "$total_amount"},
+                        "max_order_value": {"$max": "$total_amount"}
+                    }}
+                ]
+            results = await async_mongo_client.aggregate(source, pipeline)
             if results:
                 result = results[0]
                 result["start_date"] = start_date
@@ -50,7 +71,7 @@ def get_revenue_by_date_range(start_date: str, end_date: str) -> Dict[str, Any]:
                 return result
             else:
                 # Check what dates actually exist in database
-                sample = db["orders"].find_one({}, {"created_at": 1})
+                sample = await db["orders"].find_one({}, {"created_at": 1})
                 sample_date = sample.get('created_at') if sample else 'No orders found'
                 return {
                     "start_date": start_date,
@@ -0,0 +1,33 @@
+"""
+Index advisor tool for spotting collection scans
+"""
+
+from typing import Dict, Any
+from mcp_server.utils.index_manager import index_manager
+from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+
+@mcp.tool()
+@tool_offloader.offload()
+def get_index_report(include_usage: bool = True) -> Dict[str, Any]:
+        """Report index health for the analytics tools.
+
+        Args:
+            include_usage: Include $indexStats usage and unused indexes (default: True)
+            
+        Returns:
+            Dict with declared indexes and whether each exists, the query plan of
+            each tool's representative query (flagging COLLSCAN and in-memory SORT),
+            the list of tools that would scan a whole collection, and unused indexes
+            
+        Use this when a tool is slow to see whether a missing index is the cause.
+        """
+        try:
+            report = index_manager.report(include_usage=include_usage)
+            report["success"] = True
+            return report
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Index report failed: {str(e)}"
+            }
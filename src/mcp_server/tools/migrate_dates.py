@@ -0,0 +1,37 @@
+"""
+Migration tool for the native created_at_dt date field
+"""
+
+from typing import Dict, Any, Optional
+from mcp_server.utils.date_migration import created_at_migration
+from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+
+@mcp.tool()
+@tool_offloader.offload(max_concurrency=1)
+def migrate_created_at_dates(max_batches: Optional[int] = None, restart: bool = False) -> Dict[str, Any]:
+        """Add a native BSON date field (created_at_dt) to orders, converted from created_at.
+
+        Args:
+            max_batches: Stop after this many batches (default: run to completion);
+                the next call resumes where this one stopped
+            restart: Convert every order again from the beginning (default: False)
+            
+        Returns:
+            Dict with migration progress: documents converted, last processed _id,
+            whether the migration is complete and whether date tools are using
+            the native field yet
+            
+        Once complete, get_daily_revenue, get_revenue_by_date_range and
+        generate_chart_from_data filter and bucket on created_at_dt instead of
+        parsing the created_at strings.
+        """
+        try:
+            status = created_at_migration.migrate(max_batches=max_batches, restart=restart)
+            status["success"] = True
+            return status
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"created_at migration failed: {str(e)}"
+            }
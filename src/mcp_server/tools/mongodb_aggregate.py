@@ -1,22 +1,38 @@
 """MongoDB aggregation tool for complex data analysis."""
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from fastmcp.tools.tool import ToolResult
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils.query_governor import query_governor, QueryTooExpensive
+from mcp_server.utils.pagination import paginator, PaginationError
+from mcp_server.utils.serialization import encode_json
 
 @mcp.tool()
+@tool_offloader.offload()
 def mongodb_aggregate(
         collection: str, 
-        pipeline: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+        pipeline: List[Dict[str, Any]] = None,
+        page_size: int = None,
+        cursor: str = None
+    ) -> ToolResult:
         """Execute MongoDB aggregation pipeline for advanced data analysis.
 
         Args:
             collection: Collection name (orders, customers, menu_items, users, audit_logs, delivery_details)
-            pipeline: List of aggregation stage dictionaries
+            pipeline: List of aggregation stage dictionaries (not needed with cursor)
+            page_size: Result documents per page (default and cap set by the server)
+            cursor: next_cursor from a previous response to fetch the following page
+                    (pass the same collection)
             
         Returns:
-            Dict with success status and aggregated results
+            Dict with success status, aggregated results, has_more and next_cursor;
+            large results come back page by page, call again with cursor=next_cursor
+            while has_more is true. Pipelines estimated to
+            scan too many documents (collection scans, unindexed $lookup) or that run
+            past their time limit return success=False with error_type
+            "query_too_expensive" or "query_timeout"; add a selective $match first
+            and retry. If truncated=True the input was capped and results are partial.
             
         Core Patterns:
             Group by field: [{"$group": {"_id": "$field", "count": {"$sum": 1}}}]
@@ -38,32 +54,56 @@ def mongodb_aggregate(
             
         Revenue Example: [{"$group": {"_id": "$order_date", "revenue": {"$sum": "$total_amount"}}}]
         """
+        # Encoded to JSON text once here; FastMCP sends it as-is instead of re-serializing
+        return ToolResult(content=encode_json(_mongodb_aggregate(collection, pipeline, page_size, cursor)))
+
+
+def _mongodb_aggregate(collection: str, pipeline: List[Dict[str, Any]], page_size: int, cursor: str) -> Dict[str, Any]:
         try:
             if not collection or not isinstance(collection, str):
                 return {"success": False, "error": "Collection name must be a non-empty string"}
                 
-            if not isinstance(pipeline, list) or not pipeline:
-                return {"success": False, "error": "Pipeline must be a non-empty list of stages"}
-                
-            for i, stage in enumerate(pipeline):
-                if not isinstance(stage, dict):
-                    return {"success": False, "error": f"Pipeline stage {i} must be a dictionary"}
+            if page_size is not None and (not isinstance(page_size, int) or page_size <= 0):
+                return {"success": False, "error": "Page size must be a positive integer"}
             
-            db = mongo_client.db
-            cursor = db[collection].aggregate(pipeline)
-            results = []
-            for doc in cursor:
-                # Convert ObjectId to string if present
-                if '_id' in doc and hasattr(doc['_id'], '__str__'):
-                    doc['_id'] = str(doc['_id'])
-                results.append(doc)
+            governed = {"rewritten": False}
+            if cursor:
+                page = paginator.next_page(cursor, "aggregate", collection, page_size)
+            else:
+                if not isinstance(pipeline, list) or not pipeline:
+                    return {"success": False, "error": "Pipeline must be a non-empty list of stages"}
+                    
+                for i, stage in enumerate(pipeline):
+                    if not isinstance(stage, dict):
+                        return {"success": False, "error": f"Pipeline stage {i} must be a dictionary"}
                 
-            return {
+                governed = query_governor.govern_pipeline(collection, pipeline)
+                page = paginator.open_aggregate(collection, governed["pipeline"],
+                                                paginator.page_size_for(page_size),
+                                                max_time_ms=query_governor.max_time_ms("mongodb_aggregate"))
+            
+            # Decoded once; ObjectIds, dates and Decimal128 become JSON values when the response is encoded
+            results = page["data"]
+            
+            response = {
                 "success": True,
                 "data": results,
-                "count": len(results)
+                "count": len(results),
+                "has_more": page["has_more"],
+                "next_cursor": page["next_cursor"]
             }
+            if governed["rewritten"]:
+                response["truncated"] = True
+                response["governor_notice"] = governed["notice"]
+            return response
+        except PaginationError as e:
+            return {"success": False, "error": str(e), "error_type": "invalid_cursor"}
+        except QueryTooExpensive as e:
+            return {"success": False, **e.to_dict()}
         except Exception as e:
+            timeout = query_governor.timeout_error("mongodb_aggregate", e)
+            if timeout:
+                return {"success": False, **timeout}
             return {
                 "success": False,
                 "error": f"Aggregation operation failed: {str(e)}"
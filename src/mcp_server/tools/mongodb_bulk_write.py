@@ -0,0 +1,82 @@
+"""MongoDB bulk write tool for batched data corrections."""
+
+from typing import Dict, Any, List, Optional
+from mcp_server.utils.db_client import mongo_client
+from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils import write_hooks
+
+@mcp.tool()
+# One bulk job at a time keeps large corrections from saturating the server
+@tool_offloader.offload(max_concurrency=1)
+def mongodb_bulk_write(
+        collection: str,
+        operations: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        write_concern: Optional[Dict[str, Any]] = None,
+        pause_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run many insert/update/upsert/replace/delete operations in unordered batches.
+
+        Args:
+            collection: Collection name (orders, customers, menu_items, users, audit_logs, delivery_details)
+            operations: List of operation dicts (see formats below)
+            batch_size: Maximum operations per batch (default: BULK_BATCH_SIZE, 1000);
+                batches are also capped by encoded size
+            write_concern: Optional write concern, e.g. {"w": "majority", "j": true, "wtimeout": 5000}
+            pause_ms: Pause between batches in milliseconds to limit load (default: BULK_BATCH_PAUSE_MS)
+            
+        Returns:
+            Dict with total inserted/matched/modified/deleted/upserted counts,
+            per-batch operation counts, timing and error counts, write errors with
+            the index of the failing operation, and whether the job was aborted.
+            With write_concern {"w": 0} counts are null and acknowledged is false
+            
+        Operation Formats:
+            Insert: {"op": "insert", "document": {"field": "value"}}
+            Update: {"op": "update", "filter": {...}, "update": {"$set": {...}}, "multi": true}
+            Upsert: {"op": "upsert", "filter": {...}, "update": {"$set": {...}}}
+            Replace: {"op": "replace", "filter": {...}, "document": {...}, "upsert": false}
+            Delete: {"op": "delete", "filter": {...}, "multi": true}
+            
+        Operations are unordered: a failing operation does not stop the others.
+        Use mongodb_describe_collection() first to confirm field names.
+        """
+        if not collection or not isinstance(collection, str):
+            return {"success": False, "error": "Collection name must be a non-empty string"}
+        if not isinstance(operations, list) or not operations:
+            return {"success": False, "error": "Operations must be a non-empty list"}
+        
+        try:
+            # Reject malformed specs before any hook reads or stamps documents
+            mongo_client.parse_bulk_operations(operations)
+            inserts = [spec["document"] for spec in operations if spec["op"] == "insert"]
+            updates = [(spec["filter"], spec.get("update", spec.get("document")),
+                        spec["op"] == "upsert" or bool(spec.get("upsert")))
+                       for spec in operations if spec["op"] in ("update", "upsert", "replace")]
+            deletes = any(spec["op"] == "delete" for spec in operations)
+            
+            # Hooks run once for the whole job, not per operation
+            write_hooks.before_insert(collection, inserts)
+            before = write_hooks.before_bulk_update(collection, updates) if updates else None
+            result = mongo_client.execute_bulk(collection, operations, batch_size=batch_size,
+                                               write_concern=write_concern, pause_ms=pause_ms)
+            
+            # Unordered batches may have applied part of the job even when some writes failed;
+            # unacknowledged jobs report None counts, so assume they applied
+            if inserts and result["inserted_count"] != 0:
+                write_hooks.after_insert(collection, inserts)
+            if updates:
+                write_hooks.after_bulk_update(collection, [(update, upsert) for _, update, upsert in updates],
+                                              before)
+            if deletes and result["deleted_count"] != 0:
+                write_hooks.after_delete(collection)
+            
+            return {"success": True, **result}
+        except ValueError as e:
+            return {"success": False, "error": f"Invalid operation: {str(e)}"}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Bulk write failed: {str(e)}"
+            }
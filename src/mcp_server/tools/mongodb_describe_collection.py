@@ -2,25 +2,45 @@
 
 from typing import Dict, Any
 from mcp_server.utils.db_client import mongo_client
+from fastmcp.tools.tool import ToolResult
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils.projection import build_projection
+from mcp_server.utils.serialization import encode_json
+from mcp_server.utils.schema_profiler import schema_profiler
 
 @mcp.tool()
+@tool_offloader.offload()
 def mongodb_describe_collection(
         collection: str, 
-        sample_size: int = 5
-    ) -> Dict[str, Any]:
+        sample_size: int = 5,
+        projection: Dict[str, Any] = None,
+        refresh: bool = False
+    ) -> ToolResult:
     """Analyze collection schema and discover actual field names and types.
 
     Args:
         collection: Collection name to analyze (orders, customers, menu_items, etc.)
         sample_size: Number of sample documents to return (default: 5)
+        projection: Fields to include in sample documents (default: all; large embedded
+                    arrays such as orders.items are cut to their first element)
+        refresh: Re-profile the collection now instead of using the schema catalog (default: False)
         
     Returns:
-        Dict with field names, types, sample values, and example documents
+        Dict with field names, types, sample values, and example documents. Fields are
+        profiled from a random sample and include nested paths (e.g. items.price) with
+        presence ratio, type distribution, distinct values in the sample, and the
+        actual values for low-cardinality fields such as status
         
     CRITICAL: Always use this tool first to discover exact field names before querying.
     This prevents field name errors and ensures accurate queries.
     """
+    # Encoded to JSON text once here; FastMCP sends it as-is instead of re-serializing
+    return ToolResult(content=encode_json(_mongodb_describe_collection(collection, sample_size,
+                                                                      projection, refresh)))
+
+
+def _mongodb_describe_collection(collection: str, sample_size: int, projection: Dict[str, Any], refresh: bool) -> Dict[str, Any]:
     try:
         if not collection or not isinstance(collection, str):
             return {"success": False, "error": "Collection name must be a non-empty string"}
@@ -28,36 +48,27 @@ def mongodb_describe_collection(
         if not isinstance(sample_size, int) or sample_size <= 0:
             return {"success": False, "error": "Sample size must be a positive integer"}
         
-        db = mongo_client.db
-        # Get sample documents
-        cursor = db[collection].find().limit(sample_size)
-        samples = []
-        for doc in cursor:
-            if '_id' in doc:
-                doc['_id'] = str(doc['_id'])
-            samples.append(doc)
+        try:
+            # Keep one element of large arrays so their structure is still visible
+            fields, _ = build_projection(collection, projection, slice_to=1)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
         
-        # Get collection stats
-        count = db[collection].count_documents({})
+        # Field statistics come from the schema catalog, refreshed only when stale
+        profile = schema_profiler.get(collection, refresh=refresh)
         
-        # Extract field names and types from samples
-        fields = {}
-        for doc in samples:
-            for key, value in doc.items():
-                field_type = type(value).__name__
-                if key not in fields:
-                    fields[key] = {"type": field_type, "count": 1}
-                else:
-                    fields[key]["count"] += 1
-                    if fields[key]["type"] != field_type:
-                        fields[key]["type"] = "mixed"
+        db = mongo_client.db
+        # Get sample documents
+        samples = list(db[collection].find({}, fields).limit(sample_size))
         
         return {
             "success": True,
             "collection": collection,
-            "document_count": count,
+            "document_count": profile["document_count"],
+            "docs_profiled": profile["docs_sampled"],
+            "profiled_at": str(profile["profiled_at"]),
             "sample_size": len(samples),
-            "fields": fields,
+            "fields": schema_profiler.summarize(profile),
             "sample_documents": samples
         }
     except Exception as e:
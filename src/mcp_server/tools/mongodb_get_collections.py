@@ -3,11 +3,18 @@
 from typing import Dict, Any, List
 from mcp_server.utils.db_client import mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
 
 @mcp.tool()
-def mongodb_get_collections() -> Dict[str, Any]:
+@tool_offloader.offload()
+def mongodb_get_collections(exact_counts: bool = False, include_stats: bool = False) -> Dict[str, Any]:
     """List all available collections with basic metadata.
 
+    Args:
+        exact_counts: Count every document instead of using collection metadata
+                      (slow on large collections; default: False)
+        include_stats: Also return data size, storage size and index count (default: False)
+
     Returns:
         Dict with collection names, document counts, and basic info
         
@@ -15,21 +22,25 @@ def mongodb_get_collections() -> Dict[str, Any]:
     to get detailed schema for specific collections before querying.
     """
     try:
-        db = mongo_client.db
         collections = []
-        for collection_name in db.list_collection_names():
-            try:
-                count = db[collection_name].count_documents({})
-                collections.append({
-                    "name": collection_name,
-                    "document_count": count
-                })
-            except Exception as count_error:
+        for stats in mongo_client.get_collections(exact_counts=exact_counts):
+            if "error" in stats:
                 collections.append({
-                    "name": collection_name,
+                    "name": stats["name"],
                     "document_count": -1,
-                    "error": f"Count failed: {str(count_error)}"
+                    "error": f"Count failed: {stats['error']}"
                 })
+                continue
+            entry = {
+                "name": stats["name"],
+                "document_count": stats["count"],
+                "count_is_estimate": stats["count_is_estimate"]
+            }
+            if include_stats:
+                for key in ("size_bytes", "avg_obj_size", "storage_size", "indexes"):
+                    if key in stats:
+                        entry[key] = stats[key]
+            collections.append(entry)
                 
         return {
             "success": True,
@@ -40,4 +51,4 @@ def mongodb_get_collections() -> Dict[str, Any]:
         return {
             "success": False,
             "error": f"Failed to get collections: {str(e)}"
-        }
\ No newline at end of file
+        }
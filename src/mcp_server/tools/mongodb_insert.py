@@ -1,10 +1,14 @@
 """MongoDB insert tool for adding documents to collections."""
 
 from typing import Dict, Any, List, Union
+from pymongo.errors import BulkWriteError
 from mcp_server.utils.db_client import mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils import write_hooks
 
 @mcp.tool()
+@tool_offloader.offload()
 def mongodb_insert(
         collection: str, 
         document: Union[Dict[str, Any], List[Dict[str, Any]]]
@@ -30,7 +34,15 @@ def mongodb_insert(
                 if not document:
                     return {"error": "Document list cannot be empty"}
                     
-                result = db[collection].insert_many(document)
+                write_hooks.before_insert(collection, document)
+                try:
+                    result = db[collection].insert_many(document)
+                except BulkWriteError as e:
+                    # Documents before the failing one were still written
+                    if e.details.get("nInserted"):
+                        write_hooks.after_insert(collection, document)
+                    raise
+                write_hooks.after_insert(collection, document)
                 return {
                     "success": True,
                     "inserted_count": len(result.inserted_ids),
@@ -40,7 +52,9 @@ def mongodb_insert(
                 if not document:
                     return {"error": "Document cannot be empty"}
                     
+                write_hooks.before_insert(collection, [document])
                 result = db[collection].insert_one(document)
+                write_hooks.after_insert(collection, [document])
                 return {
                     "success": True,
                     "inserted_count": 1,
@@ -1,31 +1,55 @@
 """MongoDB query tool for finding documents in collections."""
 
 from typing import Dict, Any, List
-from mcp_server.utils.db_client import mongo_client
+from fastmcp.tools.tool import ToolResult
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils.query_governor import query_governor, QueryTooExpensive
+from mcp_server.utils.pagination import paginator, PaginationError
+from mcp_server.utils.serialization import encode_json
+from mcp_server.utils.projection import build_projection
 
 @mcp.tool()
+@tool_offloader.offload()
 def mongodb_query(
         collection: str, 
         query: Dict[str, Any] = None, 
-        limit: int = 10
-    ) -> Dict[str, Any]:
+        limit: int = 10,
+        projection: Dict[str, Any] = None,
+        prune_large_arrays: bool = True,
+        page_size: int = None,
+        cursor: str = None
+    ) -> ToolResult:
         """Execute a MongoDB find query on the specified collection.
 
         Args:
             collection: Collection name (orders, customers, menu_items, users, audit_logs, delivery_details)
             query: MongoDB query filter dictionary (default: {} for all documents)
             limit: Maximum number of documents to return (default: 10 for previews, increase when asked)
+            projection: Fields to return, e.g. {"order_id": 1, "total_amount": 1} or {"notes": 0}
+                        (default: whole documents). Request only the fields you need.
+            prune_large_arrays: Drop large embedded arrays such as orders.items unless
+                                they are named in projection (default: True)
+            page_size: Documents per page for large results (default: limit, capped by the server)
+            cursor: next_cursor from a previous response to fetch the following page
+                    (pass the same collection)
             
         Returns:
-            Dict with success status, data array, and count
+            Dict with success status, data array, count, has_more and next_cursor,
+            plus pruned_fields listing arrays that were left out.
+            Large results are returned page by page (pages are also cut by size);
+            call again with cursor=next_cursor while has_more is true. If the query is
+            estimated to scan too many documents or runs past its time limit, returns
+            success=False with error_type "query_too_expensive" or "query_timeout"
+            and suggestions; narrow the filter and retry.
             
         Key Patterns:
             Basic: {"field": "value"}
             Comparison: {"amount": {"$gte": 50}}
             Multiple conditions: {"status": "pending", "total_amount": {"$gte": 20}}
             OR logic: {"$or": [{"status": "pending"}, {"status": "processing"}]}
-            Arrays: {"items.name": "Pizza"}
+            Arrays: {"items.name": "Pizza"} (add projection {"items": 1, ...} or
+                    prune_large_arrays=False to get the items back)
             
         WORKFLOW:
             1. ALWAYS use mongodb_get_collections() first to see available collections
@@ -35,6 +59,13 @@ def mongodb_query(
         Use standard MongoDB operators ($gt, $lt, $gte, $lte, $in, $ne, $or, $and).
         Always pass a structured MongoDB query dictionary. Do not pass natural language text in query.
         """
+        # Encoded to JSON text once here; FastMCP sends it as-is instead of re-serializing
+        return ToolResult(content=encode_json(_mongodb_query(collection, query, limit, projection,
+                                                        prune_large_arrays, page_size, cursor)))
+
+
+def _mongodb_query(collection: str, query: Dict[str, Any], limit: int, projection: Dict[str, Any],
+                   prune_large_arrays: bool, page_size: int, cursor: str) -> Dict[str, Any]:
         try:
             if not collection or not isinstance(collection, str):
                 return {"success": False, "error": "Collection name must be a non-empty string"}
@@ -47,20 +78,42 @@ def mongodb_query(
             if not isinstance(limit, int) or limit <= 0:
                 return {"success": False, "error": "Limit must be a positive integer"}
                 
-            db = mongo_client.db
-            cursor = db[collection].find(query).limit(limit)
-            results = []
-            for doc in cursor:
-                if '_id' in doc:
-                    doc['_id'] = str(doc['_id'])  # Convert ObjectId to string
-                results.append(doc)
-                
+            if page_size is not None and (not isinstance(page_size, int) or page_size <= 0):
+                return {"success": False, "error": "Page size must be a positive integer"}
+            
+            pruned_fields = []
+            if cursor:
+                page = paginator.next_page(cursor, "find", collection, page_size)
+            else:
+                try:
+                    fields, pruned_fields = build_projection(collection, projection, prune=prune_large_arrays)
+                except ValueError as e:
+                    return {"success": False, "error": str(e)}
+                query_governor.check_find(collection, query, limit)
+                page = paginator.open_find(collection, query, limit,
+                                           paginator.page_size_for(page_size, limit),
+                                           max_time_ms=query_governor.max_time_ms("mongodb_query"),
+                                           projection=fields)
+            
+            # Decoded once; ObjectIds, dates and Decimal128 become JSON values when the response is encoded
+            results = page["data"]
+            
             return {
                 "success": True,
                 "data": results,
-                "count": len(results)
+                "count": len(results),
+                "has_more": page["has_more"],
+                "next_cursor": page["next_cursor"],
+                "pruned_fields": pruned_fields
             }
+        except PaginationError as e:
+            return {"success": False, "error": str(e), "error_type": "invalid_cursor"}
+        except QueryTooExpensive as e:
+            return {"success": False, **e.to_dict()}
         except Exception as e:
+            timeout = query_governor.timeout_error("mongodb_query", e)
+            if timeout:
+                return {"success": False, **timeout}
             return {
                 "success": False,
                 "error": f"Query operation failed: {str(e)}"
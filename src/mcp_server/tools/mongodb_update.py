@@ -3,8 +3,11 @@
 from typing import Dict, Any
 from mcp_server.utils.db_client import mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils import write_hooks
 
 @mcp.tool()
+@tool_offloader.offload()
 def mongodb_update(
         collection: str, 
         filter_criteria: Dict[str, Any], 
@@ -48,7 +51,9 @@ def mongodb_update(
                 return {"success": False, "error": "Upsert must be a boolean value"}
             
             db = mongo_client.db
+            before = write_hooks.before_update(collection, filter_criteria, update_data)
             result = db[collection].update_many(filter_criteria, update_data, upsert=upsert)
+            write_hooks.after_update(collection, update_data, upsert, before)
             
             return {
                 "success": True,
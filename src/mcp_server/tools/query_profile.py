@@ -0,0 +1,42 @@
+"""
+Slow-query log tool for inspecting instrumented find/aggregate calls
+"""
+
+from typing import Dict, Any
+from mcp_server.utils.db_client import mongo_client
+from mcp_server.mcp_instance import mcp
+
+@mcp.tool()
+def get_slow_queries(limit: int = 20, clear: bool = False) -> Dict[str, Any]:
+        """Get the slowest recent queries recorded by the query profiler.
+
+        Args:
+            limit: Maximum number of slow-query entries to return, newest first (default: 20)
+            clear: Reset the slow-query log and timing totals after reading (default: False)
+            
+        Returns:
+            Dict with profiler settings, per-operation timing totals and the slow-query
+            log; each entry has the collection, filter or pipeline, duration, documents
+            returned and, for explain-sampled entries, documents/keys examined and the
+            winning plan stages
+            
+        Profiling is opt-in: set QUERY_PROFILING_ENABLED=true on the MCP server.
+        """
+        try:
+            if not isinstance(limit, int) or limit <= 0:
+                return {"success": False, "error": "Limit must be a positive integer"}
+            
+            profiler = mongo_client.profiler
+            result = {
+                "success": True,
+                **profiler.stats(),
+                "slow_queries": profiler.slow_queries(limit)
+            }
+            if clear:
+                profiler.clear()
+            return result
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to read slow-query log: {str(e)}"
+            }
@@ -1,11 +1,11 @@
 """Quick statistics tool for MongoDB collections."""
 
 from typing import Dict, Any
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
 
 @mcp.tool()
-def get_collection_summary(collection: str) -> Dict[str, Any]:
+async def get_collection_summary(collection: str) -> Dict[str, Any]:
         """Get summary statistics for any collection.
 
         Args:
@@ -25,7 +25,7 @@ def get_collection_summary(collection: str) -> Dict[str, Any]:
             2. mongodb_describe_collection() - to understand field names and structure
         """
         try:
-            db = mongo_client.db
+            db = async_mongo_client.db
             if collection == "orders":
                 pipeline = [
                     {"$group": {
@@ -60,10 +60,10 @@ def get_collection_summary(collection: str) -> Dict[str, Any]:
                 ]
             else:
                 # Generic count for any collection
-                count = db[collection].count_documents({})
+                count = await db[collection].count_documents({})
                 return {"collection": collection, "total_documents": count}
             
-            results = list(db[collection].aggregate(pipeline))
+            results = await async_mongo_client.aggregate(collection, pipeline)
             if results:
                 stats = results[0]
                 stats["collection"] = collection
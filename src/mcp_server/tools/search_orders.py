@@ -3,11 +3,13 @@ Search orders by criteria tool
 """
 
 from typing import Dict, Any, List, Optional
-from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
 from mcp_server.mcp_instance import mcp
+from mcp_server.utils.segment_index import segment_index
+from mcp_server.utils.segment_denormalizer import segment_denormalizer
 
 @mcp.tool()
-def search_orders_by_criteria(
+async def search_orders_by_criteria(
         customer_segment: Optional[str] = None,
         order_type: Optional[str] = None, 
         status: Optional[str] = None,
@@ -38,7 +40,6 @@ def search_orders_by_criteria(
             2. mongodb_describe_collection() - to understand field names and structure
         """
         try:
-            db = mongo_client.db
             # Build match criteria
             match_criteria = {}
             
@@ -64,44 +65,55 @@ def search_orders_by_criteria(
             if status:
                 match_criteria["status"] = status
             
-            # Pipeline with customer lookup if segment filter needed
-            pipeline = []
+            projection = {
+                "order_id": 1,
+                "customer_id": 1,
+                "order_date": 1,
+                "order_time": 1,
+                "order_type": 1,
+                "status": 1,
+                "total_amount": 1
+            }
             
-            if customer_segment:
-                pipeline.extend([
-                    {"$lookup": {
-                        "from": "customers",
-                        "localField": "customer_id", 
-                        "foreignField": "customer_id",
-                        "as": "customer"
-                    }},
-                    {"$unwind": "$customer"},
-                    {"$match": {"customer.segment": customer_segment}}
-                ])
+            # Order-level predicates always run first so only matching orders reach the join
+            pipeline = []
+            join = []
+            if customer_segment and segment_denormalizer.is_ready():
+                # Segment is copied onto orders, so this is a plain indexed equality
+                match_criteria["customer_segment"] = customer_segment
+                projection["customer_segment"] = 1
+            elif customer_segment:
+                customer_ids = await segment_index.customer_ids(customer_segment)
+                if customer_ids is not None:
+                    # Segment resolved from the cached index: no join at all
+                    match_criteria["customer_id"] = {"$in": customer_ids}
+                    projection["customer_segment"] = {"$literal": customer_segment}
+                else:
+                    join = [
+                        {"$lookup": {
+                            "from": "customers",
+                            "localField": "customer_id",
+                            "foreignField": "customer_id",
+                            "pipeline": [
+                                {"$match": {"segment": customer_segment}},
+                                {"$project": {"_id": 0, "segment": 1}}
+                            ],
+                            "as": "customer"
+                        }},
+                        {"$unwind": "$customer"}
+                    ]
+                    projection["customer_segment"] = "$customer.segment"
             
             if match_criteria:
                 pipeline.append({"$match": match_criteria})
-            
+            pipeline.extend(join)
             pipeline.extend([
                 {"$sort": {"order_date": -1, "order_time": -1}},
                 {"$limit": limit},
-                {"$project": {
-                    "order_id": 1,
-                    "customer_id": 1,
-                    "order_date": 1,
-                    "order_time": 1,
-                    "order_type": 1,
-                    "status": 1,
-                    "total_amount": 1,
-                    "customer_segment": "$customer.segment" if customer_segment else None
-                }}
+                {"$project": projection}
             ])
             
-            # Remove None values from projection
-            if pipeline[-1]["$project"]["customer_segment"] is None:
-                del pipeline[-1]["$project"]["customer_segment"]
-            
-            return list(db["orders"].aggregate(pipeline))
+            return await async_mongo_client.aggregate("orders", pipeline)
             
         except Exception as e:
             return [{"error": f"Order search failed: {str(e)}"}]
\ No newline at end of file
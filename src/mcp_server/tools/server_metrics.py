@@ -0,0 +1,63 @@
+"""
+Server metrics tool for monitoring the MCP server runtime
+"""
+
+from typing import Dict, Any
+from mcp_server.utils.db_client import mongo_client
+from mcp_server.utils.async_db_client import async_mongo_client
+from mcp_server.mcp_instance import mcp
+from mcp_server.utils.offload import tool_offloader
+from mcp_server.utils.result_cache import result_cache
+from mcp_server.utils.rollups import ALL_ROLLUPS
+from mcp_server.utils.query_governor import query_governor
+from mcp_server.utils.pagination import paginator
+from mcp_server.utils.schema_profiler import schema_profiler
+from mcp_server.utils.segment_index import segment_index
+from mcp_server.utils.segment_denormalizer import segment_denormalizer
+from mcp_server.utils.date_migration import created_at_migration
+from mcp_server.utils.chart_renderer import chart_renderer
+from mcp_server.utils.chart_cache import chart_cache
+
+@mcp.tool()
+def get_server_metrics() -> Dict[str, Any]:
+        """Get runtime metrics for the MCP server.
+
+        Returns:
+            Dict with MongoDB connection pool statistics (open, in-use, idle and
+            waiting connections, checkout failures and timeouts) for both the
+            sync client and the async client used by the analytics tools, plus
+            queue depth and wait times for tools offloaded to the thread pool,
+            hit/miss counters for the analytics result cache, and the state of
+            the change watcher that invalidates it, coverage of the rollup
+            collections, query governor rejection/timeout counters and open
+            pagination cursors, schema catalog freshness, cached customer
+            segments, orders.customer_segment backfill progress,
+            created_at_dt migration progress, the chart render queue and chart
+            cache hit rate
+            
+        Use this to diagnose slow tool calls caused by connection pool pressure.
+        """
+        try:
+            watcher = mongo_client.change_watcher
+            return {
+                "success": True,
+                "connection_pool": mongo_client.pool_stats(),
+                "async_connection_pool": async_mongo_client.pool_stats(),
+                "tool_executor": tool_offloader.stats(),
+                "result_cache": result_cache.stats(),
+                "change_watcher": watcher.status() if watcher else {"running": False},
+                "rollups": {rollup.collection_name: rollup.status() for rollup in ALL_ROLLUPS},
+                "query_governor": query_governor.stats(),
+                "pagination": paginator.stats(),
+                "schema_catalog": schema_profiler.status(),
+                "segment_index": segment_index.stats(),
+                "customer_segment_denormalization": segment_denormalizer.status(),
+                "created_at_migration": created_at_migration.status(),
+                "chart_renderer": chart_renderer.stats(),
+                "chart_cache": chart_cache.stats()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to collect server metrics: {str(e)}"
+            }
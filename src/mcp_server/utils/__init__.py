@@ -3,5 +3,9 @@ Utility modules for MongoDB Hotel Analytics MCP Server
 """
 
 from .db_client import mongo_client, MongoDBClient
+from .async_db_client import async_mongo_client, AsyncMongoDBClient
+from .pool_config import PoolConfig, PoolStatsListener
+from .query_profiler import QueryProfiler
 
-__all__ = ['mongo_client', 'MongoDBClient']
\ No newline at end of file
+__all__ = ['mongo_client', 'MongoDBClient', 'async_mongo_client', 'AsyncMongoDBClient',
+           'PoolConfig', 'PoolStatsListener', 'QueryProfiler']
@@ -0,0 +1,139 @@
+"""
+Async MongoDB Database Client
+Native asyncio counterpart of MongoDBClient built on PyMongo's AsyncMongoClient
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional, Dict, Any, List, Callable
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.collection import AsyncCollection
+from dotenv import load_dotenv
+from .pool_config import PoolConfig, PoolStatsListener
+from .db_client import mongo_client
+
+load_dotenv()
+
+
+class AsyncMongoDBClient:
+    """Async MongoDB client wrapper for tools running on the FastMCP event loop"""
+
+    def __init__(self, pool_config: Optional[PoolConfig] = None):
+        self._client: Optional[AsyncMongoClient] = None
+        self._db: Optional[AsyncDatabase] = None
+        self.db_name = os.getenv('DB_NAME', 'hotel_management')
+        self.pool_config = pool_config or PoolConfig.from_env()
+        self._pool_listener = PoolStatsListener()
+
+    def _create_client(self):
+        """Create the driver client; no I/O happens until the first operation"""
+        mongo_uri = os.getenv('MONGO_URI')
+        if not mongo_uri:
+            raise ValueError("MONGO_URI not found in environment variables")
+
+        self._client = AsyncMongoClient(
+            mongo_uri,
+            event_listeners=[self._pool_listener],
+            **self.pool_config.to_client_kwargs()
+        )
+        self._db = self._client[self.db_name]
+
+    async def connect(self) -> bool:
+        """Establish MongoDB connection"""
+        try:
+            if self._client is None:
+                self._create_client()
+            # Test connection
+            await self._client.admin.command('ping')
+            return True
+
+        except Exception as e:
+            print(f"Failed to connect to MongoDB (async): {e}")
+            return False
+
+    async def disconnect(self):
+        """Close MongoDB connection"""
+        if self._client:
+            await self._client.close()
+            self._client = None
+            self._db = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics collected from CMAP events"""
+        stats = self._pool_listener.snapshot()
+        stats["max_pool_size"] = self.pool_config.max_pool_size
+        stats["min_pool_size"] = self.pool_config.min_pool_size
+        return stats
+
+    @property
+    def db(self) -> AsyncDatabase:
+        """Get database instance (the client is created lazily on the running loop)"""
+        if self._db is None:
+            self._create_client()
+        return self._db
+
+    def get_collection(self, collection_name: str) -> AsyncCollection:
+        """Get collection instance"""
+        return self.db[collection_name]
+
+    async def list_collections(self) -> List[str]:
+        """Get list of all collections"""
+        return await self.db.list_collection_names()
+
+    async def aggregate(self, collection_name: str, pipeline: List[Dict[str, Any]],
+                        **kwargs) -> List[Dict[str, Any]]:
+        """Run an aggregation to completion, reporting it to the query profiler"""
+        started = time.perf_counter()
+        cursor = await self.get_collection(collection_name).aggregate(pipeline, **kwargs)
+        results = await cursor.to_list()
+        await self._record(mongo_client.record_aggregation, (time.perf_counter() - started) * 1000,
+                           collection_name, pipeline, returned=len(results))
+        return results
+
+    async def find(self, collection_name: str, query: Dict[str, Any],
+                   projection: Optional[Dict[str, Any]] = None, sort: Optional[List[Any]] = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run a find to completion, reporting it to the query profiler"""
+        started = time.perf_counter()
+        cursor = self.get_collection(collection_name).find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        results = await cursor.to_list()
+        await self._record(mongo_client.record_find, (time.perf_counter() - started) * 1000,
+                           collection_name, query, limit, returned=len(results), projection=projection)
+        return results
+
+    async def _record(self, record: Callable[..., None], duration_ms: float, *args, **kwargs):
+        # Shares the sync client's profiler, so get_slow_queries sees both clients
+        profiler = mongo_client.profiler
+        if not profiler.enabled:
+            return
+        if duration_ms >= profiler.slow_threshold_ms:
+            # A sampled slow query is explained through the sync client; keep that off the loop
+            await asyncio.to_thread(record, *args, duration_ms=duration_ms, **kwargs)
+        else:
+            record(*args, duration_ms=duration_ms, **kwargs)
+
+    async def execute_query(self, collection_name: str, query: Dict[str, Any],
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Execute a find query"""
+        try:
+            return await self.find(collection_name, query, limit=limit)
+        except Exception as e:
+            raise Exception(f"Query execution failed: {e}")
+
+    async def execute_aggregation(self, collection_name: str,
+                                  pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute an aggregation pipeline"""
+        try:
+            return await self.aggregate(collection_name, pipeline)
+        except Exception as e:
+            raise Exception(f"Aggregation execution failed: {e}")
+
+
+# Global async client instance
+async_mongo_client = AsyncMongoDBClient()
@@ -0,0 +1,83 @@
+"""
+Collection catalog for database exploration
+Fetches per-collection metadata in parallel from $collStats and caches it briefly
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+from pymongo.database import Database
+
+
+class CollectionCatalog:
+    """Cached collection metadata without per-collection scans
+
+    Counts come from collection metadata ($collStats / estimatedDocumentCount),
+    which can drift slightly after an unclean shutdown; exact counts are only
+    computed when asked for and are never cached.
+    """
+
+    def __init__(self, db_getter: Callable[[], Database], ttl: Optional[float] = None,
+                 max_workers: Optional[int] = None):
+        self._db_getter = db_getter
+        self.ttl = ttl if ttl is not None else float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+        self.max_workers = max_workers or int(os.getenv("CATALOG_MAX_WORKERS", "8"))
+        self._lock = threading.Lock()
+        self._cached: Optional[List[Dict[str, Any]]] = None
+        self._cached_at = 0.0
+
+    def collection_stats(self, name: str, exact_count: bool = False) -> Dict[str, Any]:
+        """Metadata for one collection"""
+        db = self._db_getter()
+        try:
+            shards = list(db[name].aggregate([{"$collStats": {"storageStats": {}}}]))
+            storage = [s.get("storageStats", {}) for s in shards]
+            count = sum(s.get("count", 0) for s in storage)
+            size = sum(s.get("size", 0) for s in storage)
+            stats = {
+                "name": name,
+                "count": count,
+                "size_bytes": size,
+                "avg_obj_size": size / count if count else 0,
+                "indexes": max((s.get("nindexes", 0) for s in storage), default=0),
+                "storage_size": sum(s.get("storageSize", 0) for s in storage),
+                "count_is_estimate": True,
+            }
+        except Exception:
+            try:
+                # Views and some deployments reject $collStats
+                stats = {"name": name, "count": db[name].estimated_document_count(),
+                         "count_is_estimate": True}
+            except Exception as e:
+                return {"name": name, "error": str(e), "count": 0}
+
+        if exact_count:
+            stats["count"] = db[name].count_documents({})
+            stats["count_is_estimate"] = False
+        return stats
+
+    def snapshot(self, exact_counts: bool = False, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Metadata for every collection, fetched concurrently"""
+        if not exact_counts and not refresh:
+            with self._lock:
+                if self._cached is not None and time.monotonic() - self._cached_at < self.ttl:
+                    return [dict(entry) for entry in self._cached]
+
+        names = self._db_getter().list_collection_names()
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            stats = list(executor.map(lambda n: self.collection_stats(n, exact_counts), sorted(names)))
+
+        if not exact_counts:
+            with self._lock:
+                self._cached = stats
+                self._cached_at = time.monotonic()
+        return [dict(entry) for entry in stats]
+
+    def invalidate(self):
+        """Drop the cached catalog"""
+        with self._lock:
+            self._cached = None
@@ -0,0 +1,155 @@
+"""
+Background change watcher for MongoDB collections
+Uses change streams where available; on standalone servers it can optionally poll collection stats instead
+"""
+
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Callable, Iterable, Tuple
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Server error codes meaning change streams are unavailable on this deployment
+_CHANGE_STREAMS_UNSUPPORTED = {40573, 40324, 115}
+
+ChangeListener = Callable[[str, Dict[str, Any]], None]
+
+
+class ChangeWatcher:
+    """Daemon thread notifying listeners when watched collections change
+
+    Without change streams the watcher stops unless poll_fallback is set.
+    Polling compares each collection's document count, data size and
+    largest _id, read from metadata and the _id index, so it never scans
+    data. An update that leaves all three unchanged goes unnoticed.
+    """
+
+    def __init__(self, db_getter: Callable[[], Database], collections: Iterable[str],
+                 poll_interval: float = 30.0, poll_fallback: bool = False):
+        self._db_getter = db_getter
+        self.collections = list(collections)
+        self.poll_interval = poll_interval
+        self.poll_fallback = poll_fallback
+        self.mode: Optional[str] = None  # "change_stream", "polling" or "unavailable"
+        self._listeners: List[ChangeListener] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._resume_token = None
+        self._signatures: Dict[str, Tuple[Any, ...]] = {}
+        self.events_seen = 0
+        self.last_error: Optional[str] = None
+
+    def add_listener(self, listener: ChangeListener):
+        """Register a callback receiving (collection, change event)"""
+        self._listeners.append(listener)
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mongo-change-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop watching and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def status(self) -> Dict[str, Any]:
+        """Get watcher mode and counters"""
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "collections": self.collections,
+            "events_seen": self.events_seen,
+            "last_error": self.last_error,
+        }
+
+    def _notify(self, collection: str, event: Dict[str, Any]):
+        self.events_seen += 1
+        for listener in self._listeners:
+            try:
+                listener(collection, event)
+            except Exception as e:
+                logger.warning(f"Change listener failed for {collection}: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.mode != "polling":
+                    self._watch_change_stream()
+                else:
+                    self._poll_once()
+                    self._stop.wait(self.poll_interval)
+            except OperationFailure as e:
+                if e.code in _CHANGE_STREAMS_UNSUPPORTED and self.mode != "polling":
+                    if not self.poll_fallback:
+                        self.mode = "unavailable"
+                        self.last_error = str(e)
+                        logger.warning("Change streams unavailable and polling is disabled; "
+                                       "external writes will not be detected")
+                        return
+                    logger.info("Change streams unavailable; falling back to collection stats polling")
+                    self.mode = "polling"
+                    self._signatures = self._collection_signatures()
+                else:
+                    self.last_error = str(e)
+                    logger.warning(f"Change watcher error: {e}")
+                    if self.mode == "change_stream":
+                        # The resume point may be gone; restart fresh and treat
+                        # everything as changed since events could have been missed
+                        self._resume_token = None
+                        for name in self.collections:
+                            self._notify(name, {"operationType": "resync", "ns": {"coll": name}})
+                    self._stop.wait(min(self.poll_interval, 5.0))
+            except PyMongoError as e:
+                # Transient network errors: resume from the last token after a pause
+                self.last_error = str(e)
+                logger.warning(f"Change watcher interrupted: {e}")
+                self._stop.wait(min(self.poll_interval, 5.0))
+
+    def _watch_change_stream(self):
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": {"$in": self.collections}},
+            {"operationType": {"$in": ["dropDatabase", "invalidate"]}}
+        ]}}]
+        with self._db_getter().watch(pipeline, resume_after=self._resume_token,
+                                     max_await_time_ms=1000) as stream:
+            self.mode = "change_stream"
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    continue
+                self._resume_token = stream.resume_token
+                collection = change.get("ns", {}).get("coll")
+                if collection:
+                    self._notify(collection, change)
+                else:
+                    # Database-wide events affect every watched collection
+                    for name in self.collections:
+                        self._notify(name, change)
+
+    def _collection_signatures(self) -> Dict[str, Tuple[Any, ...]]:
+        db = self._db_getter()
+        signatures = {}
+        for name in self.collections:
+            stats = next(db[name].aggregate([{"$collStats": {"storageStats": {}}}]), {}).get("storageStats", {})
+            last = db[name].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+            signatures[name] = (stats.get("count"), stats.get("size"), last and last["_id"])
+        return signatures
+
+    def _poll_once(self):
+        signatures = self._collection_signatures()
+        for name in self.collections:
+            if signatures.get(name) != self._signatures.get(name):
+                self._notify(name, {"operationType": "poll", "ns": {"coll": name}})
+        self._signatures = signatures
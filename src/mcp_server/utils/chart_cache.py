@@ -0,0 +1,129 @@
+"""
+Content-addressed chart cache
+Names chart files by a hash of what they show, so identical chart requests reuse the file already on disk
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Optional, Dict, Any, Callable, Tuple
+from .chart_renderer import ChartRenderTimeout
+
+# Payload entries that determine the rendered image; the output path does not
+KEY_FIELDS = ("x", "y", "chart_type", "title", "x_label", "y_label", "size", "dpi", "format")
+
+_CACHED_NAME = re.compile(r"^chart_([0-9a-f]{20})\.(\w+)$")
+
+
+class ChartCache:
+    """Chart files keyed by a hash of their rendered content
+
+    The cache only indexes files; it never deletes them. The charts
+    directory is bounded by the API server's chart retention (CHART_RETENTION_*),
+    and a file removed there is simply a miss here. A hit touches the file,
+    so its mtime records the last access. Concurrent requests for the same
+    chart wait for a single render, including one that timed out for its
+    caller but is still running in a worker.
+    """
+
+    def __init__(self, charts_dir: str = "./charts"):
+        self.charts_dir = charts_dir
+        self._lock = threading.Lock()
+        # key -> filename
+        self._entries: Dict[str, str] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(payload: Dict[str, Any]) -> str:
+        """Stable hash of the normalized chart payload"""
+        normalized = {field: payload.get(field) for field in KEY_FIELDS}
+        encoded = json.dumps(normalized, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()[:20]
+
+    def filename_for(self, key: str, extension: str = "png") -> str:
+        return f"chart_{key}.{extension}"
+
+    def _load(self):
+        """Index cached files left by a previous run"""
+        if self._loaded:
+            return
+        os.makedirs(self.charts_dir, exist_ok=True)
+        with os.scandir(self.charts_dir) as entries:
+            for entry in entries:
+                match = _CACHED_NAME.match(entry.name)
+                if match and entry.is_file():
+                    self._entries[match.group(1)] = entry.name
+        self._loaded = True
+
+    def get_or_render(self, payload: Dict[str, Any], render: Callable[[Dict[str, Any]], Any],
+                      extension: str = "png") -> Tuple[str, bool]:
+        """Return (filename, cache_hit), rendering into the cache on a miss
+
+        `render` receives the payload with "path" set to the cache file.
+        """
+        key = self.key_for(payload)
+        filename = self.filename_for(key, extension)
+        path = os.path.join(self.charts_dir, filename)
+
+        while True:
+            with self._lock:
+                self._load()
+                if key in self._entries and os.path.exists(path):
+                    self.hits += 1
+                    waiter = None
+                else:
+                    # Never rendered, or deleted by chart retention since
+                    self._entries.pop(key, None)
+                    waiter = self._inflight.get(key)
+                    if waiter is None:
+                        self._inflight[key] = threading.Event()
+                        self.misses += 1
+                        break
+            if waiter is None:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return filename, True
+            # Someone else is rendering this chart; use their file when done
+            waiter.wait()
+
+        try:
+            render({**payload, "path": os.path.abspath(path)})
+        except ChartRenderTimeout as e:
+            # The worker is still writing this file; keep later requests waiting on it
+            # rather than starting a second render of the same chart
+            e.future.add_done_callback(
+                lambda future: self._finish(key, None if future.cancelled() or future.exception() else filename))
+            raise
+        except BaseException:
+            self._finish(key, None)
+            raise
+        self._finish(key, filename)
+        return filename, False
+
+    def _finish(self, key: str, filename: Optional[str]):
+        """Index a rendered chart, if there is one, and wake requests waiting for it"""
+        with self._lock:
+            if filename:
+                self._entries[key] = filename
+            self._inflight.pop(key).set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global chart cache instance
+chart_cache = ChartCache()
@@ -0,0 +1,324 @@
+"""
+Out-of-process chart rendering
+Renders charts in a process pool with matplotlib's object-oriented Figure API, so
+bursts of charts use every core and never hold up the tool threads or pyplot state
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class ChartRenderError(Exception):
+    """A chart could not be rendered"""
+
+
+class ChartQueueFull(ChartRenderError):
+    """Too many charts are already waiting for a worker"""
+
+
+class ChartRenderTimeout(ChartRenderError):
+    """A render ran past the timeout; `future` completes once its worker is done with it"""
+
+    def __init__(self, message: str, future: Future):
+        super().__init__(message)
+        self.future = future
+
+
+# Output formats: image files rendered by the workers, or a spec the client draws
+OUTPUT_FORMATS = ("png", "svg", "vega_lite")
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+
+
+def build_payload(data: List[Dict[str, Any]], chart_type: str, title: str,
+                  x_field: str, y_field: str, path: Optional[str] = None,
+                  size: tuple = (12, 8), dpi: int = 150, output_format: str = "png") -> Dict[str, Any]:
+    """Reduce query results to the compact series a worker needs"""
+    if output_format not in OUTPUT_FORMATS:
+        raise ChartRenderError(f"Unknown output format '{output_format}'. Use one of {list(OUTPUT_FORMATS)}")
+    if not isinstance(data, list) or not data:
+        raise ChartRenderError("Data must be a non-empty list")
+    if not isinstance(data[0], dict):
+        raise ChartRenderError("Data items must be dictionaries")
+
+    available_fields = list(data[0].keys())
+    if x_field not in available_fields:
+        raise ChartRenderError(f"x_field '{x_field}' not found. Available: {available_fields}")
+    if y_field not in available_fields:
+        raise ChartRenderError(f"y_field '{y_field}' not found. Available: {available_fields}")
+
+    x_values, y_values = [], []
+    for item in data:
+        x_val = item.get(x_field)
+        y_val = item.get(y_field)
+        if x_val is not None and y_val is not None:
+            # Labels must survive pickling; anything exotic (ObjectId, Decimal128) becomes a string
+            x_values.append(x_val if isinstance(x_val, (str, int, float, datetime)) else str(x_val))
+            y_values.append(float(y_val) if isinstance(y_val, (int, float)) else 0)
+    if not x_values:
+        raise ChartRenderError("No valid data points after processing")
+
+    return {
+        "x": x_values,
+        "y": y_values,
+        "chart_type": chart_type,
+        "title": title,
+        "x_label": x_field.replace('_', ' ').title(),
+        "y_label": y_field.replace('_', ' ').title(),
+        "path": path,
+        "size": tuple(size),
+        "dpi": dpi,
+        # A spec is never rendered; it shares the PNG payload so cache keys stay comparable
+        "format": "svg" if output_format == "svg" else "png",
+    }
+
+
+def vega_lite_spec(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Vega-Lite spec carrying the aggregated series, for clients that draw charts themselves"""
+    x_values = [x.isoformat() if isinstance(x, datetime) else x for x in payload["x"]]
+    values = [{"x": x, "y": y} for x, y in zip(x_values, payload["y"])]
+    chart_type = payload["chart_type"]
+    temporal = all(isinstance(x, datetime) for x in payload["x"])
+    x_axis = {"field": "x", "type": "temporal" if temporal else "ordinal", "title": payload["x_label"],
+              "sort": None}
+    y_axis = {"field": "y", "type": "quantitative", "title": payload["y_label"]}
+
+    if chart_type == "pie":
+        mark: Any = {"type": "arc", "tooltip": True}
+        encoding = {
+            "theta": {"field": "y", "type": "quantitative"},
+            "color": {"field": "x", "type": "nominal", "title": payload["x_label"], "sort": None},
+        }
+    elif chart_type == "horizontal_bar":
+        mark = {"type": "bar", "tooltip": True}
+        encoding = {"y": {**x_axis, "type": "nominal"}, "x": y_axis}
+    elif chart_type == "line":
+        mark = {"type": "line", "point": True, "tooltip": True}
+        encoding = {"x": x_axis, "y": y_axis}
+    else:
+        mark = {"type": "bar", "tooltip": True}
+        encoding = {"x": x_axis, "y": y_axis}
+
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "title": payload["title"],
+        "width": "container",
+        "data": {"values": values},
+        "mark": mark,
+        "encoding": encoding,
+    }
+
+
+def render_payload(payload: Dict[str, Any]) -> str:
+    """Draw a payload to payload["path"]; runs inside a worker process"""
+    from matplotlib.figure import Figure
+    from matplotlib import colormaps
+
+    x_values, y_values = payload["x"], payload["y"]
+    chart_type = payload["chart_type"]
+    # A Figure not attached to pyplot is garbage collected like any other object
+    fig = Figure(figsize=payload["size"])
+    ax = fig.subplots()
+    colors = colormaps["Set3"](range(len(x_values)))
+    categorical = all(isinstance(x, str) for x in x_values)
+
+    if chart_type == "pie":
+        if all(y == 0 for y in y_values):
+            raise ChartRenderError("All pie chart values are zero")
+        wedges, texts, autotexts = ax.pie(
+            y_values,
+            labels=x_values,
+            autopct='%1.1f%%',
+            colors=colors,
+            startangle=90
+        )
+        for text in texts:
+            text.set_fontsize(10)
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+            autotext.set_fontsize(9)
+
+    elif chart_type == "horizontal_bar":
+        bars = ax.barh(x_values, y_values, color=colors)
+        ax.set_xlabel(payload["y_label"])
+        ax.set_ylabel(payload["x_label"])
+        for bar, value in zip(bars, y_values):
+            ax.annotate(f'{int(value):,}',
+                        xy=(bar.get_width(), bar.get_y() + bar.get_height() / 2),
+                        xytext=(3, 0), textcoords="offset points",
+                        ha='left', va='center', fontsize=9)
+
+    elif chart_type == "line":
+        if categorical:
+            positions = range(len(x_values))
+            ax.plot(positions, y_values, marker='o', linewidth=2, markersize=6)
+            ax.set_xticks(positions)
+            ax.set_xticklabels(x_values, rotation=45, ha='right')
+        else:
+            ax.plot(x_values, y_values, marker='o', linewidth=2, markersize=6)
+            ax.tick_params(axis='x', rotation=45)
+        ax.set_xlabel(payload["x_label"])
+        ax.set_ylabel(payload["y_label"])
+
+    else:  # Default to bar chart
+        if categorical:
+            positions = range(len(x_values))
+            bars = ax.bar(positions, y_values, color=colors)
+            ax.set_xticks(positions)
+            ax.set_xticklabels(x_values, rotation=45, ha='right')
+        else:
+            bars = ax.bar(x_values, y_values, color=colors)
+            ax.tick_params(axis='x', rotation=45)
+        for bar, value in zip(bars, y_values):
+            ax.annotate(f'{int(value):,}',
+                        xy=(bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                        xytext=(0, 3), textcoords="offset points",
+                        ha='center', va='bottom', fontsize=9)
+        ax.set_xlabel(payload["x_label"])
+        ax.set_ylabel(payload["y_label"])
+
+    ax.set_title(payload["title"], fontsize=14, fontweight='bold', pad=20)
+    if chart_type != "pie":
+        ax.grid(True, alpha=0.3, axis='y')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    fig.tight_layout()
+    # Write under a temporary name so readers never see a partial file
+    path = payload["path"]
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fig.savefig(temp_path, format=os.path.splitext(path)[1][1:] or "png", dpi=payload["dpi"],
+                bbox_inches='tight', facecolor='white', edgecolor='none')
+    os.replace(temp_path, path)
+    return path
+
+
+def _init_worker():
+    # Workers only ever draw off-screen
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+class ChartRenderer:
+    """Process pool for chart rendering with a bounded queue and per-chart timeout
+
+    Workers are started with "spawn" so they never inherit the server's
+    MongoDB sockets or threads. A render that times out is abandoned by the
+    caller, but its worker keeps running, and holding its queue slot, until
+    that chart finishes; the finished file still fills the chart cache.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.workers = workers or int(os.getenv("CHART_RENDER_WORKERS", str(os.cpu_count() or 2)))
+        self.max_queue = max_queue or int(os.getenv("CHART_RENDER_QUEUE_MAX", "32"))
+        self.timeout = timeout or float(os.getenv("CHART_RENDER_TIMEOUT_SECONDS", "30"))
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_render_ms = 0.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def render(self, payload: Dict[str, Any]) -> str:
+        """Render in a worker and wait for the file path"""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise ChartQueueFull(f"Chart queue is full ({self.max_queue} charts pending); try again shortly")
+            self.pending += 1
+
+        started = time.perf_counter()
+        try:
+            try:
+                future = self._submit(payload)
+                path = future.result(timeout=self.timeout)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool and retry once
+                logger.warning("Chart worker pool broke; restarting it")
+                self.shutdown()
+                with self._lock:
+                    self.pending += 1
+                future = self._submit(payload)
+                path = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise ChartRenderTimeout(f"Chart rendering timed out after {self.timeout:.0f}s", future)
+        except ChartRenderError:
+            with self._lock:
+                self.failed += 1
+            raise
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            raise ChartRenderError(f"Chart rendering failed: {e}") from e
+
+        with self._lock:
+            self.completed += 1
+            self.total_render_ms += (time.perf_counter() - started) * 1000
+        return path
+
+    def _submit(self, payload: Dict[str, Any]) -> Future:
+        """Hand a render to the pool; its queue slot is released once the worker is done with it"""
+        try:
+            future = self.executor.submit(render_payload, payload)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future] = None):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "pending": self.pending,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_render_ms": round(self.total_render_ms / self.completed, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global chart renderer instance
+chart_renderer = ChartRenderer()
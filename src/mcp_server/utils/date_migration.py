@@ -0,0 +1,317 @@
+"""
+Native date migration for orders.created_at
+Adds a BSON date copy (created_at_dt) of the ISO string so date filters and bucketing skip string parsing
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Iterable, Set
+from .db_client import MongoDBClient, mongo_client
+from .rollups import update_touches_fields
+
+logger = logging.getLogger(__name__)
+
+# Progress of data migrations, one document per migration
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+SOURCE_FIELD = "created_at"
+DATE_FIELD = "created_at_dt"
+
+# Server-side conversion applied by the batch updates; unparseable strings get no date
+_TO_DATE = {"$cond": [
+    {"$eq": [{"$type": f"${SOURCE_FIELD}"}, "date"]},
+    f"${SOURCE_FIELD}",
+    {"$dateFromString": {"dateString": f"${SOURCE_FIELD}", "onError": "$$REMOVE", "onNull": "$$REMOVE"}}
+]}
+
+
+def parse_created_at(value: Any) -> Optional[datetime]:
+    """Python equivalent of the server-side conversion, used for tool inserts"""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class CreatedAtMigration:
+    """Resumable backfill of orders.created_at_dt plus upkeep after writes
+
+    The backfill walks orders in _id order and converts each batch with one
+    pipeline update_many, saving the last _id after every batch. Once it has
+    finished, readers use created_at_dt while the change watcher and the
+    catch-up thread are running, so external writes are seen, and until a
+    write that could leave it stale is seen; otherwise they use the string
+    field. Until the migration has been started (its progress document
+    exists) tool writes leave orders untouched.
+    """
+
+    meta_id = "orders.created_at_dt"
+
+    def __init__(self, client: MongoDBClient, batch_size: Optional[int] = None):
+        self._client = client
+        self.batch_size = batch_size or int(os.getenv("DATE_MIGRATION_BATCH_SIZE", "1000"))
+        self._state_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._meta: Optional[Dict[str, Any]] = None
+        self._loaded = False
+        self._stale_ids: Set[Any] = set()
+        self._stale_all = False
+        self._stale = False
+
+    # ----- readiness ------------------------------------------------------
+
+    def is_ready(self) -> bool:
+        """Whether every order's created_at_dt matches its created_at"""
+        with self._state_lock:
+            current = bool(self._meta and self._meta.get("completed_at")) and not self._stale
+        return current and self._maintained()
+
+    def _maintained(self) -> bool:
+        # Without the watcher, external inserts lacking created_at_dt would go unnoticed
+        watcher = self._client.change_watcher
+        return bool(self._thread and self._thread.is_alive() and watcher and watcher.running)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Read saved progress, e.g. at startup"""
+        meta = self._client.db[MIGRATIONS_COLLECTION].find_one({"_id": self.meta_id})
+        with self._state_lock:
+            if self._meta is None:
+                self._meta = meta
+            self._loaded = True
+        return meta
+
+    def _started(self) -> bool:
+        """Whether the migration has started or completed; progress is read once if not yet known"""
+        with self._state_lock:
+            meta, loaded = self._meta, self._loaded
+        if meta is None and not loaded:
+            meta = self.load()
+        return bool(meta and (meta.get("started_at") or meta.get("completed_at")))
+
+    def status(self) -> Dict[str, Any]:
+        maintained = self._maintained()
+        with self._state_lock:
+            meta = {k: str(v) if isinstance(v, datetime) else v
+                    for k, v in (self._meta or {}).items() if k != "_id"}
+            meta.update({
+                "field": DATE_FIELD,
+                "complete": bool(meta.get("completed_at")),
+                "ready": bool(meta.get("completed_at")) and not self._stale and maintained,
+                "maintained": maintained,
+                "stale_documents_queued": len(self._stale_ids),
+                "full_pass_pending": self._stale_all,
+            })
+            return meta
+
+    # ----- writes ---------------------------------------------------------
+
+    def stamp_orders(self, documents: Iterable[Dict[str, Any]]):
+        """Set created_at_dt on orders about to be inserted, once the migration has started
+
+        Like the server-side conversion, an unparseable created_at leaves no date copy.
+        """
+        if not self._started():
+            return
+        for doc in documents:
+            if isinstance(doc, dict):
+                parsed = parse_created_at(doc.get(SOURCE_FIELD))
+                if parsed is not None:
+                    doc[DATE_FIELD] = parsed
+                else:
+                    doc.pop(DATE_FIELD, None)
+
+    def note_updated(self, update: Any, upsert: bool = False):
+        """Updates touching created_at leave the date copy stale until the next pass"""
+        if not self._started():
+            return
+        if upsert or update_touches_fields(update, (SOURCE_FIELD, DATE_FIELD)):
+            self._mark_stale(full=True)
+
+    def on_change(self, collection: str, event: Dict[str, Any]):
+        """ChangeWatcher listener"""
+        if collection != "orders" or not self._started():
+            return
+        operation = event.get("operationType")
+        oid = event.get("documentKey", {}).get("_id")
+        if operation == "insert":
+            if DATE_FIELD not in (event.get("fullDocument") or {}):
+                self._mark_stale(ids=[oid])
+        elif operation == "update":
+            fields = event.get("updateDescription", {})
+            changed = {path.split(".")[0] for path in
+                       list(fields.get("updatedFields", {})) + list(fields.get("removedFields", []))}
+            # Our own conversions touch only created_at_dt and are ignored
+            if SOURCE_FIELD in changed:
+                self._mark_stale(ids=[oid])
+        elif operation == "replace":
+            self._mark_stale(ids=[oid])
+        elif operation != "delete":
+            self._mark_stale(full=True)
+
+    def _mark_stale(self, ids: Iterable[Any] = (), full: bool = False):
+        with self._state_lock:
+            self._stale = True
+            self._stale_all = self._stale_all or full
+            self._stale_ids.update(v for v in ids if v is not None)
+        self._wake.set()
+
+    # ----- migration ------------------------------------------------------
+
+    def migrate(self, max_batches: Optional[int] = None, restart: bool = False) -> Dict[str, Any]:
+        """Convert created_at in batches, resuming from the last saved position"""
+        with self._run_lock:
+            db = self._client.db
+            meta_coll = db[MIGRATIONS_COLLECTION]
+            orders = db["orders"]
+            meta = self.load() or {"_id": self.meta_id, "migrated": 0}
+            meta = dict(meta)
+            if restart:
+                meta["last_id"] = None
+                meta.pop("completed_at", None)
+            if meta.get("completed_at"):
+                return self.status()
+            meta.setdefault("started_at", datetime.now(timezone.utc))
+
+            batches = 0
+            started = time.perf_counter()
+            while not self._stop.is_set() and (max_batches is None or batches < max_batches):
+                query = {}
+                if meta.get("last_id") is not None:
+                    query["_id"] = {"$gt": meta["last_id"]}
+                ids = [doc["_id"] for doc in orders.find(query, {"_id": 1}).sort("_id", 1).limit(self.batch_size)]
+                if not ids:
+                    orders.create_index([(DATE_FIELD, 1)], name=f"{DATE_FIELD}_1")
+                    meta["last_id"] = None
+                    meta["completed_at"] = datetime.now(timezone.utc)
+                    break
+                result = orders.update_many({"_id": {"$in": ids}}, [{"$set": {DATE_FIELD: _TO_DATE}}])
+                meta["migrated"] = meta.get("migrated", 0) + result.modified_count
+                meta["last_id"] = ids[-1]
+                batches += 1
+                meta_coll.replace_one({"_id": self.meta_id}, meta, upsert=True)
+                with self._state_lock:
+                    self._meta = dict(meta)
+
+            meta["last_run_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            meta_coll.replace_one({"_id": self.meta_id}, meta, upsert=True)
+            with self._state_lock:
+                self._meta = dict(meta)
+            return self.status()
+
+    def catch_up(self) -> Dict[str, Any]:
+        """Re-convert documents written since the migration finished"""
+        with self._run_lock:
+            with self._state_lock:
+                ids, self._stale_ids = self._stale_ids, set()
+                full, self._stale_all = self._stale_all, False
+                self._stale = False
+            orders = self._client.db["orders"]
+            try:
+                if full:
+                    # Only documents whose copy disagrees with created_at are rewritten
+                    orders.update_many(
+                        {"$expr": {"$ne": [f"${DATE_FIELD}", _TO_DATE]}},
+                        [{"$set": {DATE_FIELD: _TO_DATE}}])
+                elif ids:
+                    orders.update_many({"_id": {"$in": list(ids)}}, [{"$set": {DATE_FIELD: _TO_DATE}}])
+            except Exception:
+                self._mark_stale(ids, full)
+                raise
+            return self.status()
+
+    def start_background_catch_up(self, interval: Optional[float] = None, debounce: float = 1.0):
+        """Keep created_at_dt current after writes once the migration has completed"""
+        if self._thread and self._thread.is_alive():
+            return
+        if interval is None:
+            interval = float(os.getenv("DATE_MIGRATION_CATCHUP_SECONDS", "60"))
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                logger.warning(f"Could not load {DATE_FIELD} migration state: {e}")
+            while not self._stop.is_set():
+                self._wake.wait(interval)
+                if self._wake.is_set():
+                    self._stop.wait(debounce)
+                self._wake.clear()
+                with self._state_lock:
+                    # Writes during the backfill are fixed up once it has finished
+                    pending = self._stale and bool(self._meta and self._meta.get("completed_at"))
+                if pending:
+                    try:
+                        self.catch_up()
+                    except Exception as e:
+                        logger.warning(f"{DATE_FIELD} catch-up failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="created-at-dt-catch-up", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background catch-up thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+
+
+def created_at_match(start_day: Optional[str], end_day: Optional[str], native: bool) -> Dict[str, Any]:
+    """$match on orders for an inclusive YYYY-MM-DD range; either end may be open
+
+    Both paths use the same half-open rule, [start_day, end_day + 1 day), so
+    fractional seconds on the last day are included either way. The string
+    bounds are bare dates, which every ISO timestamp of that day sorts at or
+    after, whatever its precision or suffix.
+    """
+    bounds: Dict[str, Any] = {}
+    start = datetime.strptime(start_day, "%Y-%m-%d") if start_day else None
+    end = datetime.strptime(end_day, "%Y-%m-%d") + timedelta(days=1) if end_day else None
+    if native:
+        if start:
+            bounds["$gte"] = start
+        if end:
+            bounds["$lt"] = end
+        return {DATE_FIELD: bounds}
+    if start:
+        bounds["$gte"] = start.strftime("%Y-%m-%d")
+    if end:
+        bounds["$lt"] = end.strftime("%Y-%m-%d")
+    return {SOURCE_FIELD: bounds}
+
+
+def day_bucket(native: bool) -> Dict[str, Any]:
+    """Group key for one UTC day of created_at
+
+    The native key is a date; pass it through format_day after grouping so
+    results keep the YYYY-MM-DD keys of the string path.
+    """
+    if native:
+        return {"$dateTrunc": {"date": f"${DATE_FIELD}", "unit": "day"}}
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": {"$dateFromString": {"dateString": f"${SOURCE_FIELD}"}}}}
+
+
+def format_day(native: bool) -> List[Dict[str, Any]]:
+    """Stages turning a native day bucket into a YYYY-MM-DD _id, once per group"""
+    if native:
+        return [{"$set": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$_id"}}}}]
+    return []
+
+
+# Global migration instance
+created_at_migration = CreatedAtMigration(mongo_client)
@@ -4,11 +4,20 @@ Handles MongoDB connections and basic operations
 """
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List, Union
-from pymongo import MongoClient
+import bson
+from pymongo import MongoClient, InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
 from pymongo.database import Database
 from pymongo.collection import Collection
 from dotenv import load_dotenv
+from .pool_config import PoolConfig, PoolStatsListener
+from .change_watcher import ChangeWatcher, ChangeListener
+from .query_profiler import QueryProfiler
+from .catalog import CollectionCatalog
 
 load_dotenv()
 
@@ -16,10 +25,15 @@ load_dotenv()
 class MongoDBClient:
     """MongoDB client wrapper for hotel analytics"""
     
-    def __init__(self):
+    def __init__(self, pool_config: Optional[PoolConfig] = None):
         self._client: Optional[MongoClient] = None
         self._db: Optional[Database] = None
         self.db_name = os.getenv('DB_NAME', 'hotel_management')
+        self.pool_config = pool_config or PoolConfig.from_env()
+        self._pool_listener = PoolStatsListener()
+        self._change_watcher: Optional[ChangeWatcher] = None
+        self.profiler = QueryProfiler()
+        self.catalog = CollectionCatalog(lambda: self.db)
         
     def connect(self) -> bool:
         """Establish MongoDB connection"""
@@ -28,7 +42,11 @@ class MongoDBClient:
             if not mongo_uri:
                 raise ValueError("MONGO_URI not found in environment variables")
             
-            self._client = MongoClient(mongo_uri)
+            self._client = MongoClient(
+                mongo_uri,
+                event_listeners=[self._pool_listener],
+                **self.pool_config.to_client_kwargs()
+            )
             # Test connection
             self._client.admin.command('ping')
             self._db = self._client[self.db_name]
@@ -40,11 +58,63 @@ class MongoDBClient:
     
     def disconnect(self):
         """Close MongoDB connection"""
+        self.stop_change_watcher()
         if self._client:
             self._client.close()
             self._client = None
             self._db = None
     
+    def warm_pool(self, timeout: float = 5.0) -> int:
+        """Open min_pool_size connections up front so the first burst skips the handshake"""
+        target = self.pool_config.min_pool_size
+        if target <= 0:
+            return 0
+        if self._client is None and not self.connect():
+            raise ConnectionError("Failed to connect to MongoDB")
+        
+        # Concurrent pings force the pool to check out distinct connections
+        with ThreadPoolExecutor(max_workers=target) as executor:
+            list(executor.map(lambda _: self._client.admin.command('ping'), range(target)))
+        
+        deadline = time.monotonic() + timeout
+        while self._pool_listener.snapshot()["open_connections"] < target:
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        return self._pool_listener.snapshot()["open_connections"]
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics collected from CMAP events"""
+        stats = self._pool_listener.snapshot()
+        stats["max_pool_size"] = self.pool_config.max_pool_size
+        stats["min_pool_size"] = self.pool_config.min_pool_size
+        return stats
+    
+    def start_change_watcher(self, collections: List[str],
+                             listeners: Optional[List[ChangeListener]] = None,
+                             poll_interval: Optional[float] = None) -> ChangeWatcher:
+        """Start a background watcher notifying listeners when collections change"""
+        if self._change_watcher is None:
+            if poll_interval is None:
+                poll_interval = float(os.getenv('CHANGE_WATCHER_POLL_SECONDS', '30'))
+            poll_fallback = os.getenv('CHANGE_WATCHER_POLLING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+            self._change_watcher = ChangeWatcher(lambda: self.db, collections, poll_interval, poll_fallback)
+            for listener in listeners or []:
+                self._change_watcher.add_listener(listener)
+            self._change_watcher.start()
+        return self._change_watcher
+    
+    def stop_change_watcher(self):
+        """Stop the background change watcher if running"""
+        if self._change_watcher:
+            self._change_watcher.stop()
+            self._change_watcher = None
+    
+    @property
+    def change_watcher(self) -> Optional[ChangeWatcher]:
+        """Get the running change watcher, if any"""
+        return self._change_watcher
+    
     @property
     def db(self) -> Database:
         """Get database instance"""
@@ -61,49 +131,79 @@ class MongoDBClient:
         """Get list of all collections"""
         return self.db.list_collection_names()
     
-    def get_collection_stats(self, collection_name: str) -> Dict[str, Any]:
-        """Get collection statistics"""
-        try:
-            stats = self.db.command('collStats', collection_name)
-            collection = self.get_collection(collection_name)
-            
-            return {
-                'name': collection_name,
-                'count': collection.count_documents({}),
-                'size_bytes': stats.get('size', 0),
-                'avg_obj_size': stats.get('avgObjSize', 0),
-                'indexes': len(list(collection.list_indexes())),
-                'storage_size': stats.get('storageSize', 0)
-            }
-        except Exception as e:
-            return {
-                'name': collection_name,
-                'error': str(e),
-                'count': 0
-            }
+    def get_collection_stats(self, collection_name: str, exact_count: bool = False) -> Dict[str, Any]:
+        """Get collection statistics (estimated count unless exact_count)"""
+        return self.catalog.collection_stats(collection_name, exact_count)
     
     def execute_query(self, collection_name: str, query: Dict[str, Any], 
-                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+                     limit: Optional[int] = None,
+                     max_time_ms: Optional[int] = None,
+                     projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute a find query"""
         try:
             collection = self.get_collection(collection_name)
-            cursor = collection.find(query)
+            cursor = collection.find(query, projection)
             
             if limit:
                 cursor = cursor.limit(limit)
-                
-            return list(cursor)
+            if max_time_ms:
+                cursor = cursor.max_time_ms(max_time_ms)
+            
+            if not self.profiler.enabled:
+                return list(cursor)
+            
+            started = time.perf_counter()
+            results = list(cursor)
+            self.record_find(collection_name, query, limit,
+                             (time.perf_counter() - started) * 1000, len(results), projection)
+            return results
         except Exception as e:
-            raise Exception(f"Query execution failed: {e}")
+            raise Exception(f"Query execution failed: {e}") from e
     
     def execute_aggregation(self, collection_name: str, 
-                          pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                          pipeline: List[Dict[str, Any]],
+                          max_time_ms: Optional[int] = None) -> List[Dict[str, Any]]:
         """Execute an aggregation pipeline"""
         try:
             collection = self.get_collection(collection_name)
-            return list(collection.aggregate(pipeline))
+            options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+            if not self.profiler.enabled:
+                return list(collection.aggregate(pipeline, **options))
+            
+            started = time.perf_counter()
+            results = list(collection.aggregate(pipeline, **options))
+            self.record_aggregation(collection_name, pipeline,
+                                    (time.perf_counter() - started) * 1000, len(results))
+            return results
         except Exception as e:
-            raise Exception(f"Aggregation execution failed: {e}")
+            raise Exception(f"Aggregation execution failed: {e}") from e
+    
+    def record_find(self, collection_name: str, query: Dict[str, Any], limit: Optional[int],
+                    duration_ms: float, returned: int, projection: Optional[Dict[str, Any]] = None):
+        """Report a find to the query profiler (no-op unless profiling is enabled)"""
+        if not self.profiler.enabled:
+            return
+        command = {"find": collection_name, "filter": query, **({"limit": limit} if limit else {}),
+                   **({"projection": projection} if projection else {})}
+        self.profiler.record("find", collection_name,
+                             {"filter": query, "limit": limit, "projection": projection},
+                             duration_ms, returned, explain=lambda: self._explain(command))
+    
+    def record_aggregation(self, collection_name: str, pipeline: List[Dict[str, Any]],
+                           duration_ms: float, returned: int):
+        """Report an aggregation to the query profiler (no-op unless profiling is enabled)"""
+        if not self.profiler.enabled:
+            return
+        # Explaining with executionStats re-runs the pipeline, so never do it for writes
+        writes = any("$out" in stage or "$merge" in stage for stage in pipeline)
+        command = {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}
+        self.profiler.record("aggregate", collection_name, {"pipeline": pipeline},
+                             duration_ms, returned,
+                             explain=None if writes else lambda: self._explain(command))
+    
+    def _explain(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Run explain with execution statistics for a find or aggregate command"""
+        return self.db.command("explain", command, verbosity="executionStats")
     
     def execute_insert(self, collection_name: str, 
                       document: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Any]:
@@ -145,24 +245,164 @@ class MongoDBClient:
         except Exception as e:
             raise Exception(f"Update operation failed: {e}")
     
-    def get_collections(self) -> List[Dict[str, Any]]:
+    @staticmethod
+    def parse_bulk_operation(spec: Dict[str, Any]):
+        """Turn a {"op": ...} operation spec into a pymongo write model"""
+        if not isinstance(spec, dict):
+            raise ValueError("operation must be a dictionary")
+        op = spec.get("op")
+        if op not in ("insert", "update", "upsert", "replace", "delete"):
+            raise ValueError(f"unknown op '{op}' (expected insert, update, upsert, replace or delete)")
+        if op == "insert":
+            if not isinstance(spec.get("document"), dict) or not spec["document"]:
+                raise ValueError("insert needs a non-empty 'document'")
+            return InsertOne(spec["document"])
+        filter_criteria = spec.get("filter")
+        if not isinstance(filter_criteria, dict):
+            raise ValueError(f"{op} needs a 'filter' dictionary")
+        if op in ("update", "upsert"):
+            update = spec.get("update")
+            if not update or not isinstance(update, (dict, list)):
+                raise ValueError(f"{op} needs an 'update' document or pipeline")
+            upsert = op == "upsert" or bool(spec.get("upsert", False))
+            model = UpdateMany if spec.get("multi", op == "update") else UpdateOne
+            return model(filter_criteria, update, upsert=upsert)
+        if op == "replace":
+            if not isinstance(spec.get("document"), dict):
+                raise ValueError("replace needs a 'document'")
+            return ReplaceOne(filter_criteria, spec["document"], upsert=bool(spec.get("upsert", False)))
+        return DeleteMany(filter_criteria) if spec.get("multi", True) else DeleteOne(filter_criteria)
+    
+    def parse_bulk_operations(self, operations: List[Any]) -> List[Any]:
+        """Parse every operation spec up front; errors name the failing operation's index"""
+        models = []
+        for index, spec in enumerate(operations):
+            try:
+                models.append(self.parse_bulk_operation(spec))
+            except ValueError as e:
+                raise ValueError(f"operation {index}: {e}") from e
+        return models
+    
+    def execute_bulk(self, collection_name: str, operations: List[Any],
+                     batch_size: Optional[int] = None, max_batch_bytes: Optional[int] = None,
+                     write_concern: Optional[Dict[str, Any]] = None,
+                     pause_ms: Optional[float] = None, max_errors: int = 1000) -> Dict[str, Any]:
+        """Run mixed write operations as size-bounded unordered bulk_write batches
+        
+        Batches run one after another, so a large job never has more than one
+        batch in flight; pause_ms adds a gap between batches for busy servers.
+        Write errors do not stop the job until max_errors is exceeded, while
+        errors that are not per-document (network, auth) abort the remaining
+        batches. Error indexes refer to positions in `operations`. With an
+        unacknowledged write concern (w=0) the server reports nothing back, so
+        counts are None and "acknowledged" is False.
+        """
+        batch_size = batch_size or int(os.getenv("BULK_BATCH_SIZE", "1000"))
+        max_batch_bytes = max_batch_bytes or int(os.getenv("BULK_BATCH_MAX_BYTES", "4000000"))
+        if pause_ms is None:
+            pause_ms = float(os.getenv("BULK_BATCH_PAUSE_MS", "0"))
+        
+        models = self.parse_bulk_operations(operations)
+        collection = self.get_collection(collection_name)
+        if write_concern:
+            collection = collection.with_options(write_concern=WriteConcern(**write_concern))
+        
+        # Split on both operation count and encoded size
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_bytes = 0
+        for index, spec in enumerate(operations):
+            # The encoded spec is a close enough proxy for the wire size
+            size = len(bson.encode(spec))
+            if current and (len(current) >= batch_size or current_bytes + size > max_batch_bytes):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(index)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        
+        totals = {"inserted_count": 0, "matched_count": 0, "modified_count": 0,
+                  "deleted_count": 0, "upserted_count": 0}
+        upserted_ids: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        write_concern_errors: List[Any] = []
+        report: List[Dict[str, Any]] = []
+        aborted = None
+        acknowledged = True
+        started = time.perf_counter()
+        
+        for number, indexes in enumerate(batches):
+            if number and pause_ms:
+                time.sleep(pause_ms / 1000)
+            batch_started = time.perf_counter()
+            entry: Dict[str, Any] = {"batch": number, "operations": len(indexes)}
+            try:
+                result = collection.bulk_write([models[i] for i in indexes], ordered=False)
+                if not result.acknowledged:
+                    # Sent, but w=0 means no counts or errors come back
+                    entry["duration_ms"] = round((time.perf_counter() - batch_started) * 1000, 2)
+                    entry["acknowledged"] = acknowledged = False
+                    report.append(entry)
+                    continue
+                details = result.bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+            except Exception as e:
+                entry["duration_ms"] = round((time.perf_counter() - batch_started) * 1000, 2)
+                entry["error"] = str(e)
+                report.append(entry)
+                aborted = f"batch {number} failed: {e}"
+                break
+            
+            entry["duration_ms"] = round((time.perf_counter() - batch_started) * 1000, 2)
+            for key, name in (("nInserted", "inserted_count"), ("nMatched", "matched_count"),
+                              ("nModified", "modified_count"), ("nRemoved", "deleted_count"),
+                              ("nUpserted", "upserted_count")):
+                entry[name] = details.get(key, 0)
+                totals[name] += entry[name]
+            for upsert in details.get("upserted", []):
+                upserted_ids.append({"index": indexes[upsert["index"]], "_id": str(upsert["_id"])})
+            batch_errors = [{"index": indexes[err["index"]], "code": err.get("code"),
+                             "error": err.get("errmsg")} for err in details.get("writeErrors", [])]
+            entry["errors"] = len(batch_errors)
+            errors.extend(batch_errors)
+            write_concern_errors.extend(details.get("writeConcernErrors", []))
+            report.append(entry)
+            if len(errors) > max_errors:
+                aborted = f"more than {max_errors} write errors"
+                break
+        
+        if not acknowledged:
+            totals = dict.fromkeys(totals)
+        return {
+            **totals,
+            "acknowledged": acknowledged,
+            "upserted_ids": upserted_ids,
+            "operations": len(models),
+            "batches": report,
+            "errors": errors[:max_errors],
+            "error_count": len(errors),
+            "write_concern_errors": [str(err) for err in write_concern_errors],
+            "aborted": aborted,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+    
+    def get_collections(self, exact_counts: bool = False) -> List[Dict[str, Any]]:
         """Get list of collections with metadata"""
         try:
-            collections = []
-            for name in self.list_collections():
-                stats = self.get_collection_stats(name)
-                collections.append(stats)
-            return collections
+            return self.catalog.snapshot(exact_counts=exact_counts)
         except Exception as e:
             raise Exception(f"Failed to get collections: {e}")
     
-    def describe_collection(self, collection_name: str, sample_size: int = 5) -> Dict[str, Any]:
+    def describe_collection(self, collection_name: str, sample_size: int = 5,
+                            projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get collection schema analysis and sample documents"""
         try:
             collection = self.get_collection(collection_name)
             
             # Get sample documents
-            samples = list(collection.find().limit(sample_size))
+            samples = list(collection.find({}, projection).limit(sample_size))
             
             # Get collection stats
             stats = self.get_collection_stats(collection_name)
@@ -0,0 +1,210 @@
+"""
+Index management for the hotel analytics schema
+Declares the indexes each tool relies on, creates missing ones and reports plan/usage problems
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple
+from pymongo import IndexModel
+from .db_client import MongoDBClient, mongo_client
+from .query_profiler import winning_stages
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexSpec:
+    """An index a tool depends on"""
+    collection: str
+    keys: List[Tuple[str, int]]
+    used_by: List[str]
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.options.get("name") or "_".join(f"{k}_{d}" for k, d in self.keys)
+
+    def to_model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name,
+                          **{k: v for k, v in self.options.items() if k != "name"})
+
+
+@dataclass
+class QueryShape:
+    """Representative find issued by a tool, used to check its query plan"""
+    tool: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: Optional[int] = None
+
+
+# Indexes required by the tools, grouped by collection
+INDEX_SPECS: List[IndexSpec] = [
+    IndexSpec("orders", [("created_at", 1)],
+              ["get_daily_revenue", "get_revenue_by_date_range", "get_data_date_range",
+               "generate_chart_from_data", "rollups"]),
+    IndexSpec("orders", [("created_at_dt", 1)],
+              ["get_daily_revenue", "get_revenue_by_date_range", "generate_chart_from_data"]),
+    IndexSpec("orders", [("order_date", -1), ("order_time", -1)], ["search_orders_by_criteria"]),
+    IndexSpec("orders", [("status", 1), ("order_date", -1)], ["search_orders_by_criteria"]),
+    IndexSpec("orders", [("order_status", 1)], ["get_orders_by_status"]),
+    IndexSpec("orders", [("order_type", 1), ("order_date", -1)], ["search_orders_by_criteria"]),
+    IndexSpec("orders", [("customer_id", 1)], ["search_orders_by_criteria", "segment_denormalizer"]),
+    IndexSpec("orders", [("customer_segment", 1), ("order_date", -1), ("order_time", -1)],
+              ["search_orders_by_criteria"]),
+    IndexSpec("customers", [("customer_id", 1)], ["search_orders_by_criteria"]),
+    IndexSpec("customers", [("segment", 1), ("customer_id", 1)],
+              ["search_orders_by_criteria", "get_customer_segments"]),
+    IndexSpec("customers", [("total_spent", -1)], ["get_top_customers_by_spending"]),
+]
+
+# Representative queries for the tools with selective filters or sorts
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("get_daily_revenue", "orders",
+               {"created_at": {"$gte": "2024-09-01", "$lt": "2024-10-01"}}),
+    QueryShape("get_revenue_by_date_range", "orders",
+               {"created_at": {"$gte": "2024-09-01", "$lt": "2024-10-01"}}),
+    QueryShape("search_orders_by_criteria", "orders", {"status": "completed"},
+               sort=[("order_date", -1), ("order_time", -1)], limit=10),
+    QueryShape("search_orders_by_criteria", "orders", {"order_type": "delivery"},
+               sort=[("order_date", -1), ("order_time", -1)], limit=10),
+    QueryShape("search_orders_by_criteria", "orders", {"customer_segment": "vip"},
+               sort=[("order_date", -1), ("order_time", -1)], limit=10),
+    QueryShape("search_orders_by_criteria", "customers", {"customer_id": "CUST001"}),
+    QueryShape("search_orders_by_criteria", "customers", {"segment": "vip"}),
+    QueryShape("generate_chart_from_data", "orders", {"created_at": {"$gte": "2024-09-01"}}),
+    QueryShape("get_top_customers_by_spending", "customers", {}, sort=[("total_spent", -1)], limit=10),
+]
+
+
+class IndexManager:
+    """Creates declared indexes and inspects how tools use them"""
+
+    def __init__(self, client: MongoDBClient, specs: Optional[List[IndexSpec]] = None,
+                 shapes: Optional[List[QueryShape]] = None):
+        self._client = client
+        self.specs = specs if specs is not None else INDEX_SPECS
+        self.shapes = shapes if shapes is not None else QUERY_SHAPES
+        self._thread: Optional[threading.Thread] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def _existing_keys(self, collection: str) -> Dict[Tuple, str]:
+        info = self._client.db[collection].index_information()
+        return {tuple((k, int(d)) if isinstance(d, (int, float)) else (k, d) for k, d in spec["key"]): name
+                for name, spec in info.items()}
+
+    def missing_indexes(self) -> List[IndexSpec]:
+        """Declared indexes not present on the server (matched by key pattern)"""
+        existing: Dict[str, Dict[Tuple, str]] = {}
+        missing = []
+        for spec in self.specs:
+            if spec.collection not in existing:
+                existing[spec.collection] = self._existing_keys(spec.collection)
+            if tuple(spec.keys) not in existing[spec.collection]:
+                missing.append(spec)
+        return missing
+
+    def ensure_indexes(self) -> Dict[str, Any]:
+        """Create every missing declared index"""
+        created, failed = [], []
+        by_collection: Dict[str, List[IndexSpec]] = {}
+        for spec in self.missing_indexes():
+            by_collection.setdefault(spec.collection, []).append(spec)
+
+        for collection, specs in by_collection.items():
+            for spec in specs:
+                try:
+                    self._client.db[collection].create_indexes([spec.to_model()])
+                    created.append(f"{collection}.{spec.name}")
+                except Exception as e:
+                    failed.append({"index": f"{collection}.{spec.name}", "error": str(e)})
+
+        self.last_result = {"created": created, "failed": failed}
+        if created:
+            logger.info(f"Created indexes: {created}")
+        for failure in failed:
+            logger.warning(f"Index creation failed: {failure}")
+        return self.last_result
+
+    def ensure_indexes_in_background(self):
+        """Build missing indexes without delaying server startup"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            try:
+                self.ensure_indexes()
+            except Exception as e:
+                logger.warning(f"Index bootstrap failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="index-bootstrap", daemon=True)
+        self._thread.start()
+
+    def index_usage(self) -> List[Dict[str, Any]]:
+        """Per-index access counts from $indexStats for the declared collections"""
+        usage = []
+        for collection in sorted({spec.collection for spec in self.specs}):
+            for stat in self._client.db[collection].aggregate([{"$indexStats": {}}]):
+                usage.append({
+                    "collection": collection,
+                    "index": stat["name"],
+                    "ops": stat.get("accesses", {}).get("ops", 0),
+                    "since": str(stat.get("accesses", {}).get("since")),
+                })
+        return usage
+
+    def unused_indexes(self) -> List[Dict[str, Any]]:
+        """Indexes with no recorded accesses since the server started tracking them"""
+        return [u for u in self.index_usage() if u["ops"] == 0 and u["index"] != "_id_"]
+
+    def explain_shape(self, shape: QueryShape) -> Dict[str, Any]:
+        """Explain a tool's representative query and flag collection scans"""
+        command: Dict[str, Any] = {"find": shape.collection, "filter": shape.filter}
+        if shape.sort:
+            command["sort"] = dict(shape.sort)
+        if shape.limit:
+            command["limit"] = shape.limit
+        explain = self._client.db.command("explain", command, verbosity="queryPlanner")
+        stages = winning_stages(explain)
+        return {
+            "tool": shape.tool,
+            "collection": shape.collection,
+            "filter": shape.filter,
+            "sort": dict(shape.sort) if shape.sort else None,
+            "winning_stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+        }
+
+    def report(self, include_usage: bool = True) -> Dict[str, Any]:
+        """Full advisor report: declared index status, tool plans and unused indexes"""
+        missing = {(s.collection, s.name) for s in self.missing_indexes()}
+        report: Dict[str, Any] = {
+            "declared_indexes": [{
+                "collection": s.collection,
+                "index": s.name,
+                "keys": dict(s.keys),
+                "used_by": s.used_by,
+                "present": (s.collection, s.name) not in missing,
+            } for s in self.specs],
+            "tool_plans": [],
+        }
+        for shape in self.shapes:
+            try:
+                report["tool_plans"].append(self.explain_shape(shape))
+            except Exception as e:
+                report["tool_plans"].append({"tool": shape.tool, "collection": shape.collection,
+                                             "error": str(e)})
+        report["collscan_tools"] = sorted({p["tool"] for p in report["tool_plans"] if p.get("collscan")})
+        if include_usage:
+            report["unused_indexes"] = self.unused_indexes()
+        if self.last_result is not None:
+            report["last_bootstrap"] = self.last_result
+        return report
+
+
+# Global index manager instance
+index_manager = IndexManager(mongo_client)
@@ -0,0 +1,140 @@
+"""
+Thread-pool offload for synchronous tools
+Dispatches blocking PyMongo and matplotlib work to a bounded executor so it
+never runs inline on the FastMCP event loop
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable
+
+
+class _ToolStats:
+    """Queue-depth and latency counters for a single offloaded tool"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "max_concurrency": self.limit,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_ms / finished, 2) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+            "avg_run_ms": round(self.total_run_ms / finished, 2) if finished else 0.0,
+        }
+
+
+class ToolOffloader:
+    """Bounded executor with per-tool concurrency limits for blocking tools"""
+
+    def __init__(self, max_workers: Optional[int] = None, default_concurrency: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("TOOL_EXECUTOR_WORKERS", "16"))
+        self.default_concurrency = default_concurrency or int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Get the shared executor, creating it on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="mcp-tool"
+                )
+            return self._executor
+
+    def offload(self, max_concurrency: Optional[int] = None, name: Optional[str] = None) -> Callable:
+        """Decorator turning a blocking tool into a coroutine that runs on the executor
+
+        Apply it below @mcp.tool() so FastMCP registers the async wrapper while
+        the original signature and docstring are preserved for the tool schema.
+        """
+        limit = max_concurrency or self.default_concurrency
+        if limit <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        def decorator(func: Callable) -> Callable:
+            tool_name = name or func.__name__
+            semaphore = asyncio.Semaphore(limit)
+            stats = _ToolStats(limit)
+            with self._lock:
+                self._semaphores[tool_name] = semaphore
+                self._stats[tool_name] = stats
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                enqueued = time.perf_counter()
+                with self._lock:
+                    stats.queued += 1
+                    stats.max_queued = max(stats.max_queued, stats.queued)
+
+                async with semaphore:
+                    started = time.perf_counter()
+                    wait_ms = (started - enqueued) * 1000
+                    with self._lock:
+                        stats.queued -= 1
+                        stats.running += 1
+                        stats.total_wait_ms += wait_ms
+                        stats.max_wait_ms = max(stats.max_wait_ms, wait_ms)
+
+                    loop = asyncio.get_running_loop()
+                    failed = False
+                    try:
+                        return await loop.run_in_executor(
+                            self.executor, functools.partial(func, *args, **kwargs)
+                        )
+                    except BaseException:
+                        failed = True
+                        raise
+                    finally:
+                        with self._lock:
+                            stats.running -= 1
+                            stats.total_run_ms += (time.perf_counter() - started) * 1000
+                            if failed:
+                                stats.failed += 1
+                            else:
+                                stats.completed += 1
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Get executor and per-tool queue statistics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "tools": {tool: s.as_dict() for tool, s in self._stats.items()}
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the executor; it is recreated lazily if tools are called again"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+# Global offloader instance
+tool_offloader = ToolOffloader()
@@ -0,0 +1,182 @@
+"""
+Cursor pagination for the raw query tools
+Keeps server-side cursors open behind opaque continuation tokens and cuts pages by count and byte size
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+from pymongo.cursor import Cursor
+from pymongo.command_cursor import CommandCursor
+from bson.raw_bson import RawBSONDocument
+from .db_client import MongoDBClient, mongo_client
+from .serialization import RAW_CODEC_OPTIONS, decode_raw
+
+
+class PaginationError(ValueError):
+    """Raised for unknown, expired or mismatched continuation tokens"""
+
+
+@dataclass
+class _OpenCursor:
+    cursor: Any
+    kind: str
+    collection: str
+    page_size: int
+    pending: Optional[RawBSONDocument] = None
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class CursorPaginator:
+    """Pages through find/aggregate results with bounded memory
+
+    Cursors yield RawBSONDocument so page sizes are measured without
+    re-encoding and each page is decoded in one batch. Only the current
+    batch of an open cursor is held in the MCP server; idle
+    cursors are closed after a TTL and the least recently used one is closed
+    when the open-cursor limit is reached.
+    """
+
+    def __init__(self, client: MongoDBClient, max_page_size: Optional[int] = None,
+                 max_page_bytes: Optional[int] = None, max_open_cursors: Optional[int] = None,
+                 cursor_ttl: Optional[float] = None):
+        self._client = client
+        self.max_page_size = max_page_size or int(os.getenv("PAGINATION_MAX_PAGE_SIZE", "500"))
+        self.max_page_bytes = max_page_bytes or int(os.getenv("PAGINATION_MAX_PAGE_BYTES", "1000000"))
+        self.max_open_cursors = max_open_cursors or int(os.getenv("PAGINATION_MAX_CURSORS", "32"))
+        self.cursor_ttl = cursor_ttl or float(os.getenv("PAGINATION_CURSOR_TTL_SECONDS", "300"))
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str, _OpenCursor]" = OrderedDict()
+        self._expired = 0
+
+    def page_size_for(self, requested: Optional[int], limit: Optional[int] = None) -> int:
+        """Clamp a requested page size to the configured maximum"""
+        size = requested or limit or self.max_page_size
+        return max(1, min(size, self.max_page_size))
+
+    def open_find(self, collection: str, query: Dict[str, Any], limit: int, page_size: int,
+                  max_time_ms: Optional[int] = None,
+                  projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Start a find and return its first page"""
+        started = time.perf_counter()
+        cursor: Cursor = self._raw_collection(collection).find(query, projection)
+        cursor = cursor.limit(limit).batch_size(page_size)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        page = self._read_page(None, _OpenCursor(cursor, "find", collection, page_size))
+        self._client.record_find(collection, query, limit,
+                                 (time.perf_counter() - started) * 1000, page["count"], projection)
+        return page
+
+    def open_aggregate(self, collection: str, pipeline: List[Dict[str, Any]], page_size: int,
+                       max_time_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Start an aggregation and return its first page"""
+        options: Dict[str, Any] = {"batchSize": page_size}
+        if max_time_ms:
+            options["maxTimeMS"] = max_time_ms
+        started = time.perf_counter()
+        cursor: CommandCursor = self._raw_collection(collection).aggregate(pipeline, **options)
+        page = self._read_page(None, _OpenCursor(cursor, "aggregate", collection, page_size))
+        self._client.record_aggregation(collection, pipeline,
+                                        (time.perf_counter() - started) * 1000, page["count"])
+        return page
+
+    def _raw_collection(self, collection: str):
+        return self._client.get_collection(collection).with_options(codec_options=RAW_CODEC_OPTIONS)
+
+    def next_page(self, token: str, kind: str, collection: str,
+                  page_size: Optional[int] = None) -> Dict[str, Any]:
+        """Continue a cursor from its token"""
+        with self._lock:
+            self._reap()
+            # Claim the cursor so concurrent calls with the same token cannot interleave
+            entry = self._open.pop(token, None)
+        if entry is None:
+            raise PaginationError("Cursor is unknown or expired; rerun the original request")
+        if entry.kind != kind or entry.collection != collection:
+            self._register(token, entry)
+            raise PaginationError(f"Cursor belongs to a {entry.kind} on '{entry.collection}'")
+        if page_size:
+            entry.page_size = self.page_size_for(page_size)
+        return self._read_page(token, entry)
+
+    def close(self, token: str) -> bool:
+        """Close a cursor the caller no longer needs"""
+        with self._lock:
+            entry = self._open.pop(token, None)
+        if entry:
+            entry.cursor.close()
+        return entry is not None
+
+    def _read_page(self, token: Optional[str], entry: _OpenCursor) -> Dict[str, Any]:
+        page: List[RawBSONDocument] = []
+        used = 0
+        try:
+            while len(page) < entry.page_size:
+                doc = entry.pending if entry.pending is not None else next(entry.cursor, None)
+                entry.pending = None
+                if doc is None:
+                    break
+                size = len(doc.raw)
+                if page and used + size > self.max_page_bytes:
+                    entry.pending = doc
+                    break
+                page.append(doc)
+                used += size
+            if entry.pending is None and len(page) == entry.page_size:
+                # Peek so the last page is not followed by an empty one
+                entry.pending = next(entry.cursor, None)
+        except Exception:
+            entry.cursor.close()
+            raise
+
+        has_more = entry.pending is not None
+        if has_more:
+            token = token or secrets.token_urlsafe(16)
+            entry.last_used = time.monotonic()
+            self._register(token, entry)
+        else:
+            entry.cursor.close()
+            token = None
+        return {"data": decode_raw(page), "count": len(page), "page_bytes": used,
+                "has_more": has_more, "next_cursor": token}
+
+    def _register(self, token: str, entry: _OpenCursor):
+        evicted = []
+        with self._lock:
+            self._reap()
+            self._open[token] = entry
+            self._open.move_to_end(token)
+            while len(self._open) > self.max_open_cursors:
+                evicted.append(self._open.popitem(last=False)[1])
+                self._expired += 1
+        for old in evicted:
+            old.cursor.close()
+
+    def _reap(self):
+        """Close cursors idle past the TTL; caller holds the lock"""
+        cutoff = time.monotonic() - self.cursor_ttl
+        for token in [t for t, e in self._open.items() if e.last_used < cutoff]:
+            self._open.pop(token).cursor.close()
+            self._expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get open cursor count and limits"""
+        with self._lock:
+            self._reap()
+            return {
+                "open_cursors": len(self._open),
+                "max_open_cursors": self.max_open_cursors,
+                "expired_or_evicted": self._expired,
+                "max_page_size": self.max_page_size,
+                "max_page_bytes": self.max_page_bytes,
+                "cursor_ttl_seconds": self.cursor_ttl,
+            }
+
+
+# Global paginator instance
+paginator = CursorPaginator(mongo_client)
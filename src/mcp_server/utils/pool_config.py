@@ -0,0 +1,168 @@
+"""
+MongoDB connection pool configuration and monitoring
+Typed driver settings (env + constructor) and a CMAP listener for pool statistics
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+from pymongo import monitoring
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    """Read an optional integer environment variable"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool and driver tuning options passed to MongoClient"""
+    max_pool_size: int = 50
+    min_pool_size: int = 5
+    max_idle_time_ms: Optional[int] = 300000
+    wait_queue_timeout_ms: Optional[int] = 5000
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 5000
+    socket_timeout_ms: Optional[int] = None
+    max_connecting: int = 4
+    compressors: List[str] = field(default_factory=list)
+    app_name: str = "mongodb-hotel-analytics"
+
+    def __post_init__(self):
+        if self.max_pool_size < 0:
+            raise ValueError("max_pool_size must be >= 0 (0 means unbounded)")
+        if self.min_pool_size < 0:
+            raise ValueError("min_pool_size must be >= 0")
+        if self.max_pool_size and self.min_pool_size > self.max_pool_size:
+            raise ValueError("min_pool_size cannot exceed max_pool_size")
+        if self.max_connecting <= 0:
+            raise ValueError("max_connecting must be a positive integer")
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "PoolConfig":
+        """Build a config from MONGO_* environment variables; keyword overrides win"""
+        compressors = os.getenv("MONGO_COMPRESSORS", "")
+        values = {
+            "max_pool_size": _env_int("MONGO_MAX_POOL_SIZE", cls.max_pool_size),
+            "min_pool_size": _env_int("MONGO_MIN_POOL_SIZE", cls.min_pool_size),
+            "max_idle_time_ms": _env_int("MONGO_MAX_IDLE_TIME_MS", cls.max_idle_time_ms),
+            "wait_queue_timeout_ms": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", cls.wait_queue_timeout_ms),
+            "server_selection_timeout_ms": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS",
+                                                    cls.server_selection_timeout_ms),
+            "connect_timeout_ms": _env_int("MONGO_CONNECT_TIMEOUT_MS", cls.connect_timeout_ms),
+            "socket_timeout_ms": _env_int("MONGO_SOCKET_TIMEOUT_MS", cls.socket_timeout_ms),
+            "max_connecting": _env_int("MONGO_MAX_CONNECTING", cls.max_connecting),
+            "compressors": [c.strip() for c in compressors.split(",") if c.strip()],
+            "app_name": os.getenv("MONGO_APP_NAME", cls.app_name),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def to_client_kwargs(self) -> Dict[str, Any]:
+        """Translate into MongoClient keyword arguments"""
+        kwargs: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxConnecting": self.max_connecting,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "appname": self.app_name,
+        }
+        if self.max_idle_time_ms is not None:
+            kwargs["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            kwargs["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.socket_timeout_ms is not None:
+            kwargs["socketTimeoutMS"] = self.socket_timeout_ms
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+        return kwargs
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """CMAP event listener that keeps running pool counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "checkout_failures": 0,
+            "checkout_timeouts": 0,
+            "pool_clears": 0,
+        }
+        self._checked_out = 0
+        self._open = 0
+        self._waiting = 0
+        self._max_waiting = 0
+
+    def _bump(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._counters["connections_created"] += 1
+            self._open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._counters["connections_closed"] += 1
+            self._open = max(0, self._open - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+            self._counters["checkout_failures"] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._counters["checkout_timeouts"] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+            self._checked_out += 1
+            self._counters["checkouts"] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._checked_out = max(0, self._checked_out - 1)
+            self._counters["checkins"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a point-in-time copy of the pool statistics"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                "open_connections": self._open,
+                "in_use": self._checked_out,
+                "idle": max(0, self._open - self._checked_out),
+                "waiting": self._waiting,
+                "max_waiting": self._max_waiting,
+            })
+            return stats
@@ -0,0 +1,69 @@
+"""
+Projection helpers for the query tools
+Validates caller projections and prunes large nested arrays unless they are asked for
+"""
+
+import os
+from typing import Optional, Dict, Any, List, Tuple
+
+
+def _parse_pruned_fields(spec: str) -> Dict[str, List[str]]:
+    """Parse "collection.field,collection.field" into {collection: [fields]}"""
+    fields: Dict[str, List[str]] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if "." not in entry:
+            continue
+        collection, field = entry.split(".", 1)
+        fields.setdefault(collection, []).append(field)
+    return fields
+
+
+# Large embedded arrays dropped from results unless requested (e.g. order line items)
+LARGE_ARRAY_FIELDS: Dict[str, List[str]] = _parse_pruned_fields(
+    os.getenv("PRUNE_ARRAY_FIELDS", "orders.items"))
+
+
+def validate_projection(projection: Dict[str, Any]):
+    """Raise ValueError for projections MongoDB would reject"""
+    if not isinstance(projection, dict):
+        raise ValueError("Projection must be a dictionary of field names to 0 or 1")
+    modes = set()
+    for field, value in projection.items():
+        if not isinstance(field, str) or not field:
+            raise ValueError("Projection keys must be non-empty field names")
+        if isinstance(value, dict):
+            continue  # operators such as $slice or $elemMatch
+        if value not in (0, 1, True, False):
+            raise ValueError(f"Projection value for '{field}' must be 0 or 1")
+        if field != "_id":
+            modes.add(bool(value))
+    if len(modes) > 1:
+        raise ValueError("Projection cannot mix included and excluded fields (except _id)")
+
+
+def build_projection(collection: str, projection: Optional[Dict[str, Any]] = None,
+                     prune: bool = True,
+                     slice_to: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Combine a caller projection with automatic array pruning
+
+    Pruned arrays are excluded, or cut to their first slice_to elements when
+    slice_to is set (useful when the array's shape still matters). Arrays named
+    in the caller's projection are never pruned, and an inclusion projection
+    only returns what it names anyway. Returns (projection, pruned fields).
+    """
+    if projection:
+        validate_projection(projection)
+    candidates = LARGE_ARRAY_FIELDS.get(collection, []) if prune else []
+    if projection and any(bool(v) for k, v in projection.items() if k != "_id" and not isinstance(v, dict)):
+        candidates = []
+
+    pruned = [field for field in candidates
+              if not any(key == field or key.startswith(field + ".") for key in (projection or {}))]
+    if not pruned:
+        return (dict(projection) if projection else None), []
+
+    combined = dict(projection or {})
+    for field in pruned:
+        combined[field] = {"$slice": slice_to} if slice_to else 0
+    return combined, pruned
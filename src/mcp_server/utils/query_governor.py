@@ -0,0 +1,235 @@
+"""
+Query governor for agent-generated queries
+Applies per-tool maxTimeMS and rejects or rewrites plans estimated to scan beyond a document budget
+"""
+
+import os
+import threading
+from typing import Optional, Dict, Any, List
+from pymongo.errors import ExecutionTimeout
+from .db_client import MongoDBClient, mongo_client
+from .query_profiler import winning_stages
+
+# Stages that write; pipelines containing them are never rewritten
+_WRITE_STAGES = ("$out", "$merge")
+
+
+class QueryTooExpensive(Exception):
+    """Raised when a query's estimated cost exceeds the governor's budget"""
+
+    def __init__(self, message: str, details: Dict[str, Any]):
+        super().__init__(message)
+        self.details = details
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Structured error payload returned to the agent"""
+        return {
+            "error": f"Query too expensive: {self}",
+            "error_type": "query_too_expensive",
+            "details": self.details,
+        }
+
+
+class QueryGovernor:
+    """Estimates query cost with explain("queryPlanner") before running it
+
+    The planner does not report how many documents an index scan will touch,
+    so index-bounded plans are treated as within budget; collection scans are
+    costed at the collection's estimated size and unindexed $lookup joins at
+    input size times foreign collection size. maxTimeMS bounds whatever the
+    estimate misses.
+    """
+
+    def __init__(self, client: MongoDBClient, enabled: Optional[bool] = None,
+                 doc_budget: Optional[int] = None, mode: Optional[str] = None,
+                 default_max_time_ms: Optional[int] = None):
+        self._client = client
+        self.enabled = enabled if enabled is not None else os.getenv(
+            "QUERY_GOVERNOR_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.doc_budget = doc_budget or int(os.getenv("QUERY_DOC_BUDGET", "100000"))
+        self.mode = (mode or os.getenv("QUERY_GOVERNOR_MODE", "reject")).lower()
+        self.default_max_time_ms = default_max_time_ms or int(os.getenv("QUERY_MAX_TIME_MS", "15000"))
+        self._lock = threading.Lock()
+        self._counters = {"checked": 0, "rejected": 0, "rewritten": 0, "timeouts": 0}
+
+    def max_time_ms(self, tool: str) -> int:
+        """Time limit for a tool, overridable with <TOOL_NAME>_MAX_TIME_MS"""
+        return int(os.getenv(f"{tool.upper()}_MAX_TIME_MS", str(self.default_max_time_ms)))
+
+    def timeout_error(self, tool: str, error: Exception) -> Optional[Dict[str, Any]]:
+        """Structured payload if the error (or its cause) is a maxTimeMS expiry"""
+        cause = error.__cause__ or error
+        if not isinstance(cause, ExecutionTimeout):
+            return None
+        self._count("timeouts")
+        return {
+            "error": f"Query exceeded the {self.max_time_ms(tool)} ms time limit",
+            "error_type": "query_timeout",
+            "details": {
+                "max_time_ms": self.max_time_ms(tool),
+                "suggestions": ["Add a selective filter on an indexed field",
+                                "Narrow the date range or reduce the pipeline's work"],
+            },
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _collection_size(self, collection: str) -> int:
+        return self._client.get_collection(collection).estimated_document_count()
+
+    def _indexed_prefixes(self, collection: str) -> List[str]:
+        """Leading key of every index on a collection"""
+        info = self._client.get_collection(collection).index_information()
+        return [spec["key"][0][0] for spec in info.values()]
+
+    def _matched_input(self, collection: str, pipeline: List[Dict[str, Any]]) -> int:
+        """Documents entering the pipeline after its leading $match stages
+
+        Counting stops just past the budget so this stays cheap on large collections.
+        """
+        leading = []
+        for stage in pipeline:
+            if "$match" not in stage:
+                break
+            leading.append(stage["$match"])
+        if not leading:
+            return self._collection_size(collection)
+        matched = self._count_matching(collection, leading[0] if len(leading) == 1 else {"$and": leading})
+        return matched if matched is not None else self._collection_size(collection)
+
+    def _count_matching(self, collection: str, query: Dict[str, Any]) -> Optional[int]:
+        """Documents matching a filter, counted only up to just past the budget; None if the count fails"""
+        try:
+            return self._client.get_collection(collection).count_documents(
+                query, limit=self.doc_budget + 1, maxTimeMS=2000)
+        except Exception:
+            return None
+
+    def _explain(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        return self._client.db.command("explain", command, verbosity="queryPlanner")
+
+    def estimate_find(self, collection: str, query: Dict[str, Any],
+                      limit: Optional[int] = None) -> Dict[str, Any]:
+        """Estimate documents examined by a find"""
+        command: Dict[str, Any] = {"find": collection, "filter": query}
+        if limit:
+            command["limit"] = limit
+        stages = winning_stages(self._explain(command))
+        estimate = 0
+        if "COLLSCAN" in stages:
+            estimate = self._collection_size(collection)
+            if not query and limit:
+                # An unfiltered scan stops as soon as the limit is reached
+                estimate = min(estimate, limit)
+            elif limit and estimate > self.doc_budget:
+                # A filtered scan stops after `limit` matches; with matches spread
+                # evenly that is size * limit / matched documents
+                matched = self._count_matching(collection, query)
+                if matched is not None and matched >= limit:
+                    estimate = min(estimate, -(-estimate * limit // matched))
+        return {"collection": collection, "winning_stages": stages, "estimated_docs": estimate,
+                "per_input_doc_cost": 1, "reasons": ["collection scan"] if "COLLSCAN" in stages else []}
+
+    def estimate_pipeline(self, collection: str, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Estimate documents examined by an aggregation, including $lookup joins"""
+        explain = self._explain({"aggregate": collection, "pipeline": pipeline, "cursor": {}})
+        stages = winning_stages(explain)
+        reasons: List[str] = []
+        input_docs = 0
+        if "COLLSCAN" in stages:
+            input_docs = self._collection_size(collection)
+            reasons.append("collection scan")
+
+        estimate = input_docs
+        per_input_doc_cost = 1
+        size_for_joins = None
+        for stage in pipeline:
+            lookup = stage.get("$lookup") or stage.get("$graphLookup")
+            if not isinstance(lookup, dict) or "from" not in lookup:
+                continue
+            foreign = lookup["from"]
+            foreign_field = lookup.get("foreignField") or lookup.get("connectToField")
+            if foreign_field and foreign_field in self._indexed_prefixes(foreign):
+                continue
+            if size_for_joins is None:
+                size_for_joins = self._matched_input(collection, pipeline)
+            foreign_size = self._collection_size(foreign)
+            per_input_doc_cost += foreign_size
+            estimate += size_for_joins * foreign_size
+            reasons.append(f"unindexed $lookup on {foreign}.{foreign_field or '<pipeline>'}")
+
+        return {"collection": collection, "winning_stages": stages, "estimated_docs": estimate,
+                "per_input_doc_cost": per_input_doc_cost, "reasons": reasons}
+
+    def _too_expensive(self, estimate: Dict[str, Any], message: str) -> QueryTooExpensive:
+        self._count("rejected")
+        return QueryTooExpensive(message, {
+            **estimate,
+            "doc_budget": self.doc_budget,
+            "suggestions": [
+                "Add a selective filter on an indexed field (see get_index_report)",
+                "Narrow the date range or add a $limit before expensive stages",
+                "Use a dedicated analytics tool instead of a raw query",
+            ],
+        })
+
+    def check_find(self, collection: str, query: Dict[str, Any], limit: Optional[int] = None):
+        """Raise QueryTooExpensive if a find is estimated to exceed the budget"""
+        if not self.enabled:
+            return
+        self._count("checked")
+        estimate = self.estimate_find(collection, query, limit)
+        if estimate["estimated_docs"] > self.doc_budget:
+            raise self._too_expensive(
+                estimate, f"find on '{collection}' would examine ~{estimate['estimated_docs']} "
+                          f"documents (budget {self.doc_budget})")
+
+    def govern_pipeline(self, collection: str, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Check a pipeline, returning the pipeline to run and any rewrite notice
+
+        In "rewrite" mode an over-budget read-only pipeline gets a $limit after
+        its leading $match stages so no more than the budget allows flows into
+        the expensive stages; results are then partial and flagged as such.
+        """
+        if not self.enabled:
+            return {"pipeline": pipeline, "rewritten": False}
+        self._count("checked")
+        estimate = self.estimate_pipeline(collection, pipeline)
+        if estimate["estimated_docs"] <= self.doc_budget:
+            return {"pipeline": pipeline, "rewritten": False, "estimate": estimate}
+
+        message = (f"aggregate on '{collection}' would examine ~{estimate['estimated_docs']} "
+                   f"documents (budget {self.doc_budget})")
+        writes = any(name in stage for stage in pipeline for name in _WRITE_STAGES)
+        if self.mode != "rewrite" or writes:
+            raise self._too_expensive(estimate, message)
+
+        cap = max(1, self.doc_budget // estimate["per_input_doc_cost"])
+        position = 0
+        while position < len(pipeline) and "$match" in pipeline[position]:
+            position += 1
+        rewritten = pipeline[:position] + [{"$limit": cap}] + pipeline[position:]
+        self._count("rewritten")
+        return {
+            "pipeline": rewritten,
+            "rewritten": True,
+            "estimate": estimate,
+            "notice": f"{message}; input capped at {cap} documents, results are partial",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get governor settings and counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "mode": self.mode,
+                "doc_budget": self.doc_budget,
+                "default_max_time_ms": self.default_max_time_ms,
+                **self._counters,
+            }
+
+
+# Global query governor instance
+query_governor = QueryGovernor(mongo_client)
@@ -0,0 +1,127 @@
+"""
+Query instrumentation for MongoDBClient
+Times every find/aggregate, samples explain plans and keeps a bounded slow-query log
+"""
+
+import os
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Callable
+
+
+def winning_stages(explain: Any, inside_plan: bool = False) -> List[str]:
+    """Collect plan stage names from every winningPlan in an explain document"""
+    stages: List[str] = []
+    if isinstance(explain, dict):
+        if inside_plan and isinstance(explain.get("stage"), str):
+            stages.append(explain["stage"])
+        for key, value in explain.items():
+            if key == "rejectedPlans":
+                continue
+            stages.extend(winning_stages(value, inside_plan or key in ("winningPlan", "queryPlan")))
+    elif isinstance(explain, list):
+        for item in explain:
+            stages.extend(winning_stages(item, inside_plan))
+    return stages
+
+
+def _first_value(doc: Any, key: str) -> Optional[Any]:
+    """Depth-first lookup of the first occurrence of a key"""
+    if isinstance(doc, dict):
+        if key in doc:
+            return doc[key]
+        for value in doc.values():
+            found = _first_value(value, key)
+            if found is not None:
+                return found
+    elif isinstance(doc, list):
+        for item in doc:
+            found = _first_value(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class QueryProfiler:
+    """Opt-in timing, explain sampling and slow-query ring buffer"""
+
+    def __init__(self, enabled: Optional[bool] = None, slow_threshold_ms: Optional[float] = None,
+                 explain_sample_rate: Optional[float] = None, log_size: Optional[int] = None):
+        self.enabled = enabled if enabled is not None else _env_flag("QUERY_PROFILING_ENABLED")
+        self.slow_threshold_ms = slow_threshold_ms if slow_threshold_ms is not None else float(
+            os.getenv("SLOW_QUERY_MS", "100"))
+        self.explain_sample_rate = explain_sample_rate if explain_sample_rate is not None else float(
+            os.getenv("QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+        self._lock = threading.Lock()
+        self._slow: deque = deque(maxlen=log_size or int(os.getenv("SLOW_QUERY_LOG_SIZE", "200")))
+        self._totals: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, operation: str, collection: str, spec: Any, duration_ms: float,
+               returned: int, explain: Optional[Callable[[], Dict[str, Any]]] = None):
+        """Record one executed operation; explain is called only for a sample of the slow ones"""
+        key = f"{operation}:{collection}"
+        slow = duration_ms >= self.slow_threshold_ms
+        with self._lock:
+            totals = self._totals.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0})
+            totals["count"] += 1
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+            totals["slow"] += int(slow)
+        if not slow:
+            # Only slow operations are logged, so fast ones never pay for an explain
+            return
+
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "operation": operation,
+            "collection": collection,
+            "spec": spec,
+            "duration_ms": round(duration_ms, 2),
+            "docs_returned": returned,
+        }
+        if explain is not None and random.random() < self.explain_sample_rate:
+            try:
+                plan = explain()
+                entry["docs_examined"] = _first_value(plan, "totalDocsExamined")
+                entry["keys_examined"] = _first_value(plan, "totalKeysExamined")
+                entry["winning_plan"] = winning_stages(plan)
+            except Exception as e:
+                entry["explain_error"] = str(e)
+
+        with self._lock:
+            self._slow.append(entry)
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent slow operations, newest first"""
+        with self._lock:
+            entries = list(self._slow)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-operation timing totals"""
+        with self._lock:
+            operations = {
+                key: {**t, "avg_ms": round(t["total_ms"] / t["count"], 2), "total_ms": round(t["total_ms"], 2),
+                      "max_ms": round(t["max_ms"], 2)}
+                for key, t in self._totals.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "slow_threshold_ms": self.slow_threshold_ms,
+                "explain_sample_rate": self.explain_sample_rate,
+                "slow_log_size": len(self._slow),
+                "operations": operations,
+            }
+
+    def clear(self):
+        """Reset counters and the slow-query log"""
+        with self._lock:
+            self._slow.clear()
+            self._totals.clear()
@@ -0,0 +1,154 @@
+"""
+Result cache for analytics tools
+TTL + LRU in-memory cache keyed on (tool, normalized args) with per-collection invalidation
+"""
+
+import copy
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable, Iterable, Tuple, Union
+
+
+def _is_error_result(result: Any) -> bool:
+    """Tools report failures in-band; those results must never be cached"""
+    if isinstance(result, dict):
+        return "error" in result or result.get("success") is False
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return "error" in result[0] and len(result[0]) == 1
+    return False
+
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache for tool results"""
+
+    def __init__(self, max_entries: Optional[int] = None, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+        self.default_ttl = default_ttl or float(os.getenv("RESULT_CACHE_TTL_SECONDS", "60"))
+        self._lock = threading.Lock()
+        # key -> (expires_at, collections, value)
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(tool: str, arguments: Dict[str, Any]) -> str:
+        """Build a stable key from the tool name and its bound arguments"""
+        return tool + ":" + json.dumps(arguments, sort_keys=True, default=str, separators=(",", ":"))
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a key; returns (hit, value)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+            expires_at, _, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return True, copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, collections: Iterable[str] = (), ttl: Optional[float] = None):
+        """Store a value tagged with the collections it was computed from"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, tuple(collections), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate_collection(self, collection: str) -> int:
+        """Drop every entry computed from the given collection"""
+        with self._lock:
+            stale = [key for key, (_, colls, _) in self._entries.items() if collection in colls]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> int:
+        """Drop all entries"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._invalidations += count
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "default_ttl_seconds": self.default_ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def cached(self, collections: Union[List[str], Callable[[Dict[str, Any]], Iterable[str]]],
+               ttl: Optional[float] = None, name: Optional[str] = None) -> Callable:
+        """Decorator caching a tool's successful results
+
+        Apply it below @mcp.tool(). Works for both sync and async tools; the
+        arguments are bound against the signature so defaults and keyword
+        order do not produce distinct keys. collections may be a callable
+        taking the bound arguments, for tools whose source collection is a
+        parameter.
+        """
+        def decorator(func: Callable) -> Callable:
+            tool_name = name or func.__name__
+            signature = inspect.signature(func)
+
+            def key_for(args, kwargs) -> Tuple[str, Iterable[str]]:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                sources = collections(arguments) if callable(collections) else collections
+                return self.make_key(tool_name, arguments), sources
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    key, sources = key_for(args, kwargs)
+                    hit, value = self.get(key)
+                    if hit:
+                        return value
+                    result = await func(*args, **kwargs)
+                    if not _is_error_result(result):
+                        self.set(key, result, sources, ttl)
+                    return result
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key, sources = key_for(args, kwargs)
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                result = func(*args, **kwargs)
+                if not _is_error_result(result):
+                    self.set(key, result, sources, ttl)
+                return result
+            return wrapper
+
+        return decorator
+
+
+# Global result cache instance
+result_cache = ResultCache()
@@ -0,0 +1,397 @@
+"""
+Pre-aggregated rollup collections
+Maintained with $merge so analytics tools read a few small documents instead of scanning orders
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Iterable
+from .db_client import MongoDBClient, mongo_client
+
+logger = logging.getLogger(__name__)
+
+# Stores coverage and watermarks for every rollup, keyed by rollup collection name
+ROLLUP_META_COLLECTION = "rollup_meta"
+
+
+def _created_at_key(created_at: Any) -> Optional[str]:
+    """Normalize created_at (ISO string or datetime) to a sortable ISO string"""
+    if isinstance(created_at, datetime):
+        return created_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if isinstance(created_at, str) and len(created_at) >= 10:
+        return created_at
+    return None
+
+
+def update_touches_fields(update: Any, fields: Iterable[str]) -> bool:
+    """Check whether an update document could modify any of the given top-level fields"""
+    if not isinstance(update, dict):
+        # Aggregation-pipeline updates can compute anything
+        return True
+    fields = tuple(fields)
+    for operator, spec in update.items():
+        if not operator.startswith("$"):
+            # Replacement-style document
+            return True
+        if not isinstance(spec, dict):
+            return True
+        for path in spec:
+            if path.split(".")[0] in fields:
+                return True
+            if operator == "$rename" and str(spec[path]).split(".")[0] in fields:
+                return True
+    return False
+
+
+class MaintainedRollup:
+    """Base class for rollups derived from orders
+
+    Writes to the source collection mark the rollup dirty; readers fall back to
+    the raw collection until the next refresh has caught up, and whenever the
+    refresh thread or the change watcher is not running, since external writes
+    would then go unseen. Subclasses provide
+    _rebuild(), which performs a full or incremental refresh and returns the
+    metadata document stored in rollup_meta.
+    """
+
+    collection_name = ""
+    source_collection = "orders"
+    # Source fields the rollup depends on; updates touching anything else are ignored
+    source_fields: tuple = ()
+
+    def __init__(self, client: MongoDBClient):
+        self._client = client
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._meta: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._dirty_since: Optional[str] = None
+        self._full_rebuild = False
+        self.last_refresh_ms: Optional[float] = None
+
+    # ----- dirty tracking -------------------------------------------------
+
+    def mark_dirty(self, since: Optional[str] = None):
+        """Flag data created at or after `since` (ISO string) as stale; None means rebuild everything"""
+        with self._state_lock:
+            self._dirty = True
+            if since is None:
+                self._full_rebuild = True
+            elif self._dirty_since is None or since < self._dirty_since:
+                self._dirty_since = since
+        self._wake.set()
+
+    def note_inserted(self, documents: Iterable[Dict[str, Any]]):
+        """Mark the rollup stale from the earliest created_at among newly inserted orders"""
+        keys = [_created_at_key(doc.get("created_at")) for doc in documents if isinstance(doc, dict)]
+        keys = [key for key in keys if key]
+        self.mark_dirty(min(keys) if keys else None)
+
+    def note_updated(self, update: Any, upsert: bool = False):
+        """Mark the rollup stale if an update can change its figures"""
+        if upsert or update_touches_fields(update, self.source_fields):
+            self.mark_dirty(None)
+
+    def on_change(self, collection: str, event: Dict[str, Any]):
+        """Change watcher listener"""
+        if collection != self.source_collection:
+            return
+        operation = event.get("operationType")
+        if operation == "insert":
+            self.note_inserted([event.get("fullDocument") or {}])
+        elif operation == "update":
+            fields = event.get("updateDescription", {})
+            changed = list(fields.get("updatedFields", {})) + list(fields.get("removedFields", []))
+            if any(path.split(".")[0] in self.source_fields for path in changed):
+                self.mark_dirty(None)
+        else:
+            # replace, delete, drop and poll events do not say what changed
+            self.mark_dirty(None)
+
+    def is_fresh(self) -> bool:
+        """Whether the rollup reflects every write seen so far"""
+        with self._state_lock:
+            current = not self._dirty and self._meta is not None
+        return current and self._maintained()
+
+    def _maintained(self) -> bool:
+        # Without the watcher, external writes only show up at the next periodic refresh
+        watcher = self._client.change_watcher
+        return bool(self._thread and self._thread.is_alive() and watcher and watcher.running)
+
+    def status(self) -> Dict[str, Any]:
+        """Get coverage and freshness information"""
+        maintained = self._maintained()
+        with self._state_lock:
+            meta = {k: v for k, v in (self._meta or {}).items() if k != "_id"}
+            if meta.get("refreshed_at"):
+                meta["refreshed_at"] = str(meta["refreshed_at"])
+            meta.update({
+                "collection": self.collection_name,
+                "dirty": self._dirty,
+                "maintained": maintained,
+                "full_rebuild_pending": self._full_rebuild,
+                "last_refresh_ms": self.last_refresh_ms,
+            })
+            return meta
+
+    # ----- maintenance ----------------------------------------------------
+
+    def _rebuild(self, db, meta: Optional[Dict[str, Any]], full: bool,
+                 dirty_since: Optional[str], run_started: datetime) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """Bring the rollup up to date; incremental unless a full rebuild is needed"""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            run_started = datetime.now(timezone.utc)
+            db = self._client.db
+            meta_coll = db[ROLLUP_META_COLLECTION]
+
+            with self._state_lock:
+                meta = self._meta
+            if meta is None:
+                meta = meta_coll.find_one({"_id": self.collection_name})
+
+            with self._state_lock:
+                full = full or self._full_rebuild or not meta
+                dirty_since = self._dirty_since
+                # Clear before reading so writes landing mid-refresh re-dirty the rollup
+                self._dirty = False
+                self._full_rebuild = False
+                self._dirty_since = None
+
+            try:
+                meta = self._rebuild(db, meta, full, dirty_since, run_started)
+            except Exception:
+                self.mark_dirty(None if full else dirty_since)
+                raise
+
+            meta["_id"] = self.collection_name
+            meta["refreshed_at"] = run_started
+            meta_coll.replace_one({"_id": self.collection_name}, meta, upsert=True)
+
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._state_lock:
+                self._meta = meta
+            return self.status()
+
+    def start_background_refresh(self, interval: Optional[float] = None, debounce: float = 2.0):
+        """Refresh now and then periodically, or shortly after writes mark the rollup dirty"""
+        if self._thread and self._thread.is_alive():
+            return
+        if interval is None:
+            interval = float(os.getenv("ROLLUP_REFRESH_SECONDS", "300"))
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning(f"{self.collection_name} refresh failed: {e}")
+                self._wake.wait(interval)
+                if self._wake.is_set():
+                    # Let a burst of writes settle before recomputing
+                    self._stop.wait(debounce)
+                self._wake.clear()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name=f"{self.collection_name}-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+
+
+class DailyRevenueRollup(MaintainedRollup):
+    """Per-day revenue rollup over orders.created_at
+
+    Each document holds total_revenue, order_count, min/max order value and
+    sum_sq (sum of squared amounts, for variance) for one UTC day. Incremental
+    refreshes recompute the last few days plus any day touched by inserts.
+    """
+
+    collection_name = "orders_daily_rollup"
+    source_fields = ("created_at", "total_amount")
+
+    def __init__(self, client: MongoDBClient, lookback_days: Optional[int] = None):
+        super().__init__(client)
+        self.lookback_days = lookback_days if lookback_days is not None else int(
+            os.getenv("ROLLUP_LOOKBACK_DAYS", "3"))
+
+    def covers(self, start_date: str, end_date: str) -> bool:
+        """Whether [start_date, end_date] (YYYY-MM-DD) can be served from the rollup
+
+        The rollup aggregates every order, so any range ending on or before the
+        last covered day is complete; days without orders simply have no document.
+        Without the change watcher, back-dated external inserts outside the
+        lookback window would be missed, so nothing is covered then.
+        """
+        with self._state_lock:
+            if self._dirty or self._meta is None:
+                return False
+            covered_through = self._meta.get("covered_through")
+        return bool(covered_through) and start_date <= end_date <= covered_through and self._maintained()
+
+    def _group_pipeline(self, since_day: Optional[str], run_started: datetime) -> List[Dict[str, Any]]:
+        pipeline: List[Dict[str, Any]] = []
+        if since_day:
+            pipeline.append({"$match": {"created_at": {"$gte": f"{since_day}T00:00:00Z"}}})
+        pipeline.extend([
+            {"$group": {
+                "_id": {"$substrBytes": ["$created_at", 0, 10]},
+                "total_revenue": {"$sum": "$total_amount"},
+                "order_count": {"$sum": 1},
+                "min_order_value": {"$min": "$total_amount"},
+                "max_order_value": {"$max": "$total_amount"},
+                "sum_sq": {"$sum": {"$multiply": ["$total_amount", "$total_amount"]}}
+            }},
+            {"$match": {"_id": {"$ne": ""}}},
+            {"$set": {"refreshed_at": run_started}},
+        ])
+        return pipeline
+
+    def _rebuild(self, db, meta, full, dirty_since, run_started):
+        if full or not meta.get("covered_through"):
+            full = True
+            since_day = None
+            pipeline = self._group_pipeline(None, run_started)
+            pipeline.append({"$out": self.collection_name})
+            db[self.source_collection].aggregate(pipeline, allowDiskUse=True)
+        else:
+            lookback = (datetime.strptime(meta["covered_through"], "%Y-%m-%d")
+                        - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+            since_day = min(lookback, dirty_since[:10]) if dirty_since else lookback
+            pipeline = self._group_pipeline(since_day, run_started)
+            pipeline.append({"$merge": {
+                "into": self.collection_name,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }})
+            db[self.source_collection].aggregate(pipeline, allowDiskUse=True)
+            # Days in the window that no longer have orders were not rewritten
+            db[self.collection_name].delete_many({
+                "_id": {"$gte": since_day},
+                "refreshed_at": {"$lt": run_started}
+            })
+
+        rollup = db[self.collection_name]
+        first = rollup.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        last = rollup.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        today = run_started.strftime("%Y-%m-%d")
+        return {
+            "min_day": first["_id"] if first else None,
+            "covered_through": max(last["_id"], today) if last else today,
+            "mode": "full" if full else "incremental",
+            "since_day": since_day,
+        }
+
+
+class MenuItemStatsView(MaintainedRollup):
+    """Per-item, per-day menu statistics materialized from orders.items
+
+    Documents are keyed by {item, day} and hold quantity, revenue, price_sum and
+    line_count (order lines with a numeric price, for the average price). New
+    orders are folded in incrementally past a created_at watermark; anything
+    older than the watermark, and any update or delete, forces a full rebuild.
+    """
+
+    collection_name = "menu_item_daily_stats"
+    source_fields = ("created_at", "items")
+
+    def _stats_pipeline(self, created_filter: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        pipeline: List[Dict[str, Any]] = []
+        if created_filter:
+            pipeline.append({"$match": {"created_at": created_filter}})
+        pipeline.extend([
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": {"item": "$items.name", "day": {"$substrBytes": ["$created_at", 0, 10]}},
+                "quantity": {"$sum": "$items.quantity"},
+                "revenue": {"$sum": {"$multiply": ["$items.quantity", "$items.price"]}},
+                "price_sum": {"$sum": "$items.price"},
+                "line_count": {"$sum": {"$cond": [{"$isNumber": "$items.price"}, 1, 0]}}
+            }},
+            {"$set": {"item": "$_id.item", "day": "$_id.day"}},
+        ])
+        return pipeline
+
+    def _rebuild(self, db, meta, full, dirty_since, run_started):
+        newest = db[self.source_collection].find_one(
+            {"created_at": {"$exists": True}}, {"created_at": 1}, sort=[("created_at", -1)])
+        high = _created_at_key(newest.get("created_at")) if newest else None
+        watermark = meta.get("watermark") if meta else None
+
+        # Orders at or before the watermark were already folded in; adding them
+        # incrementally would double count, so rebuild from scratch instead
+        if not full and (watermark is None or (dirty_since is not None and dirty_since <= watermark)):
+            full = True
+
+        if full:
+            pipeline = self._stats_pipeline(None)
+            pipeline.append({"$out": self.collection_name})
+            db[self.source_collection].aggregate(pipeline, allowDiskUse=True)
+        elif high and high > watermark:
+            pipeline = self._stats_pipeline({"$gt": watermark, "$lte": high})
+            pipeline.append({"$merge": {
+                "into": self.collection_name,
+                "on": "_id",
+                "whenMatched": [{"$set": {
+                    "quantity": {"$add": ["$quantity", "$$new.quantity"]},
+                    "revenue": {"$add": ["$revenue", "$$new.revenue"]},
+                    "price_sum": {"$add": ["$price_sum", "$$new.price_sum"]},
+                    "line_count": {"$add": ["$line_count", "$$new.line_count"]}
+                }}],
+                "whenNotMatched": "insert"
+            }})
+            db[self.source_collection].aggregate(pipeline, allowDiskUse=True)
+        else:
+            high = watermark
+
+        return {
+            "watermark": high,
+            "mode": "full" if full else "incremental",
+        }
+
+    def top_items_pipeline(self, sort_field: str, limit: int) -> List[Dict[str, Any]]:
+        """Pipeline over the view producing the same shape as the raw $unwind ranking"""
+        return [
+            {"$group": {
+                "_id": "$item",
+                "total_orders": {"$sum": "$quantity"},
+                "total_revenue": {"$sum": "$revenue"},
+                "price_sum": {"$sum": "$price_sum"},
+                "line_count": {"$sum": "$line_count"}
+            }},
+            {"$sort": {sort_field: -1}},
+            {"$limit": limit},
+            {"$project": {
+                "total_orders": 1,
+                "total_revenue": 1,
+                "avg_price": {"$cond": [
+                    {"$gt": ["$line_count", 0]},
+                    {"$divide": ["$price_sum", "$line_count"]},
+                    None
+                ]}
+            }}
+        ]
+
+
+# Global rollup instances
+daily_revenue_rollup = DailyRevenueRollup(mongo_client)
+menu_item_stats = MenuItemStatsView(mongo_client)
+
+ALL_ROLLUPS = [daily_revenue_rollup, menu_item_stats]
@@ -0,0 +1,280 @@
+"""
+Statistical schema profiler
+Profiles a $sample of each collection (presence, types, cardinality, nested paths) into a schema catalog
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Set
+from bson import ObjectId
+from .db_client import MongoDBClient, mongo_client
+
+# One document per profiled collection
+SCHEMA_CATALOG_COLLECTION = "schema_catalog"
+
+# Values at or below this many distinct values are reported with their values
+LOW_CARDINALITY = 20
+
+_TYPE_NAMES = {
+    str: "string", int: "int", float: "double", bool: "bool", dict: "object",
+    list: "array", type(None): "null", datetime: "date", ObjectId: "objectId",
+}
+
+
+def _type_name(value: Any) -> str:
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+class _FieldStats:
+    """Additive counters for one field path"""
+
+    def __init__(self, cap: int, stored: Optional[Dict[str, Any]] = None):
+        stored = stored or {}
+        self.cap = cap
+        self.present = stored.get("present", 0)
+        self.types: Dict[str, int] = dict(stored.get("types", {}))
+        self.element_types: Dict[str, int] = dict(stored.get("element_types", {}))
+        self.values: List[Any] = list(stored.get("values", []))
+        self._seen: Set[Any] = {self._key(v) for v in self.values}
+        self.capped = stored.get("capped", False)
+
+    @staticmethod
+    def _key(value: Any) -> Any:
+        key = (type(value).__name__, value)
+        try:
+            hash(key)
+        except TypeError:
+            key = (type(value).__name__, repr(value))
+        return key
+
+    def add(self, value: Any):
+        name = _type_name(value)
+        self.types[name] = self.types.get(name, 0) + 1
+        if isinstance(value, list):
+            for element in value:
+                if not isinstance(element, dict):
+                    element_name = _type_name(element)
+                    self.element_types[element_name] = self.element_types.get(element_name, 0) + 1
+        elif not isinstance(value, dict) and not self.capped:
+            key = self._key(value)
+            if key not in self._seen:
+                if len(self.values) >= self.cap:
+                    self.capped = True
+                else:
+                    self._seen.add(key)
+                    self.values.append(value)
+
+    def to_doc(self, path: str) -> Dict[str, Any]:
+        doc = {"path": path, "present": self.present, "types": self.types,
+               "values": self.values, "capped": self.capped}
+        if self.element_types:
+            doc["element_types"] = self.element_types
+        return doc
+
+
+class SchemaProfiler:
+    """Maintains the schema catalog and serves describe calls from it
+
+    A profile is rebuilt from a fresh $sample when it is older than max_age or
+    after updates; documents inserted since the last profile are sampled at
+    the existing profile's sampling rate and merged into its counters instead,
+    so presence and type ratios stay unbiased. When that would take more than
+    sample_size new documents the collection is resampled in full.
+    """
+
+    def __init__(self, client: MongoDBClient, sample_size: Optional[int] = None,
+                 max_age: Optional[float] = None, max_depth: Optional[int] = None,
+                 distinct_cap: Optional[int] = None):
+        self._client = client
+        self.sample_size = sample_size or int(os.getenv("SCHEMA_SAMPLE_SIZE", "1000"))
+        self.max_age = max_age or float(os.getenv("SCHEMA_MAX_AGE_SECONDS", "3600"))
+        self.max_depth = max_depth or int(os.getenv("SCHEMA_MAX_DEPTH", "5"))
+        self.distinct_cap = distinct_cap or int(os.getenv("SCHEMA_DISTINCT_CAP", "100"))
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        # collection -> "inserts" (incremental merge) or "full"
+        self._pending: Dict[str, str] = {}
+
+    # ----- invalidation ---------------------------------------------------
+
+    def note_inserted(self, collection: str):
+        with self._lock:
+            self._pending.setdefault(collection, "inserts")
+
+    def note_changed(self, collection: str):
+        with self._lock:
+            self._pending[collection] = "full"
+
+    def on_change(self, collection: str, event: Dict[str, Any]):
+        """ChangeWatcher listener"""
+        if event.get("operationType") == "insert":
+            self.note_inserted(collection)
+        else:
+            self.note_changed(collection)
+
+    # ----- profiling ------------------------------------------------------
+
+    def _walk(self, value: Dict[str, Any], prefix: str, depth: int,
+              stats: Dict[str, _FieldStats], seen: Set[str]):
+        for key, item in value.items():
+            path = f"{prefix}{key}"
+            field = stats.get(path)
+            if field is None:
+                field = stats[path] = _FieldStats(self.distinct_cap)
+            field.add(item)
+            seen.add(path)
+            if depth >= self.max_depth:
+                continue
+            if isinstance(item, dict):
+                self._walk(item, path + ".", depth + 1, stats, seen)
+            elif isinstance(item, list):
+                for element in item:
+                    if isinstance(element, dict):
+                        self._walk(element, path + ".", depth + 1, stats, seen)
+
+    def _profile_documents(self, documents: List[Dict[str, Any]],
+                           stats: Dict[str, _FieldStats]) -> int:
+        for doc in documents:
+            seen: Set[str] = set()
+            self._walk(doc, "", 1, stats, seen)
+            # Presence counts documents, not array elements
+            for path in seen:
+                stats[path].present += 1
+        return len(documents)
+
+    def refresh(self, collection: str, full: bool = True) -> Dict[str, Any]:
+        """Profile a collection (or merge newly inserted documents) and store the result"""
+        db = self._client.db
+        coll = db[collection]
+        if not db.list_collection_names(filter={"name": collection}):
+            # Forget any profile left from before a drop rather than cataloguing an empty collection
+            db[SCHEMA_CATALOG_COLLECTION].delete_one({"_id": collection})
+            with self._lock:
+                self._profiles.pop(collection, None)
+            raise ValueError(f"Collection '{collection}' does not exist")
+        existing = self._profiles.get(collection) or db[SCHEMA_CATALOG_COLLECTION].find_one({"_id": collection})
+        incremental = bool(not full and existing is not None
+                           and existing.get("docs_sampled") and existing.get("document_count")
+                           and isinstance(existing.get("last_id"), ObjectId))
+
+        size = self.sample_size
+        stats: Dict[str, _FieldStats] = {}
+        docs_sampled = 0
+        match: Optional[Dict[str, Any]] = None
+        if incremental:
+            # Default ObjectIds increase with insertion time, so this selects new documents
+            match = {"_id": {"$gt": existing["last_id"]}}
+            rate = existing["docs_sampled"] / existing["document_count"]
+            new_docs = coll.count_documents(match, limit=int(self.sample_size / rate) + 1)
+            size = -(-new_docs * existing["docs_sampled"] // existing["document_count"])
+            incremental = size <= self.sample_size
+            if incremental:
+                stats = {f["path"]: _FieldStats(self.distinct_cap, f) for f in existing["fields"]}
+                docs_sampled = existing["docs_sampled"]
+            else:
+                match, size = None, self.sample_size
+
+        started = time.perf_counter()
+        pipeline: List[Dict[str, Any]] = [{"$sample": {"size": size}}] if size else []
+        if match is not None and size:
+            pipeline.insert(0, {"$match": match})
+        if pipeline:
+            docs_sampled += self._profile_documents(list(coll.aggregate(pipeline)), stats)
+        last = coll.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        now = datetime.now(timezone.utc)
+        document_count = coll.estimated_document_count()
+
+        profile = {
+            "_id": collection,
+            "collection": collection,
+            "docs_sampled": docs_sampled,
+            # Incremental merges keep the rate the counters were sampled at
+            "document_count": existing["document_count"] + new_docs if incremental else document_count,
+            "last_id": last["_id"] if last else None,
+            "profiled_at": now,
+            "full_profiled_at": existing["full_profiled_at"] if incremental else now,
+            "profile_ms": round((time.perf_counter() - started) * 1000, 1),
+            "fields": [stats[path].to_doc(path) for path in sorted(stats)],
+        }
+        db[SCHEMA_CATALOG_COLLECTION].replace_one({"_id": collection}, profile, upsert=True)
+        with self._lock:
+            self._profiles[collection] = profile
+        return profile
+
+    def get(self, collection: str, refresh: bool = False) -> Dict[str, Any]:
+        """Cached profile, refreshed when stale or after writes"""
+        with self._lock:
+            pending = self._pending.pop(collection, None)
+            profile = self._profiles.get(collection)
+        try:
+            if profile is None and not refresh:
+                profile = self._client.db[SCHEMA_CATALOG_COLLECTION].find_one({"_id": collection})
+                if profile:
+                    with self._lock:
+                        self._profiles[collection] = profile
+
+            if refresh or profile is None or pending == "full" or self._expired(profile):
+                return self.refresh(collection, full=True)
+            if pending == "inserts":
+                return self.refresh(collection, full=False)
+            return profile
+        except Exception:
+            # Keep the pending refresh for the next call; writes seen meanwhile win if stronger
+            if pending:
+                with self._lock:
+                    if self._pending.get(collection) != "full":
+                        self._pending[collection] = pending
+            raise
+
+    def _expired(self, profile: Dict[str, Any]) -> bool:
+        full_at = profile.get("full_profiled_at")
+        if full_at is None:
+            return True
+        if full_at.tzinfo is None:
+            full_at = full_at.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - full_at).total_seconds() > self.max_age
+
+    # ----- presentation ---------------------------------------------------
+
+    @staticmethod
+    def summarize(profile: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Per-path field info for the agent"""
+        sampled = profile["docs_sampled"] or 1
+        fields = {}
+        for field in profile["fields"]:
+            types = field["types"]
+            dominant = max(types, key=types.get) if types else "unknown"
+            distinct = len(field["values"])
+            total = sum(types.values()) or 1
+            info: Dict[str, Any] = {
+                "type": dominant if len(types) == 1 else "mixed",
+                "types": {name: round(count / total, 3) for name, count in types.items()},
+                "presence": round(field["present"] / sampled, 3),
+            }
+            if set(types) - {"array", "object"}:
+                info["distinct_in_sample"] = f">{distinct}" if field["capped"] else distinct
+            if field.get("element_types"):
+                info["element_types"] = sorted(field["element_types"])
+            if not field["capped"] and 0 < distinct <= LOW_CARDINALITY:
+                info["values"] = field["values"]
+            elif not field["capped"] and distinct == field["present"] and field["present"] > LOW_CARDINALITY:
+                info["likely_unique"] = True
+            fields[field["path"]] = info
+        return fields
+
+    def status(self) -> Dict[str, Any]:
+        """Profiled collections and pending refreshes"""
+        with self._lock:
+            return {
+                "profiled": {name: {"docs_sampled": p["docs_sampled"], "profiled_at": str(p["profiled_at"])}
+                             for name, p in self._profiles.items()},
+                "pending": dict(self._pending),
+                "sample_size": self.sample_size,
+                "max_age_seconds": self.max_age,
+            }
+
+
+# Global schema profiler instance
+schema_profiler = SchemaProfiler(mongo_client)
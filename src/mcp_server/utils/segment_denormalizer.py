@@ -0,0 +1,354 @@
+"""
+Denormalized customer segment on orders
+Copies customers.segment onto orders.customer_segment so segment filters are an indexed equality match
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Iterable, Set, Tuple
+from pymongo import UpdateMany
+from .db_client import MongoDBClient, mongo_client
+from .rollups import update_touches_fields
+
+logger = logging.getLogger(__name__)
+
+# Backfill progress, one document per denormalized field
+DENORMALIZATION_META_COLLECTION = "denormalization_meta"
+
+# Customer fields the copy depends on
+CUSTOMER_FIELDS = ("customer_id", "segment")
+
+# Fields whose updates can leave orders.customer_segment stale, per collection
+WATCHED_FIELDS = {
+    "customers": CUSTOMER_FIELDS,
+    "orders": ("customer_id", "customer_segment"),
+}
+
+
+class SegmentDenormalizer:
+    """Maintains orders.customer_segment from customers.segment
+
+    The initial backfill walks customers in _id order and issues one
+    UpdateMany per customer through bulk_write, saving its position after
+    every batch so a restart resumes where it stopped. Writes made through the
+    MCP tools are applied synchronously; external writes arrive through the
+    change watcher and are applied by the background thread, so the copy is
+    only reported ready while both are running. Orders whose
+    customer was deleted, or had its customer_id changed, outside the tools
+    keep their last segment until that customer id is written again.
+
+    Nothing is read or written until setup_server sets `enabled`
+    (DENORMALIZE_SEGMENTS_ENABLED); until then tool writes pass through untouched.
+    """
+
+    meta_id = "orders.customer_segment"
+
+    def __init__(self, client: MongoDBClient, batch_size: Optional[int] = None):
+        self._client = client
+        self.enabled = False
+        self.batch_size = batch_size or int(os.getenv("DENORMALIZE_BATCH_SIZE", "500"))
+        self._state_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._meta: Optional[Dict[str, Any]] = None
+        # Work queued by change events
+        self._customer_ids: Set[Any] = set()
+        self._customer_oids: Set[Any] = set()
+        self._order_oids: Set[Any] = set()
+        self._resync = False
+        self.last_run_ms: Optional[float] = None
+
+    # ----- readiness ------------------------------------------------------
+
+    def is_ready(self) -> bool:
+        """Whether orders have been backfilled and external writes are being applied"""
+        with self._state_lock:
+            backfilled = bool(self._meta and self._meta.get("backfilled_at"))
+        return backfilled and self._maintained()
+
+    def _maintained(self) -> bool:
+        # Without the watcher, orders written outside this server never get the field
+        watcher = self._client.change_watcher
+        return bool(self._thread and self._thread.is_alive() and watcher and watcher.running)
+
+    def status(self) -> Dict[str, Any]:
+        maintained = self._maintained()
+        with self._state_lock:
+            meta = {k: str(v) if isinstance(v, datetime) else v
+                    for k, v in (self._meta or {}).items() if k != "_id"}
+            meta.update({
+                "enabled": self.enabled,
+                "ready": bool(meta.get("backfilled_at")) and maintained,
+                "maintained": maintained,
+                "queued_customers": len(self._customer_ids) + len(self._customer_oids),
+                "queued_orders": len(self._order_oids),
+                "resync_pending": self._resync,
+                "last_run_ms": self.last_run_ms,
+            })
+            return meta
+
+    # ----- synchronous maintenance for tool writes ------------------------
+
+    def stamp_orders(self, documents: Iterable[Dict[str, Any]]):
+        """Set customer_segment on orders about to be inserted"""
+        if not self.enabled:
+            return
+        documents = [doc for doc in documents if isinstance(doc, dict) and "customer_id" in doc]
+        if not documents:
+            return
+        ids = list({doc["customer_id"] for doc in documents if _hashable(doc["customer_id"])})
+        segments = self._segments(ids)
+        for doc in documents:
+            key = doc["customer_id"]
+            if _hashable(key) and key in segments:
+                doc["customer_segment"] = segments[key]
+            else:
+                doc.pop("customer_segment", None)
+
+    def before_update(self, collection: str, filter_criteria: Dict[str, Any], update: Any,
+                      limit: int = 10000) -> Optional[Dict[str, Any]]:
+        """Capture the documents an update may re-link before it runs"""
+        return self.before_updates(collection, [(filter_criteria, update, False)], limit)
+
+    def before_updates(self, collection: str, updates: List[Tuple[Dict[str, Any], Any, bool]],
+                       limit: int = 10000) -> Optional[Dict[str, Any]]:
+        """Capture the documents a batch of (filter, update, upsert) writes may re-link
+
+        Filters are combined with $or, a chunk at a time, so a bulk job costs a
+        few reads rather than one per operation.
+        """
+        if not self.enabled:
+            return None
+        fields = WATCHED_FIELDS.get(collection)
+        touching = [(f, upsert) for f, update, upsert in updates
+                    if fields and update_touches_fields(update, fields)]
+        if not touching:
+            return None
+        upsert = any(upsert for _, upsert in touching)
+        filters = [f for f, _ in touching]
+        docs: Dict[Any, Dict[str, Any]] = {}
+        for start in range(0, len(filters), self.batch_size):
+            chunk = filters[start:start + self.batch_size]
+            query = chunk[0] if len(chunk) == 1 else {"$or": chunk}
+            for doc in self._client.db[collection].find(query, {"customer_id": 1}).limit(limit + 1 - len(docs)):
+                docs[doc["_id"]] = doc
+            if len(docs) > limit:
+                return {"docs": None, "upsert": upsert}
+        return {"docs": list(docs.values()), "upsert": upsert}
+
+    def after_update(self, collection: str, before: Optional[Dict[str, Any]], upsert: bool = False):
+        """Re-sync the orders of every customer an update touched"""
+        if not self.enabled or before is None:
+            return
+        if before["docs"] is None or upsert or before.get("upsert"):
+            self.request_resync()
+            return
+        ids = {doc.get("customer_id") for doc in before["docs"]}
+        # customer_id itself may have changed, so read the new values too
+        oids = [doc["_id"] for doc in before["docs"]]
+        for doc in self._client.db[collection].find({"_id": {"$in": oids}}, {"customer_id": 1}):
+            ids.add(doc.get("customer_id"))
+        self.sync_customers(ids)
+
+    def sync_customers(self, customer_ids: Iterable[Any]) -> int:
+        """Bring the orders of the given customers in line with their current segment"""
+        if not self.enabled:
+            return 0
+        ids = [cid for cid in set(filter(_hashable, customer_ids)) if cid is not None]
+        modified = 0
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            segments = self._segments(batch)
+            ops = []
+            for cid in batch:
+                if cid in segments:
+                    ops.append(_set_segment(cid, segments[cid]))
+                else:
+                    # No such customer: the order would not survive the join either
+                    ops.append(UpdateMany({"customer_id": cid, "customer_segment": {"$exists": True}},
+                                          {"$unset": {"customer_segment": ""}}))
+            result = self._client.db["orders"].bulk_write(ops, ordered=False)
+            modified += result.modified_count
+        return modified
+
+    def _segments(self, customer_ids: List[Any]) -> Dict[Any, Any]:
+        cursor = self._client.db["customers"].find(
+            {"customer_id": {"$in": customer_ids}}, {"_id": 0, "customer_id": 1, "segment": 1})
+        return {doc["customer_id"]: doc.get("segment") for doc in cursor if _hashable(doc.get("customer_id"))}
+
+    # ----- change watcher -------------------------------------------------
+
+    def on_change(self, collection: str, event: Dict[str, Any]):
+        """ChangeWatcher listener queueing work for the background thread"""
+        if not self.enabled:
+            return
+        operation = event.get("operationType")
+        oid = event.get("documentKey", {}).get("_id")
+        fields = event.get("updateDescription", {})
+        changed = list(fields.get("updatedFields", {})) + list(fields.get("removedFields", []))
+
+        if collection == "customers":
+            if operation == "insert":
+                self._queue(customer_ids=[(event.get("fullDocument") or {}).get("customer_id")])
+            elif operation == "update":
+                if any(path.split(".")[0] in CUSTOMER_FIELDS for path in changed):
+                    self._queue(customer_oids=[oid])
+            elif operation == "replace" and oid is not None:
+                self._queue(customer_oids=[oid])
+            else:
+                # delete, drop and poll events do not say which customer_id went away
+                self.request_resync()
+        elif collection == "orders":
+            if operation == "insert":
+                self._queue(customer_ids=[(event.get("fullDocument") or {}).get("customer_id")])
+            elif operation in ("update", "replace"):
+                # Our own customer_segment writes come back here and are ignored
+                if operation == "replace" or any(path.split(".")[0] == "customer_id" for path in changed):
+                    self._queue(order_oids=[oid])
+            elif operation != "delete":
+                self.request_resync()
+
+    def _queue(self, customer_ids: Iterable[Any] = (), customer_oids: Iterable[Any] = (),
+               order_oids: Iterable[Any] = ()):
+        with self._state_lock:
+            self._customer_ids.update(v for v in customer_ids if v is not None and _hashable(v))
+            self._customer_oids.update(v for v in customer_oids if v is not None)
+            self._order_oids.update(v for v in order_oids if v is not None)
+        self._wake.set()
+
+    def request_resync(self):
+        """Re-run the backfill over every customer in the background"""
+        if not self.enabled:
+            return
+        with self._state_lock:
+            self._resync = True
+        self._wake.set()
+
+    # ----- background work ------------------------------------------------
+
+    def backfill(self, restart: bool = False) -> Dict[str, Any]:
+        """Resumable batched copy of every customer's segment onto their orders"""
+        db = self._client.db
+        meta_coll = db[DENORMALIZATION_META_COLLECTION]
+        with self._state_lock:
+            meta = dict(self._meta) if self._meta else None
+        if meta is None:
+            meta = meta_coll.find_one({"_id": self.meta_id}) or {"_id": self.meta_id}
+        if restart:
+            meta["last_customer_oid"] = None
+
+        customers = db["customers"]
+        while not self._stop.is_set():
+            query = {}
+            if meta.get("last_customer_oid") is not None:
+                query["_id"] = {"$gt": meta["last_customer_oid"]}
+            batch = list(customers.find(query, {"customer_id": 1, "segment": 1})
+                         .sort("_id", 1).limit(self.batch_size))
+            if not batch:
+                meta["last_customer_oid"] = None
+                meta["backfilled_at"] = datetime.now(timezone.utc)
+                break
+            ops = [_set_segment(doc["customer_id"], doc.get("segment"))
+                   for doc in batch if _hashable(doc.get("customer_id"))]
+            if ops:
+                result = db["orders"].bulk_write(ops, ordered=False)
+                meta["orders_modified"] = meta.get("orders_modified", 0) + result.modified_count
+            meta["last_customer_oid"] = batch[-1]["_id"]
+            meta_coll.replace_one({"_id": self.meta_id}, meta, upsert=True)
+            with self._state_lock:
+                self._meta = dict(meta)
+
+        meta_coll.replace_one({"_id": self.meta_id}, meta, upsert=True)
+        with self._state_lock:
+            self._meta = dict(meta)
+        return self.status()
+
+    def run_once(self) -> Dict[str, Any]:
+        """Finish or repeat the backfill if needed, then apply queued changes"""
+        with self._run_lock:
+            started = time.perf_counter()
+            with self._state_lock:
+                resync = self._resync
+                customer_ids, self._customer_ids = self._customer_ids, set()
+                customer_oids, self._customer_oids = self._customer_oids, set()
+                order_oids, self._order_oids = self._order_oids, set()
+                self._resync = False
+            try:
+                db = self._client.db
+                with self._state_lock:
+                    meta = self._meta
+                if meta is None:
+                    meta = db[DENORMALIZATION_META_COLLECTION].find_one({"_id": self.meta_id}) or {}
+                    with self._state_lock:
+                        self._meta = meta or None
+                # Also resumes a backfill or resync interrupted by a restart
+                if resync or not meta.get("backfilled_at") or meta.get("last_customer_oid") is not None:
+                    self.backfill(restart=resync)
+                if customer_oids:
+                    customer_ids.update(doc.get("customer_id") for doc in
+                                        db["customers"].find({"_id": {"$in": list(customer_oids)}}, {"customer_id": 1}))
+                if order_oids:
+                    customer_ids.update(doc.get("customer_id") for doc in
+                                        db["orders"].find({"_id": {"$in": list(order_oids)}}, {"customer_id": 1}))
+                if customer_ids:
+                    self.sync_customers(customer_ids)
+            except Exception:
+                self._queue(customer_ids, customer_oids, order_oids)
+                if resync:
+                    self.request_resync()
+                raise
+            self.last_run_ms = round((time.perf_counter() - started) * 1000, 2)
+            return self.status()
+
+    def start_background_sync(self, interval: Optional[float] = None, debounce: float = 1.0):
+        """Backfill now, then apply change-stream work as it arrives"""
+        if self._thread and self._thread.is_alive():
+            return
+        if interval is None:
+            interval = float(os.getenv("DENORMALIZE_REFRESH_SECONDS", "300"))
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.warning(f"customer_segment sync failed: {e}")
+                self._wake.wait(interval)
+                if self._wake.is_set():
+                    self._stop.wait(debounce)
+                self._wake.clear()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="customer-segment-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sync thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _set_segment(customer_id: Any, segment: Any) -> UpdateMany:
+    # The $ne guard keeps re-runs from rewriting orders that are already correct
+    return UpdateMany({"customer_id": customer_id, "customer_segment": {"$ne": segment}},
+                      {"$set": {"customer_segment": segment}})
+
+
+# Global denormalizer instance
+segment_denormalizer = SegmentDenormalizer(mongo_client)
@@ -0,0 +1,71 @@
+"""
+Customer segment index
+Caches segment -> customer_id lists so order searches can filter by segment without joining customers
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+from .async_db_client import AsyncMongoDBClient, async_mongo_client
+
+
+class SegmentIndex:
+    """TTL cache of the customer ids in each segment
+
+    Segments larger than max_ids are recorded as too large, and callers fall
+    back to a $lookup join for them since a huge $in list would cost more than
+    it saves.
+    """
+
+    def __init__(self, client: AsyncMongoDBClient, ttl: Optional[float] = None,
+                 max_ids: Optional[int] = None):
+        self._client = client
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEGMENT_INDEX_TTL_SECONDS", "300"))
+        self.max_ids = max_ids or int(os.getenv("SEGMENT_IN_LIST_MAX", "5000"))
+        self._lock = threading.Lock()
+        # segment -> (loaded_at, ids or None when the segment is too large)
+        self._entries: Dict[str, Tuple[float, Optional[List[Any]]]] = {}
+        self._generation = 0
+
+    async def customer_ids(self, segment: str) -> Optional[List[Any]]:
+        """Customer ids in a segment, or None if the segment exceeds max_ids"""
+        with self._lock:
+            entry = self._entries.get(segment)
+            generation = self._generation
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        docs = await self._client.find("customers", {"segment": segment}, {"_id": 0, "customer_id": 1},
+                                       limit=self.max_ids + 1)
+        ids = [doc["customer_id"] for doc in docs if "customer_id" in doc]
+        value = ids if len(ids) <= self.max_ids else None
+        with self._lock:
+            # Skip storing if customers changed while loading
+            if generation == self._generation:
+                self._entries[segment] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self):
+        """Drop all cached segments"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def on_change(self, collection: str, event: Dict[str, Any]):
+        """ChangeWatcher listener"""
+        if collection == "customers":
+            self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": {name: (len(ids) if ids is not None else "too_large")
+                             for name, (_, ids) in self._entries.items()},
+                "ttl_seconds": self.ttl,
+                "max_ids": self.max_ids,
+            }
+
+
+# Global segment index instance
+segment_index = SegmentIndex(async_mongo_client)
@@ -0,0 +1,85 @@
+"""
+BSON-to-JSON serialization for tool results
+Encodes whole result batches to JSON text in C (bson + orjson) with a pure-Python fallback
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Dict, List, Iterable
+import bson
+from bson import ObjectId, Decimal128, Regex, Timestamp, Binary, Code, DBRef, MinKey, MaxKey
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# Cursors opened with these options yield undecoded documents; sizes come from len(doc.raw)
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+def _decimal128_to_float(value: Decimal128) -> float:
+    return float(value.to_decimal())
+
+
+# Exact-type fast path: default() runs once per non-JSON value, so skip the isinstance chain
+_ENCODERS = {
+    ObjectId: ObjectId.__str__,
+    Decimal128: _decimal128_to_float,
+    Decimal: float,
+}
+
+
+def bson_default(obj: Any) -> Any:
+    """Map BSON-specific types to JSON values"""
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Binary) and obj.subtype in (3, 4):
+        return str(obj.as_uuid(obj.subtype))
+    if isinstance(obj, (bytes, Binary)):
+        return base64.b64encode(bytes(obj)).decode("ascii")
+    if isinstance(obj, Regex):
+        return obj.pattern
+    if isinstance(obj, Timestamp):
+        return obj.as_datetime().isoformat()
+    if isinstance(obj, DBRef):
+        return {"$ref": obj.collection, "$id": bson_default(obj.id)}
+    if isinstance(obj, RawBSONDocument):
+        return bson.decode(obj.raw)
+    if isinstance(obj, (Code, MinKey, MaxKey)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def decode_raw(documents: Iterable[RawBSONDocument]) -> List[Dict[str, Any]]:
+    """Decode a batch of raw documents in a single C call"""
+    return bson.decode_all(b"".join(doc.raw for doc in documents))
+
+
+def encode_json(result: Any) -> str:
+    """Serialize a tool result to JSON text in one pass
+
+    ObjectIds anywhere in the tree become strings, datetimes ISO strings and
+    Decimal128 floats. Tools return the text as their response so it is not
+    converted or serialized again on the way out. With orjson installed the
+    encoding runs in C and only BSON-specific values reach Python.
+    """
+    if orjson is not None:
+        return orjson.dumps(result, default=bson_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(result, default=bson_default)
@@ -0,0 +1,85 @@
+"""
+Write hooks for tools that modify data
+Keeps caches and derived collections in step with writes made through the MCP server
+"""
+
+from typing import Optional, Dict, Any, List, Tuple
+from .result_cache import result_cache
+from .db_client import mongo_client
+from .rollups import ALL_ROLLUPS
+from .schema_profiler import schema_profiler
+from .segment_index import segment_index
+from .segment_denormalizer import segment_denormalizer
+from .date_migration import created_at_migration
+
+
+def before_insert(collection: str, documents: List[Dict[str, Any]]):
+    """Run before documents are inserted; may fill in denormalized fields"""
+    if collection == "orders":
+        segment_denormalizer.stamp_orders(documents)
+        created_at_migration.stamp_orders(documents)
+
+
+def before_update(collection: str, filter_criteria: Dict[str, Any], update: Any) -> Optional[Any]:
+    """Run before an update; returns state to hand to after_update"""
+    return segment_denormalizer.before_update(collection, filter_criteria, update)
+
+
+def before_bulk_update(collection: str, updates: List[Tuple[Dict[str, Any], Any, bool]]) -> Optional[Any]:
+    """before_update for a whole bulk job of (filter, update, upsert) writes"""
+    return segment_denormalizer.before_updates(collection, updates)
+
+
+def after_insert(collection: str, documents: List[Dict[str, Any]]):
+    """Run after documents were (possibly partially) inserted"""
+    result_cache.invalidate_collection(collection)
+    mongo_client.catalog.invalidate()
+    schema_profiler.note_inserted(collection)
+    if collection == "customers":
+        segment_index.invalidate()
+        segment_denormalizer.sync_customers(
+            doc.get("customer_id") for doc in documents if isinstance(doc, dict))
+    for rollup in ALL_ROLLUPS:
+        if collection == rollup.source_collection:
+            rollup.note_inserted(documents)
+
+
+def after_update(collection: str, update: Any, upsert: bool = False, before: Optional[Any] = None):
+    """Run after an update was applied; `before` is what before_update returned"""
+    segment_denormalizer.after_update(collection, before, upsert)
+    _note_updates(collection, [(update, upsert)])
+
+
+def after_bulk_update(collection: str, updates: List[Tuple[Any, bool]], before: Optional[Any] = None):
+    """Run once after a bulk job's (update, upsert) writes; `before` is what before_bulk_update returned"""
+    segment_denormalizer.after_update(collection, before)
+    _note_updates(collection, updates)
+
+
+def _note_updates(collection: str, updates: List[Tuple[Any, bool]]):
+    result_cache.invalidate_collection(collection)
+    if any(upsert for _, upsert in updates):
+        mongo_client.catalog.invalidate()
+    schema_profiler.note_changed(collection)
+    if collection == "customers":
+        segment_index.invalidate()
+    # In-memory checks only, so one pass per update stays cheap
+    for update, upsert in updates:
+        if collection == "orders":
+            created_at_migration.note_updated(update, upsert)
+        for rollup in ALL_ROLLUPS:
+            if collection == rollup.source_collection:
+                rollup.note_updated(update, upsert)
+
+
+def after_delete(collection: str):
+    """Run after documents were deleted"""
+    result_cache.invalidate_collection(collection)
+    mongo_client.catalog.invalidate()
+    schema_profiler.note_changed(collection)
+    if collection == "customers":
+        segment_index.invalidate()
+        segment_denormalizer.request_resync()
+    for rollup in ALL_ROLLUPS:
+        if collection == rollup.source_collection:
+            rollup.mark_dirty(None)